@@ -0,0 +1 @@
+"""Benchmarks reproducibles y generador de datos sintéticos"""
@@ -0,0 +1,167 @@
+"""Reportes de planificación y registros históricos sintéticos para los benchmarks.
+
+Uso:
+    python -m benchmarks.generador reportes CARPETA [-n 20] [--haces 4,8,16,32]
+    python -m benchmarks.generador registro RUTA.xlsx [--filas 1000] [--sqlite]
+"""
+import argparse
+import os
+import sys
+from datetime import date, timedelta
+
+import numpy as np
+from openpyxl import Workbook
+
+from qads import decision, registro
+from qads.almacen import COLUMNAS, AlmacenRegistro, ruta_base_para
+
+SEMILLA = 2024
+TECNICAS_PLAN = ["VMAT", "VMAT", "VMAT", "IMRT", "3D", "SBRT", "SRS", "FIF"]
+
+
+def _decimal_con_coma(valor):
+    # El sistema de planificación exporta algunos valores como texto con coma decimal
+    return f"{valor:.3f}".replace(".", ",")
+
+
+def filas_reporte(rng, haces=8, tecnica=None, region=None, filas_extra=20):
+    """Filas de un reporte con la misma disposición de etiquetas que lee reporte.extraer_datos"""
+    tecnica = tecnica or rng.choice(TECNICAS_PLAN)
+    region = region or rng.choice(decision.REGIONES)
+    mcs = rng.uniform(0.15, 0.75, haces)
+    sas = rng.uniform(0.1, 0.7, haces)
+    mu = rng.uniform(80, 450, haces)
+
+    filas = [
+        ["PLAN NAME", f"C1 {tecnica} {region} D", None, None],
+        ["PATIENT NAME", f"PACIENTE {rng.integers(1, 10**6)}", None, None],
+        ["PATIENT ID", str(rng.integers(10**5, 10**7)), None, None],
+        ["PATIENT SEX", rng.choice(["M", "F"]), None, None],
+        ["FRACTIONS", int(rng.choice([1, 3, 5, 15, 20, 25, 28, 33])), None, None],
+        ["MCS", _decimal_con_coma(np.average(mcs, weights=mu)), None, None],
+        ["SAS", round(float(np.average(sas, weights=mu)), 3), None, None],
+        ["PMU", round(float(mu.sum() / 2), 1), None, None],
+        [None, None, None, None],
+        ["BEAM METRICS", None, None, None],
+    ]
+    for i in range(haces):
+        nombre = f"Arc{i + 1}"
+        filas.append([nombre, None, "MCS", _decimal_con_coma(mcs[i])])
+        filas.append([nombre, None, "SAS", round(float(sas[i]), 4)])
+        filas.append([nombre, None, "MU", round(float(mu[i]), 1)])
+    # Secciones posteriores que el lector debe saltear sin recorrerlas
+    filas.append([None, None, None, None])
+    filas.append(["DVH STATISTICS", None, None, None])
+    for i in range(filas_extra):
+        filas.append([f"Estructura {i}", float(rng.uniform(0, 70)), "Gy", float(rng.uniform(0, 100))])
+    return filas
+
+
+def generar_reporte(ruta, rng=None, **kwargs):
+    rng = rng if rng is not None else np.random.default_rng(SEMILLA)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    for fila in filas_reporte(rng, **kwargs):
+        ws.append(fila)
+    wb.save(ruta)
+    return ruta
+
+
+def generar_reportes(carpeta, cantidad=20, haces=(4, 8, 16, 32), semilla=SEMILLA):
+    """Escribe `cantidad` reportes repartidos entre las cantidades de haces indicadas"""
+    rng = np.random.default_rng(semilla)
+    os.makedirs(carpeta, exist_ok=True)
+    return [generar_reporte(os.path.join(carpeta, f"reporte_{i:04d}.xlsx"), rng, haces=haces[i % len(haces)])
+            for i in range(cantidad)]
+
+
+def filas_registro(cantidad, semilla=SEMILLA):
+    """Filas del Registro Histórico con las columnas que escribe exportar_informe"""
+    rng = np.random.default_rng(semilla)
+    reglas = decision.cargar_reglas()
+    tecnicas = rng.choice(TECNICAS_PLAN, cantidad)
+    ca_ped = rng.random(cantidad) < 0.3
+    complejos = rng.random(cantidad) < 0.4
+    fallos = rng.random(cantidad) < 0.08
+    mcs_min = rng.uniform(0.1, 0.6, cantidad)
+    sas_max = rng.uniform(0.3, 0.9, cantidad)
+    mcs = mcs_min + rng.uniform(0.05, 0.3, cantidad)
+    sas = sas_max - rng.uniform(0.05, 0.3, cantidad)
+    pmu = rng.uniform(300, 2500, cantidad)
+    fracciones = rng.choice([1, 3, 5, 15, 20, 25, 28, 33], cantidad)
+    inicio = date(2020, 1, 1)
+    dias = np.sort(rng.integers(0, 6 * 365, cantidad))
+
+    filas = []
+    for i in range(cantidad):
+        tecnica, complejo, ca = str(tecnicas[i]), bool(complejos[i]), bool(ca_ped[i])
+        paquete_2 = reglas.paquete(tecnica, complejo, ca, 2) if fallos[i] else decision.SIN_PAQUETE
+        fila = {
+            "Fecha": (inicio + timedelta(days=int(dias[i]))).strftime("%d/%m/%Y"),
+            "ID": str(100000 + i),
+            "Paciente": f"PACIENTE {i}",
+            "Plan": f"{tecnica} {i % 3 + 1}",
+            "Técnica RT": tecnica,
+            "MCS Min": round(float(mcs_min[i]), 4),
+            "SAS Max": round(float(sas_max[i]), 4),
+            "QA Intento 1": reglas.paquete(tecnica, complejo, ca, 1),
+            "Resultado 1": "No Exitoso" if fallos[i] else "Exitoso",
+            "QA Intento 2": paquete_2 if paquete_2 != decision.SIN_PAQUETE else "-",
+            "Resultado 2": "Exitoso" if paquete_2 != decision.SIN_PAQUETE else "-",
+            "Costo asociado": round(float(rng.uniform(50, 900)), 2),
+            "MCS Prom": round(float(mcs[i]), 4),
+            "SAS Prom": round(float(sas[i]), 4),
+            "PMU": round(float(pmu[i]), 1),
+            "Fracciones": int(fracciones[i]),
+            "CA/Pediátrico": ca,
+        }
+        filas.append(fila)
+    return filas
+
+
+def generar_registro(ruta, cantidad=1000, sqlite=False, semilla=SEMILLA):
+    """Escribe un registro con formato; con sqlite=True también su base, ya sincronizada"""
+    filas = filas_registro(cantidad, semilla)
+    wb = Workbook()
+    ws = wb.active
+    encabezados = list(COLUMNAS)
+    ws.append(encabezados)
+    for fila in filas:
+        ws.append([fila.get(c) for c in encabezados])
+    registro.aplicar_formato_excel(wb, ws)
+    wb.save(ruta)
+    if sqlite:
+        base = ruta_base_para(ruta)
+        if os.path.exists(base):
+            os.remove(base)
+        AlmacenRegistro(base).agregar(filas, en_excel=True)
+    return ruta
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera reportes y registros sintéticos.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    p_rep = sub.add_parser("reportes", help="Reportes de planificación .xlsx")
+    p_rep.add_argument("carpeta")
+    p_rep.add_argument("-n", "--cantidad", type=int, default=20)
+    p_rep.add_argument("--haces", default="4,8,16,32", help="Cantidades de haces, separadas por coma")
+    p_reg = sub.add_parser("registro", help="Registro Histórico .xlsx")
+    p_reg.add_argument("ruta")
+    p_reg.add_argument("--filas", type=int, default=1000)
+    p_reg.add_argument("--sqlite", action="store_true", help="Generar también la base SQLite")
+    for p in (p_rep, p_reg):
+        p.add_argument("--semilla", type=int, default=SEMILLA)
+    args = parser.parse_args(argv)
+
+    if args.comando == "reportes":
+        haces = tuple(int(h) for h in args.haces.split(","))
+        rutas = generar_reportes(args.carpeta, args.cantidad, haces, args.semilla)
+        print(f"{len(rutas)} reportes en {args.carpeta}")
+    else:
+        generar_registro(args.ruta, args.filas, args.sqlite, args.semilla)
+        print(f"Registro de {args.filas} filas en {args.ruta}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""Benchmarks sin interfaz de las etapas de QADS, comparados contra una línea base fija.
+
+Se ejecuta desde la raíz del repositorio (usa reglas_qa.csv y costos.xlsx):
+    python -m benchmarks.medir                      # compara con benchmarks/baseline.json
+    python -m benchmarks.medir --tamanos 100,1000,100000
+    python -m benchmarks.medir --guardar-base       # agrega a la base las etapas que no tienen
+    python -m benchmarks.medir --rehacer-base       # reemplaza la línea base (otra máquina)
+
+Los reportes y registros se generan con una semilla fija en una carpeta
+temporal, así cada corrida mide exactamente los mismos datos. La línea
+base es fija: cada etapa conserva el primer tiempo que se guardó, y las
+mejoras se ven como "(más rápido)" en lugar de mover la referencia.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+from openpyxl import load_workbook
+
+from benchmarks import generador
+from qads import costos, decision, registro, reporte
+from qads.almacen import AlmacenRegistro, ruta_base_para
+from qads.simulacion import COLUMNAS_HISTORIAL
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUTA_BASE = os.path.join(RAIZ, "benchmarks", "baseline.json")
+HACES = (4, 16, 64)
+TAMANOS = (100, 1000, 10000)
+REPORTES_POR_TAMANO = 10
+EXPORTACIONES_POR_TANDA = 10  # como sincronizador.CANTIDAD: filas por escritura del Excel diferida
+TOLERANCIA = 0.25  # una etapa más de 25 % más lenta que la base cuenta como regresión
+# Tiempo máximo de import de cada interfaz (hasta poder crear la ventana), en ms
+PRESUPUESTO_ARRANQUE = {"arranque.main": 250, "arranque.inicio": 250, "arranque.nucleo": 250}
+# Lo que importan las interfaces al arrancar, sin tkinter: se mide aunque no haya Tk
+MODULOS_NUCLEO = "qads.decision, qads.evaluacion, qads.sincronizador"
+# Ninguno de estos puede cargarse antes de que aparezca el menú
+MODULOS_PESADOS = ("pandas", "numpy", "openpyxl")
+
+_MEDIR_IMPORT = """
+import sys, time
+comienzo = time.perf_counter()
+import {modulo}
+print((time.perf_counter() - comienzo) * 1000)
+print(",".join(m for m in {pesados!r} if m in sys.modules))
+"""
+
+
+def cronometrar(funcion, repeticiones=5, preparar=None):
+    """Mejor tiempo en milisegundos de `repeticiones` llamadas, como timeit.
+
+    Una primera llamada sin medir calienta cachés e imports; preparar() corre
+    fuera del tiempo y su resultado se pasa a la función.
+    """
+    tiempos = []
+    for i in range(repeticiones + 1):
+        argumento = preparar() if preparar else None
+        inicio = time.perf_counter()
+        funcion(argumento) if preparar else funcion()
+        if i:
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+    return min(tiempos)
+
+
+def medir_arranque(resultados, repeticiones):
+    """Import de main.py, inicio.py y del núcleo que usan, cada uno en un intérprete nuevo.
+
+    Devuelve ({etapa: módulos pesados cargados}, {etapa: motivo}) con las
+    etapas que no se pudieron medir: sin tkinter (una máquina sin interfaz)
+    las interfaces no se pueden importar, pero el núcleo sí se mide.
+    """
+    cargados, no_disponibles = {}, {}
+    for etapa, modulo in (("main", "main"), ("inicio", "inicio"), ("nucleo", MODULOS_NUCLEO)):
+        codigo = _MEDIR_IMPORT.format(modulo=modulo, pesados=MODULOS_PESADOS)
+        tiempos = []
+        for _ in range(repeticiones):
+            proceso = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True, text=True)
+            if proceso.returncode:
+                error = proceso.stderr.strip().splitlines()
+                no_disponibles[f"arranque.{etapa}"] = error[-1] if error else f"código {proceso.returncode}"
+                break
+            salida = proceso.stdout.splitlines()
+            tiempos.append(float(salida[0]))
+            cargados[f"arranque.{etapa}"] = salida[1] if len(salida) > 1 else ""
+        if tiempos:
+            resultados[f"arranque.{etapa}"] = min(tiempos)
+    return {e: c for e, c in cargados.items() if c}, no_disponibles
+
+
+def medir_extraccion(carpeta, resultados, repeticiones):
+    datos_por_haces = {}
+    for haces in HACES:
+        rutas = generador.generar_reportes(os.path.join(carpeta, f"h{haces}"), REPORTES_POR_TAMANO, (haces,))
+        ms = cronometrar(lambda: [reporte.extraer_datos(r) for r in rutas], repeticiones)
+        resultados[f"extraccion.haces_{haces}"] = ms / len(rutas)
+        datos_por_haces[haces] = [reporte.extraer_datos(r) for r in rutas]
+    return [d for lista in datos_por_haces.values() for d in lista]
+
+
+def medir_decision(datos, resultados, repeticiones):
+    umbrales = decision.Umbrales()
+
+    def decidir():
+        for d in datos:
+            tecnica, region = decision.inferir_tecnica_region(d["Plan"])
+            complejo = decision.es_plan_complejo(d, tecnica, umbrales)
+            decision.obtener_paquete_qa(tecnica, complejo, region in decision.REGIONES_CON_CA, 1)
+
+    resultados["decision.por_plan"] = cronometrar(decidir, repeticiones) / len(datos)
+
+
+def medir_costos(resultados, repeticiones):
+    resultados["costos.lectura"] = cronometrar(lambda: costos._leer_precios(costos.RUTA_COSTOS), repeticiones)
+    tabla = costos.cargar_tabla()
+    paquetes = decision.paquetes_posibles() * 100
+    ms = cronometrar(lambda: [tabla.costo_paquete(p) for p in paquetes], repeticiones)
+    resultados["costos.consulta"] = ms / len(paquetes)
+
+
+def medir_registro(carpeta, tamano, resultados, repeticiones):
+    original = generador.generar_registro(os.path.join(carpeta, f"registro_{tamano}.xlsx"), tamano, sqlite=True)
+    fila = generador.filas_registro(1, semilla=tamano)[0]
+    trabajo = os.path.join(carpeta, f"trabajo_{tamano}.xlsx")
+
+    def copiar():
+        shutil.copy(original, trabajo)
+        shutil.copy(ruta_base_para(original), ruta_base_para(trabajo))
+
+    def exportar(_):
+        almacen = AlmacenRegistro(ruta_base_para(trabajo))
+        almacen.agregar([fila])
+        registro.sincronizar_excel(almacen, trabajo)
+
+    resultados[f"exportacion.registro_{tamano}"] = cronometrar(exportar, repeticiones, copiar)
+
+    def exportar_tanda(_):
+        # Escritura diferida: varias filas a la base y una sola escritura del Excel
+        almacen = AlmacenRegistro(ruta_base_para(trabajo))
+        for _ in range(EXPORTACIONES_POR_TANDA):
+            almacen.agregar([fila])
+        registro.sincronizar_excel(almacen, trabajo)
+
+    ms = cronometrar(exportar_tanda, repeticiones, copiar)
+    resultados[f"exportacion_diferida.registro_{tamano}"] = ms / EXPORTACIONES_POR_TANDA
+
+    def abrir():
+        wb = load_workbook(original)
+        return wb, wb.active
+
+    resultados[f"formato.registro_{tamano}"] = cronometrar(lambda libro: registro.aplicar_formato_excel(*libro),
+                                                           repeticiones, abrir)
+
+    almacen = AlmacenRegistro(ruta_base_para(original))
+    reglas = decision.cargar_reglas()
+    df = almacen.dataframe(list(COLUMNAS_HISTORIAL)).rename(columns=COLUMNAS_HISTORIAL)
+    ms = cronometrar(lambda: reglas.evaluar(df, decision.Umbrales()), repeticiones)
+    resultados[f"decision.vectorizada_{tamano}"] = ms / tamano
+
+
+def correr(tamanos=TAMANOS, repeticiones=5):
+    """Mide todas las etapas.
+
+    Devuelve {etapa: milisegundos} (por reporte, plan o exportación), las
+    etapas de arranque que cargaron módulos pesados y las que no se pudieron
+    medir (ver medir_arranque).
+    """
+    resultados = {}
+    pesados, no_disponibles = medir_arranque(resultados, repeticiones)
+    with tempfile.TemporaryDirectory(prefix="qads_bench_") as carpeta:
+        datos = medir_extraccion(carpeta, resultados, repeticiones)
+        medir_decision(datos, resultados, repeticiones)
+        medir_costos(resultados, repeticiones)
+        for tamano in tamanos:
+            medir_registro(carpeta, tamano, resultados, repeticiones)
+    return resultados, pesados, no_disponibles
+
+
+def comparar(resultados, base, tolerancia=TOLERANCIA):
+    """Líneas de texto con cada etapa contra la base; devuelve (líneas, hubo regresión)"""
+    lineas, regresion = [], False
+    ancho = max(len(etapa) for etapa in resultados)
+    for etapa, ms in resultados.items():
+        referencia = base.get(etapa)
+        if referencia:
+            relacion = ms / referencia
+            marca = ""
+            if relacion > 1 + tolerancia:
+                marca, regresion = "  <-- más lento", True
+            elif relacion < 1 - tolerancia:
+                marca = "  (más rápido)"
+            linea = f"{etapa:<{ancho}}  {ms:11.4f} ms  base {referencia:11.4f} ms  x{relacion:5.2f}{marca}"
+        else:
+            linea = f"{etapa:<{ancho}}  {ms:11.4f} ms  (sin base)"
+        # El arranque además tiene un máximo absoluto, independiente de la base
+        presupuesto = PRESUPUESTO_ARRANQUE.get(etapa)
+        if presupuesto and ms > presupuesto:
+            linea, regresion = f"{linea}  <-- supera el presupuesto de {presupuesto} ms", True
+        lineas.append(linea)
+    return lineas, regresion
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mide las etapas de QADS y las compara con la línea base.")
+    parser.add_argument("--tamanos", default=",".join(map(str, TAMANOS)),
+                        help="Filas de los registros a medir, separadas por coma (de 100 a 100000)")
+    parser.add_argument("-r", "--repeticiones", type=int, default=5)
+    parser.add_argument("--base", default=RUTA_BASE, help="Archivo JSON con la línea base")
+    parser.add_argument("--guardar-base", action="store_true",
+                        help="Agregar a la línea base las etapas que todavía no tienen (las demás no cambian)")
+    parser.add_argument("--rehacer-base", action="store_true",
+                        help="Reemplazar toda la línea base con esta corrida (sólo al cambiar de máquina)")
+    parser.add_argument("--estricto", action="store_true", help="Salir con código 1 si alguna etapa empeoró")
+    args = parser.parse_args(argv)
+
+    tamanos = tuple(int(t) for t in args.tamanos.split(","))
+    resultados, pesados, no_disponibles = correr(tamanos, args.repeticiones)
+
+    guardada = {}
+    if os.path.exists(args.base):
+        with open(args.base, encoding="utf-8") as f:
+            guardada = json.load(f)
+    base = guardada.get("resultados", {})
+    lineas, regresion = comparar(resultados, base)
+    for etapa, motivo in no_disponibles.items():
+        lineas.append(f"{etapa}: no disponible ({motivo})")
+    for etapa, modulos in pesados.items():
+        lineas.append(f"{etapa} carga {modulos} al arrancar  <-- deben importarse después del menú")
+        regresion = True
+    print("\n".join(lineas))
+
+    if args.guardar_base or args.rehacer_base:
+        nuevas = {k: round(v, 6) for k, v in resultados.items()}
+        if not args.rehacer_base:
+            nuevas = {**nuevas, **base}  # Las etapas que ya tenían base conservan su valor
+        with open(args.base, "w", encoding="utf-8") as f:
+            json.dump({"fecha": guardada.get("fecha") if base and not args.rehacer_base
+                       else datetime.now().isoformat(timespec="seconds"),
+                       "maquina": f"{platform.system()} {platform.machine()} / Python {platform.python_version()}",
+                       "numpy": np.__version__,
+                       "resultados": nuevas},
+                      f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"Línea base guardada en {args.base}")
+    return 1 if regresion and args.estricto else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
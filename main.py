@@ -1,12 +1,33 @@
 import tkinter as tk
-from tkinter import filedialog, messagebox
-import pandas as pd
+from tkinter import filedialog, messagebox, ttk
+import importlib
 import os
-from datetime import datetime
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from qads import decision, evaluacion
+from qads.evaluacion import Cancelado
+from qads.sincronizador import Sincronizador
+
+# Estos módulos cargan pandas y openpyxl (casi un segundo): se importan en segundo
+# plano después de dibujar el menú, o al usarlos si todavía no terminaron
+MODULOS_DIFERIDOS = ("qads.cache_reportes", "qads.costos", "qads.registro", "qads.almacen")
+REVISION_EXCEL_MS = 1000  # cada cuánto se mira si corresponde escribir el Excel del registro
+MAX_PREVIOS = 3  # controles anteriores del paciente que se muestran en su pantalla
+
 
 class RadioRiskApp:
+    # Umbrales que se pueden editar: (etiqueta, atributo, tipo), en el orden de umbrales.txt
+    CAMPOS_UMBRALES = [
+        ("MCS Mínimo (Prom.):", "u_mcs", float),
+        ("SAS Máximo (Prom.):", "u_sas", float),
+        ("Fracciones Límite:", "u_fractions", int),
+        ("MCS Mínimo:", "u_mcs_min", float),
+        ("SAS Máximo:", "u_sas_max", float),
+        ("PMU:", "u_pmu", int),
+    ]
+    TAMANO_FUENTE = 9
+
     def __init__(self, root):
         self.root = root
         self.root.title("Evaluación de Riesgo en Radioterapia")
@@ -14,57 +35,101 @@ class RadioRiskApp:
         self.alto_fijo = 600
         self.root.geometry(f"{self.ancho_fijo}x{self.alto_fijo}")
 
-        self.datos_paciente = {}
+        self.caso = None  # evaluacion.CasoQA del paciente cargado
+        self.previos = []  # controles del mismo paciente que ya estaban en el registro
         self.entries = {}
-        self.intento_actual = 1
-        self.historial_intentos = {}  # Para guardar qué se usó en cada intento para el Excel
+
+        # Lecturas y escrituras de archivos se hacen en este hilo para no congelar la ventana
+        self.ejecutor = ThreadPoolExecutor(max_workers=1)
+        # Las exportaciones se juntan y el Excel se escribe por tandas (ver qads.sincronizador),
+        # en un hilo propio: una escritura lenta no demora la carga de pacientes ni las exportaciones
+        self.sincronizador = Sincronizador()
+        self.ejecutor_excel = ThreadPoolExecutor(max_workers=1)
+        self.volcado = None
 
         self.archivo_config = "config_ruta.txt"
         self.ruta_informe = self.cargar_ruta_persistente()
 
         self.archivo_umbrales = "umbrales.txt"
-        # Umbrales por defecto
-        self.u_mcs = 0.5
-        self.u_sas = 0.5
-        self.u_fractions = 3
-        self.u_mcs_min = 0.5
-        self.u_sas_max = 0.5
-        self.u_pmu = 1000
         self.cargar_umbrales()
 
+        # Las reglas de QA se compilan al iniciar para avisar enseguida si el archivo tiene errores
+        try:
+            decision.cargar_reglas()
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudieron leer las reglas de QA ({decision.RUTA_REGLAS}): {e}")
+
         self.create_main_menu()
+        self.root.after_idle(self.precargar_modulos)
+        self.root.protocol("WM_DELETE_WINDOW", self.al_cerrar)
+        if self.ruta_informe:
+            # Filas que la sesión anterior no llegó a pasar al Excel
+            self.sincronizador.anotar(self.ruta_informe, 0)
+        self.root.after(REVISION_EXCEL_MS, self.revisar_excel)
+
+    def precargar_modulos(self):
+        # Va al mismo hilo que las tareas de archivos, así siempre se ejecuta antes que ellas
+        self.ejecutor.submit(lambda: [importlib.import_module(m) for m in MODULOS_DIFERIDOS])
+        self.ejecutor_excel.submit(self.reproducir_diario)
+
+    def reproducir_diario(self):
+        # Exportaciones que no llegaron a la base la última vez (cierre forzado, red caída)
+        for error in evaluacion.reproducir_diario():
+            print(f"No se pudo aplicar el diario de exportaciones: {error}")
+
+    # --- ESCRITURA DIFERIDA DEL EXCEL ---
+    def revisar_excel(self):
+        """Escribe en segundo plano los Excel que ya juntaron suficientes filas o llevan tiempo esperando"""
+        if self.volcado is None or self.volcado.done():
+            listas = self.sincronizador.listas()
+            if listas:
+                self.volcado = self.ejecutor_excel.submit(self.sincronizador.volcar, listas)
+        self.root.after(REVISION_EXCEL_MS, self.revisar_excel)
+
+    def al_cerrar(self):
+        if not self.sincronizador.hay_pendientes():
+            self.root.destroy()
+            return
+
+        def al_terminar(errores):
+            if errores:
+                messagebox.showwarning("Atención", "No se pudo actualizar el Excel del registro:\n"
+                                       + "\n".join(errores.values())
+                                       + "\n\nLos controles quedaron en la base y se pasarán al Excel la próxima vez.")
+            self.root.destroy()
+
+        def tarea(cancelado):
+            # Lo que ya se estaba escribiendo termina antes de escribir lo que falta
+            return self.ejecutor_excel.submit(self.sincronizador.volcar).result()
+
+        self.ejecutar_en_segundo_plano("Actualizando el Excel del registro...", tarea, al_terminar)
 
     # --- PERSISTENCIA DE UMBRALES ---
     def cargar_umbrales(self):
-        if os.path.exists(self.archivo_umbrales):
-            try:
-                with open(self.archivo_umbrales, "r") as f:
-                    lineas = f.readlines()
-                    self.u_mcs = float(lineas[0].strip())
-                    self.u_sas = float(lineas[1].strip())
-                    self.u_fractions = int(lineas[2].strip())
-                    self.u_mcs_min = float(lineas[3].strip())
-                    self.u_sas_max = float(lineas[4].strip())
-                    self.u_pmu = int(lineas[5].strip())
-            except:
-                pass  # Si falla, usa los valores por defecto
-
-    def guardar_umbrales_archivo(self, mcs, sas, frac, mcs_min, sas_max, pmu):
+        u = decision.cargar_umbrales(self.archivo_umbrales)
+        self.u_mcs, self.u_sas, self.u_fractions = u.mcs, u.sas, u.fractions
+        self.u_mcs_min, self.u_sas_max, self.u_pmu = u.mcs_min, u.sas_max, u.pmu
+
+    def umbrales(self):
+        """Umbrales vigentes como objeto para la lógica de qads"""
+        return decision.Umbrales(self.u_mcs, self.u_sas, self.u_fractions,
+                                 self.u_mcs_min, self.u_sas_max, self.u_pmu)
+
+    def guardar_umbrales_archivo(self, valores):
+        """Guarda {atributo: valor} en umbrales.txt, una línea por umbral editable"""
         with open(self.archivo_umbrales, "w") as f:
-            f.write(f"{mcs}\n{sas}\n{frac}\n{mcs_min}\n{sas_max}\n{pmu}")
-        self.u_mcs, self.u_sas, self.u_fractions, self.u_mcs_min, self.u_sas_max, self.u_pmu = mcs, sas, frac, mcs_min, sas_max, pmu
+            f.write("\n".join(str(valores[atributo]) for _, atributo, _ in self.CAMPOS_UMBRALES))
+        for atributo, valor in valores.items():
+            setattr(self, atributo, valor)
 
     def validar_y_guardar_umbrales(self):
         try:
-            # Sanitización: reemplazar coma por punto
-            mcs = float(self.tmp_mcs.get().replace(',', '.'))
-            sas = float(self.tmp_sas.get().replace(',', '.'))
-            frac = int(self.tmp_frac.get())
-            mcs_min = float(self.tmp_mcs_min.get().replace(',', '.'))
-            sas_max = float(self.tmp_sas_max.get().replace(',', '.'))
-            pmu = int(self.tmp_pmu.get())
-
-            self.guardar_umbrales_archivo(mcs, sas, frac, mcs_min, sas_max, pmu)
+            # Sanitización: reemplazar coma por punto en los decimales
+            valores = {atributo: tipo(self.tmp_umbrales[atributo].get().replace(',', '.') if tipo is float
+                                      else self.tmp_umbrales[atributo].get())
+                       for _, atributo, tipo in self.CAMPOS_UMBRALES}
+
+            self.guardar_umbrales_archivo(valores)
             messagebox.showinfo("Éxito", "Umbrales actualizados correctamente.")
             self.create_config_menu()
         except ValueError:
@@ -118,6 +183,8 @@ class RadioRiskApp:
         tk.Button(c, text="Crear Nuevo Registro", width=30, height=2, bg="#E1E1E1", command=self.crear_nuevo_registro).pack(pady=5)
         tk.Button(c, text="Configurar Umbrales", width=30, height=2, bg="#E1E1E1", command=self.create_thresholds_menu).pack(pady=5)
         tk.Button(c, text="Configurar Costos", width=30, height=2, bg="#E1E1E1", command=self.abrir_excel_costos).pack(pady=5)
+        tk.Button(c, text="Generar Excel del Registro", width=30, height=2, bg="#E1E1E1", command=self.generar_excel_registro).pack(pady=5)
+        tk.Button(c, text="Archivar Controles Antiguos", width=30, height=2, bg="#E1E1E1", command=self.archivar_registro).pack(pady=5)
         tk.Button(c, text="Volver al Menú Principal", bg="#FFCCCB", command=self.create_main_menu).pack(side="bottom",pady=30)
 
     def create_thresholds_menu(self):
@@ -134,36 +201,14 @@ class RadioRiskApp:
         frame_form.pack(expand=True)
 
         # Definir los widgets de entrada
-        self.tmp_mcs = tk.Entry(frame_form, justify="center", width=12)
-        self.tmp_mcs.insert(0, str(self.u_mcs))
-
-        self.tmp_sas = tk.Entry(frame_form, justify="center", width=12)
-        self.tmp_sas.insert(0, str(self.u_sas))
-
-        self.tmp_frac = tk.Entry(frame_form, justify="center", width=12)
-        self.tmp_frac.insert(0, str(self.u_fractions))
-
-        self.tmp_mcs_min = tk.Entry(frame_form, justify="center", width=12)
-        self.tmp_mcs_min.insert(0, str(self.u_mcs_min))
-
-        self.tmp_sas_max = tk.Entry(frame_form, justify="center", width=12)
-        self.tmp_sas_max.insert(0, str(self.u_sas_max))
-
-        self.tmp_pmu = tk.Entry(frame_form, justify="center", width=12)
-        self.tmp_pmu.insert(0, str(self.u_pmu))
-
-        # Lista de campos para el bucle
-        campos = [
-            ("MCS Mínimo (Prom.):", self.tmp_mcs),
-            ("SAS Máximo (Prom.):", self.tmp_sas),
-            ("Fracciones Límite:", self.tmp_frac),
-            ("MCS Mínimo:", self.tmp_mcs_min),
-            ("SAS Máximo:", self.tmp_sas_max),
-            ("PMU:", self.tmp_pmu)
-        ]
+        self.tmp_umbrales = {}
+        for _, atributo, _ in self.CAMPOS_UMBRALES:
+            self.tmp_umbrales[atributo] = tk.Entry(frame_form, justify="center", width=12)
+            self.tmp_umbrales[atributo].insert(0, str(getattr(self, atributo)))
 
         # El truco del GRID: columna 0 para etiquetas, columna 1 para entradas
-        for i, (texto, entry) in enumerate(campos):
+        for i, (texto, atributo, _) in enumerate(self.CAMPOS_UMBRALES):
+            entry = self.tmp_umbrales[atributo]
             # Etiqueta: alineada a la derecha (sticky="e")
             tk.Label(frame_form, text=texto, font=("Arial", 10, "bold"),anchor="e", width=18).grid(row=i, column=0, pady=10, padx=10, sticky="e")
 
@@ -215,20 +260,93 @@ class RadioRiskApp:
             messagebox.showinfo("Configuración", f"Ruta actualizada correctamente:\n{nueva_ruta}")
             self.create_config_menu()  # Refrescar para mostrar cambios si fuera necesario
 
+    # --- TAREAS EN SEGUNDO PLANO ---
+    def ejecutar_en_segundo_plano(self, mensaje, tarea, al_terminar, error="Error"):
+        """Ejecuta tarea(cancelado) fuera del hilo de Tk mientras se muestra una ventana de espera.
+
+        El resultado (o el error) vuelve al hilo de Tk con root.after. Si la tarea
+        lanza Cancelado no se muestra nada; tarea no debe tocar widgets.
+        """
+        cancelado = threading.Event()
+        futuro = self.ejecutor.submit(tarea, cancelado)
+        espera = self.mostrar_espera(mensaje, cancelado)
+
+        def revisar():
+            if not futuro.done():
+                self.root.after(50, revisar)
+                return
+            espera.grab_release()
+            espera.destroy()
+            try:
+                resultado = futuro.result()
+            except Cancelado:
+                return
+            except Exception as e:
+                messagebox.showerror("Error", f"{error}: {e}")
+                return
+            al_terminar(resultado)
+
+        self.root.after(50, revisar)
+
+    def mostrar_espera(self, mensaje, cancelado):
+        """Ventana modal con barra de progreso y botón para cancelar"""
+        espera = tk.Toplevel(self.root)
+        espera.title("Procesando")
+        espera.resizable(False, False)
+        espera.transient(self.root)
+        espera.protocol("WM_DELETE_WINDOW", lambda: None)
+
+        lbl = tk.Label(espera, text=mensaje, font=("Arial", 10))
+        lbl.pack(padx=30, pady=(20, 10))
+        barra = ttk.Progressbar(espera, mode="indeterminate", length=250)
+        barra.pack(padx=30, pady=5)
+        barra.start(10)
+
+        def cancelar():
+            cancelado.set()
+            lbl.config(text="Cancelando...")
+            btn.config(state="disabled")
+
+        btn = tk.Button(espera, text="Cancelar", width=12, command=cancelar)
+        btn.pack(pady=(10, 20))
+        # En Linux grab_set falla si la ventana todavía no se dibujó
+        espera.wait_visibility()
+        espera.grab_set()
+        return espera
+
     def cargar_archivo(self):
         filepath = filedialog.askopenfilename(title="Seleccionar reporte", filetypes=[("Excel files", "*.xlsx *.xls")])
         if filepath:
-            try:
-                self.intento_actual = 1
-                self.historial_intentos = {}
-                self.extraer_datos(filepath)
-                self.mostrar_detalles_paciente()
-            except Exception as e:
-                messagebox.showerror("Error", f"Error: {e}")
+            ruta = self.ruta_informe
+
+            def tarea(cancelado):
+                datos = evaluacion.cargar_reporte(filepath)
+                if cancelado.is_set():
+                    raise Cancelado()
+                return datos, self.buscar_previos(ruta, datos.get("ID"))
+
+            self.ejecutar_en_segundo_plano("Leyendo el reporte...", tarea, self.mostrar_paciente_cargado)
+
+    @staticmethod
+    def buscar_previos(ruta, id_paciente, plan=None):
+        # Si el registro no está disponible (red caída) igual se puede evaluar el paciente
+        if not ruta:
+            return []
+        try:
+            return evaluacion.controles_previos(ruta, id_paciente, plan)
+        except Exception as e:
+            print(f"No se pudo consultar el registro: {e}")
+            return []
+
+    def mostrar_paciente_cargado(self, resultado):
+        datos, self.previos = resultado
+        self.caso = evaluacion.CasoQA.desde_reporte(datos)
+        self.mostrar_detalles_paciente()
 
     def abrir_excel_costos(self):
         """Abre el archivo de costos con la aplicación predeterminada del sistema"""
-        ruta_costos = "costos.xlsx"
+        from qads import costos
+        ruta_costos = costos.RUTA_COSTOS
 
         if os.path.exists(ruta_costos):
             try:
@@ -241,49 +359,17 @@ class RadioRiskApp:
         else:
             messagebox.showerror("Error", "No se encontró el archivo 'costos.xlsx' en la carpeta del proyecto.")
 
-    def extraer_datos(self, path):
-        df = pd.read_excel(path, header=None)
-
-        def buscar_valor(etiqueta):
-            for i, row in df.iterrows():
-                for j, cell in enumerate(row):
-                    if str(cell).strip() == etiqueta:
-                        return str(df.iloc[i, j + 1]).strip()
-            return "-"
-
-        mcs_values, sas_values = [], []
-        en_beam_metrics = False
-        for i, row in df.iterrows():
-            if str(row[0]).strip() == "BEAM METRICS":
-                en_beam_metrics = True
-                continue
-            if en_beam_metrics:
-                try:
-                    metrica, valor_str = str(row[2]).strip(), str(row[3]).replace(',', '.')
-                    if metrica == "MCS":
-                        mcs_values.append(float(valor_str))
-                    elif metrica == "SAS":
-                        sas_values.append(float(valor_str))
-                except:
-                    continue
-
-        self.datos_paciente = {
-            "Plan": buscar_valor("PLAN NAME"),
-            "Nombre": buscar_valor("PATIENT NAME"),
-            "ID": buscar_valor("PATIENT ID"),
-            "Sexo": buscar_valor("PATIENT SEX"),
-            "Fractions": buscar_valor("FRACTIONS"),
-            "MCS": buscar_valor("MCS"),
-            "SAS": buscar_valor("SAS"),
-            "PMU": buscar_valor("PMU"),
-            "MCSmin": str(min(mcs_values)) if mcs_values else "-",
-            "SASmax": str(max(sas_values)) if sas_values else "-"
-        }
-
     def actualizar_checkbox_ca(self, *args):
         region = self.entries["Region"].get()
-        regiones_con_ca = ["COLON/RECTO", "PULMON", "CERVIX/UTERO", "CYC"]
-        self.entries["CA"].set(region in regiones_con_ca)
+        self.entries["CA"].set(region in decision.REGIONES_CON_CA)
+
+    def leer_formulario(self):
+        """Pasa al caso lo que el usuario eligió en la pantalla del paciente"""
+        self.caso.sexo = self.entries["Sexo"].get()
+        self.caso.region = self.entries["Region"].get()
+        self.caso.tecnica = self.entries["Tecnica"].get()
+        self.caso.cambios_anatomicos = self.entries["CA"].get()
+        self.caso.pediatrico = self.entries["PPed"].get()
 
     def mostrar_detalles_paciente(self):
         for widget in self.root.winfo_children(): widget.destroy()
@@ -296,23 +382,16 @@ class RadioRiskApp:
         frame_info = tk.LabelFrame(container, text=" Datos Extraídos ", padx=15, pady=10)
         frame_info.pack(padx=10, fill="both", expand=True)
 
-        op_sexo, op_tecnica = ["M", "F", "-"], ["3D", "IMRT", "VMAT", "SRS", "SBRT", "FIF"]
-        op_anatomica = ["MAMA", "COLON/RECTO", "PULMON", "PROSTATA", "CERVIX/UTERO", "ESOFAGO", "CYC", "PANCREAS",
-                        "VEJIGA", "ENCEFALO/SNC", "MIEMBROS", "OTROS"]
-
-        plan_name = self.datos_paciente.get("Plan", "").upper()
-        palabras = plan_name.split()
-        tecnica_def = next((t for t in op_tecnica if t in plan_name), "3D")
-        region_def = palabras[2] if len(palabras) >= 3 and palabras[2] in op_anatomica else "OTROS"
+        op_sexo, op_tecnica, op_anatomica = ["M", "F", "-"], decision.TECNICAS, decision.REGIONES
+        fuente = ("Arial", self.TAMANO_FUENTE)
 
         # Variables de control
-        self.entries["Sexo"] = tk.StringVar(value=self.datos_paciente.get("Sexo", "-"))
-        self.entries["Region"] = tk.StringVar(value=region_def)
-        self.entries["Tecnica"] = tk.StringVar(value=tecnica_def)
-        self.entries["CA"] = tk.BooleanVar()
-        self.entries["PPed"] = tk.BooleanVar()
+        self.entries["Sexo"] = tk.StringVar(value=self.caso.sexo)
+        self.entries["Region"] = tk.StringVar(value=self.caso.region)
+        self.entries["Tecnica"] = tk.StringVar(value=self.caso.tecnica)
+        self.entries["CA"] = tk.BooleanVar(value=self.caso.cambios_anatomicos)
+        self.entries["PPed"] = tk.BooleanVar(value=self.caso.pediatrico)
         self.entries["Region"].trace_add("write", self.actualizar_checkbox_ca)
-        self.actualizar_checkbox_ca()
 
         # --- RESTAURACIÓN DE TODOS LOS CAMPOS ---
         campos = [
@@ -329,9 +408,9 @@ class RadioRiskApp:
         for label, key in campos:
             row = tk.Frame(frame_info)
             row.pack(fill="x", pady=1)
-            tk.Label(row, text=label, width=15, anchor="w", font=("Arial", 9)).pack(side="left")
-            e = tk.Entry(row, font=("Arial", 9))
-            e.insert(0, self.datos_paciente.get(key, "-"))
+            tk.Label(row, text=label, width=15, anchor="w", font=fuente).pack(side="left")
+            e = tk.Entry(row, font=fuente)
+            e.insert(0, self.caso.datos.get(key, "-"))
             e.config(state="readonly")
             e.pack(side="right", fill="x", expand=True)
 
@@ -340,85 +419,39 @@ class RadioRiskApp:
                               ("Técnica", "Tecnica", op_tecnica)]:
             row = tk.Frame(frame_info);
             row.pack(fill="x", pady=2)
-            tk.Label(row, text=lab, width=15, anchor="w", font=("Arial", 9, "bold")).pack(side="left")
+            tk.Label(row, text=lab, width=15, anchor="w", font=(*fuente, "bold")).pack(side="left")
             tk.OptionMenu(row, self.entries[key], *ops).pack(side="right", fill="x", expand=True)
 
-        tk.Checkbutton(frame_info, text="Cambios Anatómicos", variable=self.entries["CA"], font=("Arial", 9)).pack(
+        tk.Checkbutton(frame_info, text="Cambios Anatómicos", variable=self.entries["CA"], font=fuente).pack(
             anchor="w")
-        tk.Checkbutton(frame_info, text="Paciente Pediátrico", variable=self.entries["PPed"], font=("Arial", 9)).pack(
+        tk.Checkbutton(frame_info, text="Paciente Pediátrico", variable=self.entries["PPed"], font=fuente).pack(
             anchor="w")
 
+        if self.previos:
+            frame_previos = tk.LabelFrame(container, text=f" Controles Anteriores ({len(self.previos)}) ", padx=15)
+            frame_previos.pack(padx=10, pady=(5, 0), fill="x")
+            for fila in self.previos[-MAX_PREVIOS:]:
+                texto = f"{fila['Fecha']}  {fila['Plan']}:  {fila['QA Intento 1']} ({fila['Resultado 1']})"
+                if fila["QA Intento 2"] != "-":
+                    texto += f",  {fila['QA Intento 2']} ({fila['Resultado 2']})"
+                tk.Label(frame_previos, text=texto, anchor="w", font=fuente).pack(fill="x")
+
         tk.Button(container, text="Calcular Método QA", bg="#0078D7", fg="white", font=("Arial", 10, "bold"),
-                  command=self.ejecutar_arbol_decision).pack(pady=10)
+                  command=self.calcular_metodo_qa).pack(pady=10)
         tk.Button(container, text="Volver", command=self.create_main_menu).pack()
 
     # Empieza arbol
-    def es_plan_complejo(self):
-        """Determina la complejidad usando las variables configurables"""
-        tecnica = self.entries["Tecnica"].get()
-        if tecnica not in ["IMRT", "VMAT"]:
-            return False
-
-        def limpiar_valor(valor, default):
-            """Limpia strings con comas y los convierte a float de forma segura"""
-            if valor is None or str(valor).strip() in ["-", ""]:
-                return default
-            try:
-                return float(str(valor).replace(',', '.'))
-            except:
-                return default
-
-        # Extraemos y limpiamos cada valor individualmente
-        mcs_min_paciente = limpiar_valor(self.datos_paciente.get("MCSmin"), 1.0)
-        sas_max_paciente = limpiar_valor(self.datos_paciente.get("SASmax"), 0.0)
-        frac_paciente = int(limpiar_valor(self.datos_paciente.get("Fractions"), 1))
-        mcs_prom_paciente = limpiar_valor(self.datos_paciente.get("MCS"), 1.0)
-        sas_prom_paciente = limpiar_valor(self.datos_paciente.get("SAS"), 0.0)
-        pmu_paciente = limpiar_valor(self.datos_paciente.get("PMU"), 0.0)
-
-        # Lógica de comparación corregida
-        condicion_mcs_min = mcs_min_paciente < self.u_mcs_min
-        condicion_sas_max = sas_max_paciente > self.u_sas_max
-        condicion_frac = frac_paciente > self.u_fractions
-        condicion_mcs = mcs_prom_paciente < self.u_mcs
-        condicion_sas = sas_prom_paciente > self.u_sas
-        condicion_pmu = pmu_paciente > self.u_pmu  # <--- CORREGIDO: ahora es mayor que (>)
-
-        # Opcional: Para debugear, puedes imprimir qué condición se cumple
-        if any([condicion_mcs_min, condicion_sas_max, condicion_frac, condicion_mcs, condicion_sas, condicion_pmu]):
-            print(f"Plan Complejo detectado por: MCSmin:{condicion_mcs_min}, SASmax:{condicion_sas_max}, "
-                  f"Frac:{condicion_frac}, MCSprom:{condicion_mcs}, SASprom:{condicion_sas}, PMU:{condicion_pmu}")
-            return True
-
-        return False
+    def calcular_metodo_qa(self):
+        self.leer_formulario()
+        self.ejecutar_arbol_decision()
 
     def obtener_paquete_qa(self):
-        tecnica = self.entries["Tecnica"].get()
-        ca_ped = self.entries["CA"].get() or self.entries["PPed"].get()
-        complejo = self.es_plan_complejo()
-
-        if tecnica in ["3D", "FIF"]:
-            if self.intento_actual == 1:
-                res = "Plancheck + Calculo independiente + LogFile"
-                return res + " + Transit-EPID" if ca_ped else res
-            return "Portal Dosimetry"
-
-        elif tecnica in ["SRS", "SBRT"]:
-            if self.intento_actual == 1:
-                res = "Plancheck + Portal Dosimetry"
-                return res + " + Transit-EPID" if ca_ped else res
-            return "Stereophan + Gafchromic/CI"
-
-        elif tecnica in ["IMRT", "VMAT"]:
-            if not complejo:
-                res = "Plancheck + Calculo independiente + LogFile"
-                return res + " + Transit-EPID" if ca_ped else res
-            else:
-                if self.intento_actual == 1:
-                    res = "Plancheck + Calculo independiente + LogFile + Portal Dosimetry"
-                    return res + " + Transit-EPID" if ca_ped else res
-                return "ArcCheck + 3DVH"
-        return "Indefinido"
+        if self.caso.es_complejo(self.umbrales()):
+            # Opcional: Para debugear, puedes imprimir qué condición se cumple
+            c = self.caso.condiciones(self.umbrales())
+            print(f"Plan Complejo detectado por: MCSmin:{c['MCSmin']}, SASmax:{c['SASmax']}, "
+                  f"Frac:{c['Frac']}, MCSprom:{c['MCSprom']}, SASprom:{c['SASprom']}, PMU:{c['PMU']}")
+        return self.caso.paquete(self.umbrales())
 
     def ejecutar_arbol_decision(self):
         for widget in self.root.winfo_children(): widget.destroy()
@@ -430,14 +463,14 @@ class RadioRiskApp:
         self.paquete_actual_str = paquete  # Guardar para el registro
 
         tk.Label(container, text="EVALUACIÓN QADS", font=("Arial", 14, "bold")).pack(pady=20)
-        tk.Label(container, text=f"Intento N° {self.intento_actual}", font=("Arial", 10, "italic")).pack()
+        tk.Label(container, text=f"Intento N° {self.caso.intento}", font=("Arial", 10, "italic")).pack()
 
         lbl_paquete = tk.Label(container, text=paquete, font=("Arial", 11, "bold"), fg="#004080", wraplength=400)
         lbl_paquete.pack(pady=20)
 
         tk.Label(container, text="¿El control fue exitoso?").pack(pady=10)
-        self.resultado_var = tk.StringVar(value="Exitoso")
-        tk.OptionMenu(container, self.resultado_var, "Exitoso", "No Exitoso").pack()
+        self.resultado_var = tk.StringVar(value=evaluacion.EXITOSO)
+        tk.OptionMenu(container, self.resultado_var, *evaluacion.RESULTADOS).pack()
 
         self.btn_registrar = tk.Button(container, text="Registrar Resultado", bg="#4CAF50", fg="white",
                                        command=self.validar_intento)
@@ -450,69 +483,27 @@ class RadioRiskApp:
 
     def regresar_inicio(self):
         """Limpia los datos del paciente actual y vuelve al inicio"""
-        self.intento_actual = 1
-        self.historial_intentos = {}
-        self.datos_paciente = {}
+        self.caso = None
         self.create_main_menu()
 
     def validar_intento(self):
-        resultado = self.resultado_var.get()
-        tecnica = self.entries["Tecnica"].get()
+        # Guardar en historial para el Excel; las reglas de QA dicen si existe un escalón
+        # siguiente para este plan o si hay que rehacerlo
+        siguiente = self.caso.registrar(self.paquete_actual_str, self.resultado_var.get(), self.umbrales())
 
-        # Guardar en historial para el Excel
-        self.historial_intentos[self.intento_actual] = {"paquete": self.paquete_actual_str, "resultado": resultado}
-
-        if resultado == "Exitoso":
+        if siguiente == evaluacion.VALIDADO:
             messagebox.showinfo("Éxito", "Control validado correctamente.")
             self.btn_registrar.config(state="disabled")
             self.btn_excel.config(state="normal", bg="#0078D7", fg="white")
+        elif siguiente == evaluacion.REHACER_PLAN:
+            # Permitimos exportar el fallo para que quede registro de que se debe rehacer
+            messagebox.showerror("CRÍTICO", "EL CONTROL HA FALLADO.\n\nSE DEBE REHACER EL PLAN DE TRATAMIENTO.")
+            self.btn_registrar.config(state="disabled")
+            self.btn_excel.config(state="normal", bg="#D9534F", fg="white")
         else:
-            # CORRECCIÓN: Usamos la función global de complejidad para ser consistentes
-            es_complejo = self.es_plan_complejo()
-
-            # Si NO es complejo y falló el 1er intento -> REHACER (porque solo tienen 1 intento)
-            # O si ya falló el 2do intento de cualquier técnica -> REHACER
-            if (tecnica in ["IMRT", "VMAT"] and not es_complejo) or self.intento_actual >= 2:
-                messagebox.showerror("CRÍTICO", "EL CONTROL HA FALLADO.\n\nSE DEBE REHACER EL PLAN DE TRATAMIENTO.")
-                self.btn_registrar.config(state="disabled")
-                self.btn_excel.config(state="normal", bg="#D9534F", fg="white")
-            else:
-                self.intento_actual += 1
-                messagebox.showwarning("Fallo",
-                                       f"Intento {self.intento_actual - 1} fallido. Pase al siguiente escalón de QA.")
-                self.ejecutar_arbol_decision()
-
-    def obtener_costo_acumulado(self):
-        """Busca y suma los costos de todas las técnicas usadas en los intentos"""
-        ruta_costos = "costos.xlsx"
-        if not os.path.exists(ruta_costos):
-            return 0
-
-        try:
-            # Leemos el archivo. Usamos iloc para asegurar las columnas 0 (A) y 10 (K)
-            df_costos = pd.read_excel(ruta_costos)
-
-            # Creamos un diccionario { "Nombre Tecnica": Costo }
-            # .strip() elimina espacios accidentales para que coincida con el paquete
-            mapa_precios = pd.Series(
-                df_costos.iloc[:, 10].values,
-                index=df_costos.iloc[:, 0].astype(str).str.strip()
-            ).to_dict()
-
-            costo_total = 0
-            for intento in self.historial_intentos.values():
-                paquete = intento.get("paquete", "")
-                if paquete and paquete != "-":
-                    # Separamos el paquete "Plancheck + LogFile" -> ["Plancheck", "LogFile"]
-                    tecnicas_individuales = [t.strip() for t in paquete.split("+")]
-                    for t in tecnicas_individuales:
-                        # Sumamos el costo si existe en el Excel, de lo contrario sumamos 0
-                        costo_total += mapa_precios.get(t, 0)
-
-            return round(float(costo_total),2)
-        except Exception as e:
-            print(f"Error al leer costos: {e}")
-            return 0.00
+            messagebox.showwarning("Fallo",
+                                   f"Intento {self.caso.intento - 1} fallido. Pase al siguiente escalón de QA.")
+            self.ejecutar_arbol_decision()
 
     def exportar_informe(self):
         if not self.ruta_informe:
@@ -520,80 +511,76 @@ class RadioRiskApp:
             self.seleccionar_registro_existente()
             if not self.ruta_informe: return
 
-        # 1. Calculamos el costo asociado sumando todos los intentos
-        costo_asociado = self.obtener_costo_acumulado()
-
-        # 2. Construimos la fila para el Excel
-        fila = {
-            "Fecha": datetime.now().strftime("%d/%m/%Y"),
-            "ID": self.datos_paciente.get("ID", "-"),
-            "Paciente": self.datos_paciente.get("Nombre", "-"),
-            "Técnica RT": self.entries["Tecnica"].get(),
-            "MCS Min": self.datos_paciente.get("MCSmin"),
-            "SAS Max": self.datos_paciente.get("SASmax")
-        }
-
-        # Registrar intentos (Máximo 2 según tu nueva lógica)
-        for i in [1, 2]:
-            info = self.historial_intentos.get(i, {"paquete": "-", "resultado": "-"})
-            fila[f"QA Intento {i}"] = info["paquete"]
-            fila[f"Resultado {i}"] = info["resultado"]
+        caso, ruta = self.caso, self.ruta_informe
+        plan = caso.datos.get("Plan", "-")
+        if plan == "-" or caso.datos.get("ID", "-") == "-":
+            # Sin nombre de plan o sin ID no se puede saber si es una exportación repetida
+            return self.confirmar_exportacion(caso, ruta, [])
+        self.ejecutar_en_segundo_plano(
+            "Buscando exportaciones anteriores...",
+            lambda cancelado: self.buscar_previos(ruta, caso.datos.get("ID"), plan),
+            lambda previos: self.confirmar_exportacion(caso, ruta, previos))
+
+    def confirmar_exportacion(self, caso, ruta, previos):
+        """Avisa si el mismo plan del paciente ya está en el registro antes de volver a exportarlo"""
+        if previos:
+            veces = "una vez" if len(previos) == 1 else f"{len(previos)} veces"
+            if not messagebox.askyesno(
+                    "Exportación repetida",
+                    f"El plan {caso.datos.get('Plan')} del paciente {caso.datos.get('ID', '-')} ya se exportó "
+                    f"{veces} (la última el {previos[-1]['Fecha']}).\n\n¿Exportarlo de nuevo?"):
+                return
+
+        def tarea(cancelado):
+            # Diario local y base SQLite; el Excel se escribe después, junto con otras exportaciones
+            avisos = []
+            error = evaluacion.exportar(caso, ruta, cancelado, sincronizar=False, avisos=avisos)
+            if error is None:
+                self.sincronizador.anotar(ruta)
+            return error, avisos
+
+        def al_terminar(resultado):
+            error, avisos = resultado
+            self.btn_excel.config(state="disabled")
+            if error is not None:
+                messagebox.showwarning("Atención", f"El control no llegó al registro: {error}\n\n"
+                                                   "Se guardará en la próxima exportación o al volver a abrir el programa.")
+            elif avisos:
+                messagebox.showwarning("Atención", "Control registrado, pero:\n\n" + "\n".join(avisos))
+            else:
+                messagebox.showinfo("Éxito", "Control registrado. El Excel del registro se actualizará en breve.")
 
-        # 3. Agregamos la columna de costo al final
-        fila["Costo asociado"] = costo_asociado
+        self.ejecutar_en_segundo_plano("Guardando en el registro...", tarea, al_terminar,
+                                       error="No se pudo guardar el informe")
 
-        try:
-            if os.path.exists(self.ruta_informe):
-                df_existente = pd.read_excel(self.ruta_informe)
-                df_final = pd.concat([df_existente, pd.DataFrame([fila])], ignore_index=True, sort=False)
-            else:
-                df_final = pd.DataFrame([fila])
+    def generar_excel_registro(self):
+        """Regenera el Excel completo del registro a partir de la base"""
+        if not self.ruta_informe:
+            messagebox.showwarning("Atención", "No hay una ruta definida para el registro.")
+            return
+        ruta = self.ruta_informe
 
-            df_final.to_excel(self.ruta_informe, index=False)
+        self.ejecutar_en_segundo_plano(
+            "Generando el Excel del registro...", lambda cancelado: evaluacion.generar_excel(ruta, cancelado),
+            lambda cantidad: messagebox.showinfo("Éxito", f"Registro generado con {cantidad} filas:\n{ruta}"),
+            error="No se pudo generar el registro")
 
-            # Aplicamos el formato visual (colores y anchos)
-            self.aplicar_formato_excel(self.ruta_informe)
+    def archivar_registro(self):
+        """Pasa las filas viejas del registro al archivo histórico y deja el Excel sólo con las recientes"""
+        from qads import archivo
 
-            messagebox.showinfo("Éxito", f"Informe actualizado")
-            self.btn_excel.config(state="disabled")
-        except Exception as e:
-            messagebox.showerror("Error", f"No se pudo guardar el informe: {e}")
-
-    def aplicar_formato_excel(self, ruta):
-        wb = load_workbook(ruta)
-        ws = wb.active
-
-        # Estilos previos
-        relleno_header = PatternFill(start_color="ADD8E6", end_color="ADD8E6", fill_type="solid")
-        fuente_header = Font(bold=True)
-        borde = Border(left=Side(style='thin'), right=Side(style='thin'),
-                       top=Side(style='thin'), bottom=Side(style='thin'))
-
-        # 1. Aplicar estilo general a cabeceras y encontrar la columna de costo
-        col_costo_idx = None
-        for cell in ws[1]:
-            cell.fill, cell.font, cell.alignment, cell.border = relleno_header, fuente_header, Alignment(
-                horizontal="center"), borde
-            if cell.value == "Costo asociado":
-                col_costo_idx = cell.column  # Guardamos el índice de la columna
-
-        # 2. Aplicar estilos a las filas de datos
-        for row in ws.iter_rows(min_row=2):
-            for cell in row:
-                cell.border, cell.alignment = borde, Alignment(horizontal="left")
-
-                # SI es la celda de la columna de costo, aplicamos el formato $0,00
-                if cell.column == col_costo_idx:
-                    # El formato '"$"#,##0.00' mostrará el punto o coma según la región de tu Windows/Excel
-                    cell.number_format = '"$"#,##0.00'
-                    cell.alignment = Alignment(horizontal="right")  # Alineamos moneda a la derecha
-
-        # 3. Ajuste automático de ancho de columnas
-        for col in ws.columns:
-            max_length = max((len(str(cell.value)) for cell in col if cell.value), default=10)
-            ws.column_dimensions[col[0].column_letter].width = max_length + 4
-
-        wb.save(ruta)
+        if not self.ruta_informe:
+            messagebox.showwarning("Atención", "No hay una ruta definida para el registro.")
+            return
+        ruta, corte = self.ruta_informe, archivo.fecha_corte()
+        if not messagebox.askyesno("Archivar", f"Los controles anteriores al {corte:%d/%m/%Y} saldrán del Excel del "
+                                               f"registro y pasarán a:\n{archivo.carpeta_archivo(ruta)}\n\n¿Continuar?"):
+            return
+
+        self.ejecutar_en_segundo_plano(
+            "Archivando controles antiguos...", lambda cancelado: archivo.archivar(ruta),
+            lambda cantidad: messagebox.showinfo("Éxito", f"Se archivaron {cantidad} controles."),
+            error="No se pudo archivar el registro")
 
 if __name__ == "__main__":
     root = tk.Tk();
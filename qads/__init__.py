@@ -0,0 +1 @@
+"""Lógica de evaluación QADS independiente de la interfaz gráfica."""
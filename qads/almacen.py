@@ -0,0 +1,269 @@
+"""Base SQLite que guarda el Registro Histórico; el Excel se genera a partir de ella.
+
+La base suele estar en una carpeta compartida (SMB/NFS), donde los bloqueos
+de archivo de SQLite no son confiables: dos estaciones escribiendo a la vez
+pueden corromperla. Por eso toda escritura se hace con el bloqueo de
+qads.bloqueo sobre la base (`<base>.sqlite.lock`), que sólo depende de la
+creación exclusiva de un archivo. Las lecturas no lo toman.
+"""
+import os
+import re
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+from qads import bloqueo, trazas
+from qads.decision import limpiar_valor
+
+# Columna del Excel -> (columna SQL, tipo)
+COLUMNAS = {
+    "Fecha": ("fecha", "TEXT"),
+    "ID": ("id_paciente", "TEXT"),
+    "Paciente": ("paciente", "TEXT"),
+    "Plan": ("plan", "TEXT"),
+    "Técnica RT": ("tecnica", "TEXT"),
+    "MCS Min": ("mcs_min", "REAL"),
+    "SAS Max": ("sas_max", "REAL"),
+    "QA Intento 1": ("qa_intento_1", "TEXT"),
+    "Resultado 1": ("resultado_1", "TEXT"),
+    "QA Intento 2": ("qa_intento_2", "TEXT"),
+    "Resultado 2": ("resultado_2", "TEXT"),
+    "Costo asociado": ("costo", "REAL"),
+    # Datos de entrada del árbol, para poder volver a evaluar el historial con otros umbrales
+    "MCS Prom": ("mcs_prom", "REAL"),
+    "SAS Prom": ("sas_prom", "REAL"),
+    "PMU": ("pmu", "REAL"),
+    "Fracciones": ("fracciones", "REAL"),
+    "CA/Pediátrico": ("ca_ped", "INTEGER"),
+}
+FORMATO_FECHA = "%d/%m/%Y"
+# PRAGMA user_version de una base que ya importó el Excel (o no tenía nada que importar)
+BASE_INICIALIZADA = 1
+
+_ESQUEMA = f"""
+CREATE TABLE IF NOT EXISTS registro (
+    rowid_registro INTEGER PRIMARY KEY AUTOINCREMENT,
+    {", ".join(f"{sql} {tipo}" for sql, tipo in COLUMNAS.values())},
+    en_excel INTEGER NOT NULL DEFAULT 0,
+    uid TEXT
+);
+"""
+# Los índices van después de agregar las columnas que falten en bases viejas
+_INDICES = """
+CREATE UNIQUE INDEX IF NOT EXISTS idx_registro_uid ON registro (uid);
+CREATE INDEX IF NOT EXISTS idx_registro_paciente ON registro (id_paciente);
+CREATE INDEX IF NOT EXISTS idx_registro_paciente_plan ON registro (id_paciente, plan);
+CREATE INDEX IF NOT EXISTS idx_registro_fecha ON registro (fecha);
+CREATE INDEX IF NOT EXISTS idx_registro_tecnica ON registro (tecnica);
+CREATE INDEX IF NOT EXISTS idx_registro_pendientes ON registro (en_excel) WHERE en_excel = 0;
+"""
+_NOMBRES_INDICES = set(re.findall(r"IF NOT EXISTS (\w+)", _INDICES))
+
+
+def ruta_base_para(ruta_informe):
+    """La base vive junto al Excel del registro, con el mismo nombre"""
+    return os.path.splitext(ruta_informe)[0] + ".sqlite"
+
+
+def _fecha_iso(valor):
+    """Las fechas se guardan como AAAA-MM-DD para poder ordenarlas e indexarlas"""
+    if isinstance(valor, datetime):
+        return valor.strftime("%Y-%m-%d")
+    try:
+        return datetime.strptime(str(valor).strip(), FORMATO_FECHA).strftime("%Y-%m-%d")
+    except ValueError:
+        return str(valor)
+
+
+def _fecha_excel(valor):
+    try:
+        return datetime.strptime(valor, "%Y-%m-%d").strftime(FORMATO_FECHA)
+    except (TypeError, ValueError):
+        return valor
+
+
+class AlmacenRegistro:
+    def __init__(self, ruta_db):
+        self.ruta_db = ruta_db
+        # Abrir una base que ya está al día no escribe nada, así no hace falta el bloqueo
+        if self._esquema_al_dia():
+            return
+        with self._escritura(), self._conectar() as con:
+            con.executescript(_ESQUEMA)
+            # Las bases creadas con versiones anteriores reciben las columnas nuevas
+            existentes = {c[1] for c in con.execute("PRAGMA table_info(registro)")}
+            for col_sql, tipo in [*COLUMNAS.values(), ("uid", "TEXT")]:
+                if col_sql not in existentes:
+                    con.execute(f"ALTER TABLE registro ADD COLUMN {col_sql} {tipo}")
+            con.executescript(_INDICES)
+
+    def _esquema_al_dia(self):
+        if not os.path.exists(self.ruta_db):
+            return False
+        with self._conectar() as con:
+            columnas = {c[1] for c in con.execute("PRAGMA table_info(registro)")}
+            indices = {r[0] for r in con.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        esperadas = {"rowid_registro", "en_excel", "uid", *(sql for sql, _ in COLUMNAS.values())}
+        return esperadas <= columnas and _NOMBRES_INDICES <= indices
+
+    def _escritura(self):
+        """Bloqueo de la base: una sola estación escribe a la vez (ver el docstring del módulo)"""
+        return bloqueo.Bloqueo(bloqueo.ruta_bloqueo(self.ruta_db))
+
+    def _conectar(self):
+        # Una conexión por operación: se puede usar desde cualquier hilo o proceso.
+        # La base suele estar en una carpeta compartida entre estaciones, donde WAL
+        # no funciona: se usa el journal clásico
+        con = sqlite3.connect(self.ruta_db, timeout=30)
+        con.execute("PRAGMA journal_mode=DELETE")
+        con.execute("PRAGMA synchronous=NORMAL")
+        return _Conexion(con)
+
+    @staticmethod
+    def _a_sql(fila):
+        valores = {}
+        for col_excel, (col_sql, tipo) in COLUMNAS.items():
+            valor = fila.get(col_excel)
+            if col_excel == "Fecha":
+                valor = _fecha_iso(valor)
+            elif tipo == "REAL":
+                valor = limpiar_valor(valor, None)
+            elif tipo == "INTEGER":
+                valor = None if valor is None or pd.isna(valor) or valor == "-" else int(bool(valor))
+            elif valor is not None and pd.isna(valor):
+                valor = None
+            valores[col_sql] = valor
+        return valores
+
+    def agregar(self, filas, en_excel=False, uids=None):
+        """Inserta filas con las columnas del Excel; devuelve cuántas se agregaron.
+
+        Las filas con un uid (ver qads.diario) que ya está en la base se
+        ignoran, así volver a aplicar el diario no las duplica.
+        """
+        uids = uids or [None] * len(filas)
+        registros = [dict(self._a_sql(f), en_excel=int(en_excel), uid=uid) for f, uid in zip(filas, uids)]
+        if not registros:
+            return 0
+        columnas = list(registros[0])
+        sql = (f"INSERT OR IGNORE INTO registro ({', '.join(columnas)}) "
+               f"VALUES ({', '.join(':' + c for c in columnas)})")
+        with trazas.tramo("almacen.agregar", filas=len(registros)), self._escritura(), self._conectar() as con:
+            return con.executemany(sql, registros).rowcount
+
+    def dataframe(self, columnas=None, desde=None, antes=None):
+        """El registro como DataFrame con los nombres de columna SQL (para análisis).
+
+        `desde` (inclusive) y `antes` (exclusive) son fechas AAAA-MM-DD; si se
+        indica alguna, quedan afuera las filas sin una fecha válida.
+        """
+        columnas = ", ".join(columnas or [sql for sql, _ in COLUMNAS.values()])
+        condiciones, parametros = [], []
+        if desde or antes:
+            condiciones.append("fecha GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'")
+        if desde:
+            condiciones.append("fecha >= ?")
+            parametros.append(str(desde))
+        if antes:
+            condiciones.append("fecha < ?")
+            parametros.append(str(antes))
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        with self._conectar() as con:
+            return pd.read_sql_query(f"SELECT {columnas} FROM registro {where} ORDER BY rowid_registro",
+                                     con, params=parametros)
+
+    def inicializada(self):
+        with self._conectar() as con:
+            return con.execute("PRAGMA user_version").fetchone()[0] >= BASE_INICIALIZADA
+
+    def marcar_inicializada(self):
+        with self._escritura(), self._conectar() as con:
+            con.execute(f"PRAGMA user_version = {BASE_INICIALIZADA}")
+
+    def cantidad(self):
+        with self._conectar() as con:
+            return con.execute("SELECT COUNT(*) FROM registro").fetchone()[0]
+
+    def _consultar(self, where="", parametros=()):
+        columnas = ", ".join(sql for sql, _ in COLUMNAS.values())
+        with self._conectar() as con:
+            cursor = con.execute(f"SELECT rowid_registro, {columnas} FROM registro {where} "
+                                 f"ORDER BY rowid_registro", parametros)
+            return [self._a_excel(r) for r in cursor.fetchall()]
+
+    @staticmethod
+    def _a_excel(registro):
+        rowid, *valores = registro
+        fila = {}
+        for (col_excel, (_, tipo)), valor in zip(COLUMNAS.items(), valores):
+            if col_excel == "Fecha":
+                valor = _fecha_excel(valor)
+            elif tipo == "INTEGER" and valor is not None:
+                valor = bool(valor)
+            fila[col_excel] = "-" if valor is None and col_excel != "Costo asociado" else valor
+        return rowid, fila
+
+    def registros(self):
+        """Todas las filas del registro como (rowid, fila), en el orden en que se exportaron"""
+        return self._consultar()
+
+    def filas(self):
+        return [fila for _, fila in self._consultar()]
+
+    def buscar_paciente(self, id_paciente, plan=None):
+        """Filas del paciente (y del plan, si se indica), por el índice (id_paciente, plan)"""
+        if plan is None:
+            return [fila for _, fila in self._consultar("WHERE id_paciente = ?", (str(id_paciente),))]
+        return [fila for _, fila in self._consultar("WHERE id_paciente = ? AND plan = ?",
+                                                    (str(id_paciente), str(plan)))]
+
+    def pendientes_excel(self):
+        """Filas que todavía no se volcaron al Excel, como (rowid, fila)"""
+        return self._consultar("WHERE en_excel = 0")
+
+    def borrar(self, rowids):
+        """Quita filas de la base (después de pasarlas al archivo histórico)"""
+        with self._escritura(), self._conectar() as con:
+            con.executemany("DELETE FROM registro WHERE rowid_registro = ?", [(int(r),) for r in rowids])
+
+    def marcar_en_excel(self, rowids):
+        with self._escritura(), self._conectar() as con:
+            con.executemany("UPDATE registro SET en_excel = 1 WHERE rowid_registro = ?",
+                            [(r,) for r in rowids])
+
+
+class _Conexion:
+    """Hace commit al salir del bloque y siempre cierra la conexión"""
+    def __init__(self, con):
+        self.con = con
+
+    def __enter__(self):
+        return self.con
+
+    def __exit__(self, tipo, *_):
+        try:
+            if tipo is None:
+                self.con.commit()
+        finally:
+            self.con.close()
+
+
+def abrir_almacen(ruta_informe):
+    """Abre la base del registro; la primera vez importa las filas que ya tenía el Excel.
+
+    Que la base esté vacía no alcanza para importar: después de archivar
+    todas las filas también lo está. La importación queda marcada en la base
+    (PRAGMA user_version) y no se repite nunca.
+    """
+    almacen = AlmacenRegistro(ruta_base_para(ruta_informe))
+    if not almacen.inicializada():
+        # Con el bloqueo del registro, dos estaciones no pueden importar el Excel a la vez
+        with bloqueo.Bloqueo(bloqueo.ruta_bloqueo(ruta_informe)):
+            if not almacen.inicializada():
+                # Las bases de versiones anteriores con filas ya habían importado el Excel
+                if os.path.exists(ruta_informe) and almacen.cantidad() == 0:
+                    df = pd.read_excel(ruta_informe)
+                    almacen.agregar(df.to_dict("records"), en_excel=True)
+                almacen.marcar_inicializada()
+    return almacen
@@ -0,0 +1,184 @@
+"""Archivo histórico del registro: las filas viejas pasan a Parquet, particionado por año y mes.
+
+Uso:
+    python -m qads.archivo [--registro RUTA] [--meses 12]
+
+Las filas anteriores al horizonte (por defecto, los últimos HORIZONTE_MESES
+meses completos más el mes en curso quedan activos) se mueven de la base a
+`<registro>_archivo/anio=AAAA/mes=M/*.parquet` y el Excel del registro se
+vuelve a generar sólo con las filas activas. Los análisis leen las dos
+partes con `leer`, que sólo abre las particiones y columnas que necesita.
+
+Necesita pyarrow, que se importa sólo al usar el archivo.
+"""
+import argparse
+import os
+import sys
+from datetime import date
+
+import pandas as pd
+
+from qads import bloqueo
+from qads.almacen import COLUMNAS, abrir_almacen
+
+HORIZONTE_MESES = 12
+COMPRESION = "zstd"
+# Además de las columnas del Excel se guardan el rowid y el uid, para poder rastrear cada fila
+COLUMNAS_ARCHIVO = ["rowid_registro", *(sql for sql, _ in COLUMNAS.values()), "uid"]
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("El archivo histórico necesita pyarrow: instálelo con 'pip install pyarrow'") from None
+    return pyarrow
+
+
+def _esquema(pa):
+    """Tipos fijos: así todas las particiones son compatibles aunque alguna columna venga vacía"""
+    tipos = {"TEXT": pa.string(), "REAL": pa.float64(), "INTEGER": pa.int64()}
+    campos = [("rowid_registro", pa.int64())]
+    campos += [(sql, tipos[tipo]) for sql, tipo in COLUMNAS.values()]
+    campos.append(("uid", pa.string()))
+    return pa.schema(campos)
+
+
+def _particiones(pa):
+    return pa.dataset.partitioning(pa.schema([("anio", pa.int32()), ("mes", pa.int32())]), flavor="hive")
+
+
+def carpeta_archivo(ruta_informe):
+    """El archivo vive junto al Excel del registro"""
+    return os.path.splitext(ruta_informe)[0] + "_archivo"
+
+
+def fecha_corte(meses=HORIZONTE_MESES, hoy=None):
+    """Primer día del mes que quedó `meses` meses atrás: lo anterior se archiva"""
+    hoy = hoy or date.today()
+    indice = hoy.year * 12 + hoy.month - 1 - meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def archivar(ruta_informe, meses=HORIZONTE_MESES, hoy=None):
+    """Mueve al archivo las filas anteriores al corte; devuelve cuántas se movieron.
+
+    Todo ocurre con el bloqueo del registro tomado: primero se escriben los
+    Parquet, después se reemplaza el Excel por uno sin las filas archivadas
+    y recién entonces se borran de la base. Si algo falla antes del borrado,
+    se quitan los Parquet escritos y la base queda como estaba.
+    """
+    from qads import registro
+
+    pa = _pyarrow()
+    corte = fecha_corte(meses, hoy).isoformat()
+    almacen = abrir_almacen(ruta_informe)
+    carpeta = carpeta_archivo(ruta_informe)
+    esquema = _esquema(pa)
+
+    with bloqueo.Bloqueo(bloqueo.ruta_bloqueo(ruta_informe)) as b:
+        df = almacen.dataframe(COLUMNAS_ARCHIVO, antes=corte)
+        if df.empty:
+            return 0
+        df["ca_ped"] = df["ca_ped"].astype("Int64")
+        periodo = pd.to_datetime(df["fecha"], format="%Y-%m-%d")
+        escritos = []
+        try:
+            for (anio, mes), parte in df.groupby([periodo.dt.year, periodo.dt.month]):
+                destino = os.path.join(carpeta, f"anio={anio}", f"mes={mes}")
+                os.makedirs(destino, exist_ok=True)
+                # El nombre sale de las filas: si se corta antes de borrarlas de la base, repetir
+                # el archivado vuelve a escribir el mismo archivo en lugar de duplicarlas
+                ruta = os.path.join(destino, f"registro_{parte['rowid_registro'].min()}_"
+                                             f"{parte['rowid_registro'].max()}.parquet")
+                tmp = f"{ruta}.{os.getpid()}.tmp"
+                tabla = pa.Table.from_pandas(parte, schema=esquema, preserve_index=False)
+                pa.parquet.write_table(tabla, tmp, compression=COMPRESION)
+                os.replace(tmp, ruta)
+                escritos.append(ruta)
+                b.renovar()
+
+            # El Excel activo se rehace (temporal + reemplazo) sólo con lo que queda en la base
+            archivadas = set(df["rowid_registro"])
+            activos = [(rowid, fila) for rowid, fila in almacen.registros() if rowid not in archivadas]
+            registro.escribir_registro(ruta_informe, activos)
+        except BaseException:
+            for ruta in escritos:
+                try:
+                    os.remove(ruta)
+                except OSError:
+                    pass
+            raise
+
+        almacen.borrar(df["rowid_registro"])
+        almacen.marcar_en_excel([rowid for rowid, _ in activos])
+    return len(df)
+
+
+def leer(ruta_informe, columnas=None, desde=None, antes=None):
+    """Registro completo (archivo + base activa) como DataFrame con los nombres de columna SQL.
+
+    `desde` (inclusive) y `antes` (exclusive) son fechas AAAA-MM-DD. Del
+    archivo sólo se abren los meses de ese rango y sólo se leen `columnas`.
+    Si el registro nunca se archivó, no hace falta pyarrow.
+    """
+    columnas = list(columnas or [sql for sql, _ in COLUMNAS.values()])
+    leidas = list(dict.fromkeys([*columnas, "rowid_registro"]))
+    activo = abrir_almacen(ruta_informe).dataframe(leidas, desde, antes)
+    carpeta = carpeta_archivo(ruta_informe)
+    if not os.path.isdir(carpeta):
+        return activo[columnas]
+
+    pa = _pyarrow()
+    import pyarrow.compute as pc
+
+    anio, mes = pc.field("anio"), pc.field("mes")
+    filtro = None
+    if desde:
+        y, m = int(str(desde)[:4]), int(str(desde)[5:7])
+        filtro = ((anio > y) | ((anio == y) & (mes >= m))) & (pc.field("fecha") >= str(desde))
+    if antes:
+        y, m = int(str(antes)[:4]), int(str(antes)[5:7])
+        condicion = ((anio < y) | ((anio == y) & (mes <= m))) & (pc.field("fecha") < str(antes))
+        filtro = condicion if filtro is None else filtro & condicion
+
+    esquema = _esquema(pa)
+    dataset = pa.dataset.dataset(carpeta, format="parquet", partitioning=_particiones(pa),
+                                 schema=esquema.append(pa.field("anio", pa.int32())).append(pa.field("mes", pa.int32())))
+    archivado = dataset.to_table(columns=leidas, filter=filtro).to_pandas()
+    # Si un archivado se cortó después de escribir el Parquet, la fila sigue en la base: vale la de la base
+    archivado = archivado[~archivado["rowid_registro"].isin(activo["rowid_registro"])]
+    archivado = archivado.sort_values("rowid_registro")[columnas]
+    if archivado.empty:
+        return activo[columnas]
+    if activo.empty:
+        return archivado.reset_index(drop=True)
+    return pd.concat([archivado, activo[columnas]], ignore_index=True)
+
+
+def main(argv=None):
+    from qads.simulacion import leer_ruta_registro
+
+    parser = argparse.ArgumentParser(description="Pasa las filas viejas del registro al archivo histórico (Parquet).")
+    parser.add_argument("--registro", default=None, help="Excel del registro (por defecto, el de config_ruta.txt)")
+    parser.add_argument("--meses", type=int, default=HORIZONTE_MESES,
+                        help="Meses completos que quedan en el registro activo además del mes en curso")
+    args = parser.parse_args(argv)
+
+    ruta = args.registro or leer_ruta_registro()
+    if not ruta:
+        print("No hay un registro configurado: use --registro", file=sys.stderr)
+        return 1
+    try:
+        cantidad = archivar(ruta, args.meses)
+    except ImportError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"{cantidad} filas anteriores a {fecha_corte(args.meses)} pasaron a {carpeta_archivo(ruta)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
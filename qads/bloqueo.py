@@ -0,0 +1,135 @@
+"""Bloqueo consultivo entre estaciones de trabajo con un archivo .lock junto al registro.
+
+Funciona en carpetas compartidas (SMB/NFS) porque sólo usa la creación
+exclusiva de un archivo. Si una estación se cuelga con el bloqueo tomado,
+éste vence a los VENCIMIENTO segundos (más MARGEN_RELOJ, por la diferencia
+de hora entre máquinas) y otra estación puede romperlo.
+"""
+import json
+import os
+import socket
+import time
+import uuid
+
+ESPERA = 15.0  # segundos que se espera por el bloqueo antes de rendirse
+VENCIMIENTO = 120.0  # un bloqueo más viejo que esto se considera abandonado
+# La fecha del .lock la pone otra máquina (el servidor o la estación dueña): se tolera
+# esta diferencia entre relojes antes de darlo por abandonado
+MARGEN_RELOJ = 300.0
+PAUSA = 0.1
+
+
+class BloqueoOcupado(TimeoutError):
+    """Otra estación tiene el bloqueo y no lo liberó dentro del tiempo de espera"""
+
+
+class Bloqueo:
+    """Context manager: `with Bloqueo(ruta + ".lock"): ...`"""
+
+    def __init__(self, ruta, espera=ESPERA, vencimiento=VENCIMIENTO, margen_reloj=MARGEN_RELOJ):
+        self.ruta = ruta
+        self.espera = espera
+        self.vencimiento = vencimiento
+        # En un disco local la fecha la pone el reloj de esta misma máquina: el margen puede ser 0
+        self.margen_reloj = margen_reloj
+        self.tomado = False
+
+    def _dueno(self):
+        try:
+            with open(self.ruta, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _vencido(self):
+        """Contenido del .lock si está abandonado, None si sigue vigente o ya no existe"""
+        try:
+            with open(self.ruta, "rb") as f:
+                contenido = f.read()
+            antiguedad = time.time() - os.path.getmtime(self.ruta)
+        except OSError:
+            return None  # Se liberó mientras se miraba: se reintenta crearlo
+        return contenido if antiguedad > self.vencimiento + self.margen_reloj else None
+
+    def _romper(self, contenido):
+        """Quita un bloqueo abandonado, sin llevarse uno nuevo que otra estación haya tomado.
+
+        Se renombra antes de borrar, así sólo una estación se queda con el archivo.
+        Si lo que se renombró ya no es el bloqueo abandonado (otra estación lo
+        rompió y tomó uno nuevo mientras tanto), se devuelve a su lugar.
+        """
+        roto = f"{self.ruta}.{socket.gethostname()}.{os.getpid()}.roto"
+        try:
+            os.replace(self.ruta, roto)
+        except OSError:
+            return
+        try:
+            with open(roto, "rb") as f:
+                # También por la fecha: un bloqueo recién creado puede estar vacío todavía
+                era_el_abandonado = (f.read() == contenido
+                                     and time.time() - os.path.getmtime(roto) > self.vencimiento + self.margen_reloj)
+        except OSError:
+            era_el_abandonado = False
+        if not era_el_abandonado:
+            try:
+                # link no pisa un bloqueo que se haya creado mientras tanto
+                os.link(roto, self.ruta)
+            except FileExistsError:
+                pass
+            except OSError:
+                try:
+                    os.rename(roto, self.ruta)  # Sin enlaces duros (algunas carpetas compartidas)
+                    return
+                except OSError:
+                    pass
+        try:
+            os.remove(roto)
+        except OSError:
+            pass
+
+    def adquirir(self):
+        limite = time.monotonic() + self.espera
+        while True:
+            try:
+                fd = os.open(self.ruta, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                abandonado = self._vencido()
+                if abandonado is not None:
+                    self._romper(abandonado)
+                    continue
+                if time.monotonic() >= limite:
+                    dueno = self._dueno()
+                    raise BloqueoOcupado(f"El registro está siendo actualizado por "
+                                         f"{dueno.get('equipo', 'otra estación')} (pid {dueno.get('pid', '?')})")
+                time.sleep(PAUSA)
+                continue
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                # El id distingue este bloqueo de cualquier otro aunque coincidan equipo, pid y hora
+                json.dump({"equipo": socket.gethostname(), "pid": os.getpid(), "desde": time.time(),
+                           "id": uuid.uuid4().hex}, f)
+            self.tomado = True
+            return self
+
+    def renovar(self):
+        """Para tareas largas: marca el bloqueo como vigente para que nadie lo dé por abandonado"""
+        if self.tomado:
+            os.utime(self.ruta)
+
+    def liberar(self):
+        if self.tomado:
+            self.tomado = False
+            try:
+                os.remove(self.ruta)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self.adquirir()
+
+    def __exit__(self, *exc):
+        self.liberar()
+        return False
+
+
+def ruta_bloqueo(ruta_informe):
+    return ruta_informe + ".lock"
@@ -0,0 +1,129 @@
+"""Caché en disco de los reportes ya extraídos, indexada por el contenido del archivo.
+
+La carpeta puede ser compartida entre estaciones: las entradas son JSON
+(los textos del reporte y, por haz, listas de números), nunca pickle, así
+un archivo manipulado a lo sumo da datos inválidos, que se descartan.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from qads import reporte, trazas
+
+DIR_CACHE = "cache_reportes"
+TAMANO_MAXIMO = 50 * 1024 * 1024  # bytes
+
+
+def huella(path):
+    """SHA-256 del contenido: el mismo reporte copiado o renombrado se reconoce igual"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def _a_json(datos):
+    textos = {clave: valor for clave, valor in datos.items() if clave != "Haces"}
+    haces = {metrica: arr.tolist() for metrica, arr in datos["Haces"].valores.items()}
+    return {"version": reporte.VERSION_PARSER, "datos": textos, "haces": haces}
+
+
+def _desde_json(guardado):
+    """Los datos guardados, o None si la entrada no tiene la forma esperada"""
+    if not isinstance(guardado, dict) or guardado.get("version") != reporte.VERSION_PARSER:
+        return None
+    textos, haces = guardado.get("datos"), guardado.get("haces")
+    if not isinstance(textos, dict) or not isinstance(haces, dict):
+        return None
+    if not all(isinstance(v, str) for v in textos.values()):
+        return None
+    try:
+        valores = {str(m): np.array(v, dtype=np.float64) for m, v in haces.items()}
+    except (TypeError, ValueError):
+        return None
+    if any(arr.ndim != 1 for arr in valores.values()):
+        return None
+    return dict(textos, Haces=reporte.MetricasHaz(valores))
+
+
+def _leer(archivo):
+    try:
+        with open(archivo, encoding="utf-8") as f:
+            datos = _desde_json(json.load(f))
+    except (OSError, ValueError):
+        return None
+    if datos is None:
+        return None
+    # La fecha de modificación marca el último uso para el orden LRU
+    try:
+        os.utime(archivo)
+    except OSError:
+        pass
+    return datos
+
+
+def _guardar(archivo, datos):
+    # Se escribe en un temporal y se renombra para no dejar nunca un archivo a medias.
+    # El temporal se crea con los permisos normales: las otras estaciones tienen que poder leerlo
+    tmp = f"{archivo}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(_a_json(datos), f, ensure_ascii=False)
+        os.replace(tmp, archivo)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def podar(directorio=DIR_CACHE, tamano_maximo=TAMANO_MAXIMO):
+    """Borra las entradas usadas hace más tiempo hasta quedar por debajo del tamaño máximo"""
+    entradas = []
+    for e in os.scandir(directorio):
+        if e.name.endswith(".pkl"):
+            # Entradas del formato anterior (pickle): no se vuelven a leer nunca
+            try:
+                os.remove(e.path)
+            except OSError:
+                pass
+        elif e.name.endswith(".json"):
+            try:
+                estado = e.stat()
+            except OSError:
+                continue  # Otro proceso la borró mientras se recorría la carpeta
+            entradas.append((estado.st_mtime, estado.st_size, e.path))
+    total = sum(tamano for _, tamano, _ in entradas)
+    for _, tamano, ruta in sorted(entradas):
+        if total <= tamano_maximo:
+            break
+        try:
+            os.remove(ruta)
+        except OSError:
+            continue
+        total -= tamano
+
+
+def extraer_datos(path, directorio=DIR_CACHE, tamano_maximo=TAMANO_MAXIMO):
+    """Igual que reporte.extraer_datos, pero reutiliza el resultado si el reporte ya se leyó"""
+    with trazas.tramo("cache_reportes.buscar") as t:
+        clave = huella(path)
+        archivo = os.path.join(directorio, clave + ".json")
+        datos = _leer(archivo)
+        t.anotar(acierto=datos is not None)
+    if datos is not None:
+        return datos
+
+    datos = reporte.extraer_datos(path)
+    try:
+        os.makedirs(directorio, exist_ok=True)
+        _guardar(archivo, datos)
+        podar(directorio, tamano_maximo)
+    except OSError as e:
+        # La caché es sólo una ayuda: si no se puede escribir, se sigue sin ella
+        print(f"No se pudo guardar en la caché de reportes: {e}")
+    return datos
@@ -0,0 +1,211 @@
+"""Precios de los métodos de QA leídos de costos.xlsx, con caché en memoria"""
+import ast
+import operator
+import os
+import re
+
+import pandas as pd
+
+from qads import decision, trazas
+
+RUTA_COSTOS = "costos.xlsx"
+# Columnas B a I de costos.xlsx, en el orden de la hoja
+PARAMETROS = ["costo_inicial", "vida_util", "mantenimiento", "costo_hora_personal",
+              "horas_instrumental", "horas_software", "usos_anuales", "horas_linac"]
+FILA_LINAC = "LINAC"
+COLUMNAS_LEIDAS = 11  # A (método) a K (costo por uso)
+
+_OPERADORES = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+               ast.Pow: operator.pow, ast.USub: operator.neg, ast.UAdd: operator.pos}
+_REFERENCIA = re.compile(r"^[A-Z]{1,3}[0-9]+$")
+
+# ruta absoluta -> ((mtime, tamaño), TablaCostos)
+_cache = {}
+
+
+class PrecioFaltante(ValueError):
+    """Algún método del paquete no tiene precio en costos.xlsx"""
+
+
+class TablaCostos:
+    """Precio por método y costo ya sumado de cada paquete que puede recomendar el árbol"""
+
+    def __init__(self, precios, motivo=None):
+        self.precios = precios
+        # Por qué no hay precios (por ejemplo, no se encontró costos.xlsx), para los mensajes de error
+        self.motivo = motivo
+        self.paquetes = {}
+        for paquete in decision.paquetes_posibles():
+            try:
+                self.paquetes[paquete] = self._sumar(paquete)
+            except PrecioFaltante:
+                pass  # El error se informa cuando se pide el costo de ese paquete
+
+    def metodos(self, paquete):
+        """Separa "Plancheck + LogFile" -> ["Plancheck", "LogFile"].
+
+        Los nombres que ya contienen " + " (como "Stereophan + Gafchromic/CI")
+        se reconocen enteros si figuran así en la tabla de precios.
+        """
+        partes = [t.strip() for t in paquete.split("+")]
+        metodos, i = [], 0
+        while i < len(partes):
+            j = next((j for j in range(len(partes), i + 1, -1) if " + ".join(partes[i:j]) in self.precios), i + 1)
+            metodos.append(" + ".join(partes[i:j]))
+            i = j
+        return metodos
+
+    def _sumar(self, paquete):
+        metodos = self.metodos(paquete)
+        faltan = [t for t in metodos if t not in self.precios]
+        if faltan:
+            # Mejor fallar que registrar un costo de 0 que parece válido
+            if self.motivo:
+                raise PrecioFaltante(f"{self.motivo}: no se puede calcular el costo de {paquete}")
+            raise PrecioFaltante(f"No hay precio en {RUTA_COSTOS} para: {', '.join(faltan)}")
+        return sum(self.precios[t] for t in metodos)
+
+    def costo_paquete(self, paquete):
+        if not paquete or paquete == "-":
+            return 0
+        costo = self.paquetes.get(paquete)
+        return costo if costo is not None else self._sumar(paquete)
+
+    def costo_acumulado(self, historial_intentos):
+        """Suma el costo de los paquetes usados en todos los intentos"""
+        total = sum(self.costo_paquete(intento.get("paquete", "")) for intento in historial_intentos.values())
+        return round(float(total), 2)
+
+
+class _Hoja:
+    """Valores de una hoja con sus fórmulas aritméticas calculadas acá, no por Excel.
+
+    Así un costos.xlsx editado y guardado sin recalcular (por ejemplo con
+    openpyxl) da los mismos precios que después de abrirlo en Excel. Se
+    calculan números, referencias a celdas, paréntesis y + - * / ^; para
+    otras fórmulas (SUMA, REDONDEAR, SI...) se usa el último valor que
+    calculó Excel: `cargar_valores` devuelve la hoja abierta con
+    data_only=True y se llama recién con la primera de esas fórmulas, así un
+    costos.xlsx sin ellas se abre una sola vez. Si tampoco hay un valor
+    guardado, la celda vale NaN y sólo quedan sin precio los métodos que
+    dependen de ella.
+    """
+
+    def __init__(self, ws, cargar_valores=None):
+        self.celdas = {c.coordinate: c.value for fila in ws.iter_rows() for c in fila if c.value is not None}
+        self.max_fila = ws.max_row
+        self._cargar_valores = cargar_valores
+        self._guardadas = None
+        self._calculadas = {}
+
+    @property
+    def guardadas(self):
+        if self._guardadas is None:
+            ws = self._cargar_valores() if self._cargar_valores else None
+            self._guardadas = {} if ws is None else {
+                c.coordinate: c.value for fila in ws.iter_rows() for c in fila if c.value is not None}
+        return self._guardadas
+
+    def valor(self, referencia, visitadas=()):
+        if referencia in self._calculadas:
+            return self._calculadas[referencia]
+        valor = self.celdas.get(referencia)
+        if isinstance(valor, str) and valor.startswith("="):
+            if referencia in visitadas:
+                raise ValueError(f"{RUTA_COSTOS}: referencia circular en {referencia}")
+            try:
+                valor = self._formula(referencia, valor[1:], (*visitadas, referencia))
+            except ValueError:
+                valor = self.guardadas.get(referencia)
+                if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+                    valor = float("nan")
+        self._calculadas[referencia] = valor
+        return valor
+
+    def _formula(self, referencia, formula, visitadas):
+        try:
+            arbol = ast.parse(formula.replace("$", "").replace("^", "**").upper(), mode="eval")
+            return self._nodo(arbol.body, visitadas)
+        except (SyntaxError, TypeError, ZeroDivisionError, ValueError) as e:
+            raise ValueError(f"{RUTA_COSTOS}: no se puede calcular {referencia} (={formula}): {e}") from None
+
+    def _nodo(self, nodo, visitadas):
+        if isinstance(nodo, ast.Constant) and isinstance(nodo.value, (int, float)):
+            return nodo.value
+        if isinstance(nodo, ast.Name) and _REFERENCIA.match(nodo.id):
+            valor = self.valor(nodo.id, visitadas)
+            return 0 if valor is None else valor  # Como en Excel, una celda vacía vale 0
+        if isinstance(nodo, ast.BinOp) and type(nodo.op) in _OPERADORES:
+            return _OPERADORES[type(nodo.op)](self._nodo(nodo.left, visitadas), self._nodo(nodo.right, visitadas))
+        if isinstance(nodo, ast.UnaryOp) and type(nodo.op) in _OPERADORES:
+            return _OPERADORES[type(nodo.op)](self._nodo(nodo.operand, visitadas))
+        raise ValueError("sólo se admiten números, celdas y + - * / ^")
+
+    def filas(self, columnas):
+        letras = [chr(ord("A") + i) for i in range(columnas)]
+        return [[self.valor(f"{letra}{fila}") for letra in letras] for fila in range(1, self.max_fila + 1)]
+
+
+def leer_parametros(ruta=RUTA_COSTOS):
+    """Parámetros de costo por método (columnas B a I) y el costo por uso de K, con las fórmulas calculadas"""
+    from openpyxl import load_workbook
+
+    hoja = _Hoja(load_workbook(ruta).active, lambda: load_workbook(ruta, data_only=True).active)
+    _, *filas = hoja.filas(COLUMNAS_LEIDAS)  # La primera fila es el encabezado
+    df_costos = pd.DataFrame(filas, columns=range(COLUMNAS_LEIDAS))
+    parametros = df_costos.iloc[:, 1:9].apply(pd.to_numeric, errors="coerce")
+    parametros.columns = PARAMETROS
+    parametros["costo_excel"] = pd.to_numeric(df_costos.iloc[:, 10], errors="coerce")
+    # .strip() elimina espacios accidentales para que coincida con el paquete
+    parametros.index = df_costos.iloc[:, 0].astype(str).str.strip()
+    return parametros
+
+
+def calcular_costo_por_uso(parametros, costo_hora_linac):
+    """Costo por uso de cada fila, con la misma fórmula que la columna K del Excel:
+
+        (costo inicial / vida útil + mantenimiento + horas de linac * costo hora linac
+         + costo hora personal * (horas instrumental + horas software)) / usos anuales
+
+    Las horas vacías cuentan como 0; si falta algún otro dato el resultado es NaN.
+    """
+    horas = parametros[["horas_instrumental", "horas_software", "horas_linac"]].fillna(0)
+    anual = (parametros["costo_inicial"] / parametros["vida_util"]
+             + parametros["mantenimiento"]
+             + horas["horas_linac"] * costo_hora_linac
+             + parametros["costo_hora_personal"] * (horas["horas_instrumental"] + horas["horas_software"]))
+    return anual / parametros["usos_anuales"].where(parametros["usos_anuales"] > 0)
+
+
+def calcular_precios(parametros):
+    """Costo por uso de todos los métodos a partir de sus parámetros.
+
+    La fila "Linac" da el costo por hora del acelerador que usan los demás
+    métodos. Donde no se puede calcular se conserva el valor de la columna K.
+    """
+    es_linac = parametros.index.str.upper() == FILA_LINAC
+    # Para el linac la fórmula da directamente el costo por hora (sin horas de linac propias)
+    linac = calcular_costo_por_uso(parametros[es_linac].assign(horas_linac=0), 0).dropna()
+    costo_hora_linac = linac.iloc[0] if len(linac) else 0
+    precios = calcular_costo_por_uso(parametros, costo_hora_linac).fillna(parametros["costo_excel"])
+    return precios.dropna().to_dict()
+
+
+def _leer_precios(ruta):
+    with trazas.tramo("costos.leer", bytes=os.path.getsize(ruta)) as t:
+        precios = calcular_precios(leer_parametros(ruta))
+        t.anotar(filas=len(precios))
+    return precios
+
+
+def cargar_tabla(ruta=RUTA_COSTOS):
+    """Devuelve la tabla de costos, releyendo el Excel sólo si cambió su fecha o tamaño"""
+    if not os.path.exists(ruta):
+        return TablaCostos({}, motivo=f"No se encontró {ruta}")
+    estado = os.stat(ruta)
+    firma = (estado.st_mtime_ns, estado.st_size)
+    clave = os.path.abspath(ruta)
+    en_cache = _cache.get(clave)
+    if en_cache is None or en_cache[0] != firma:
+        en_cache = _cache[clave] = (firma, TablaCostos(_leer_precios(ruta)))
+    return en_cache[1]
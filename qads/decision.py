@@ -0,0 +1,226 @@
+"""Complejidad del plan y elección del paquete de QA, sin dependencias de la interfaz"""
+import csv
+import os
+from dataclasses import dataclass, fields, replace
+from itertools import product
+
+# numpy y pandas sólo se importan en las funciones vectorizadas: la interfaz
+# importa este módulo al arrancar y no debe pagar su tiempo de carga
+
+TECNICAS = ["3D", "IMRT", "VMAT", "SRS", "SBRT", "FIF"]
+REGIONES = ["MAMA", "COLON/RECTO", "PULMON", "PROSTATA", "CERVIX/UTERO", "ESOFAGO", "CYC", "PANCREAS",
+            "VEJIGA", "ENCEFALO/SNC", "MIEMBROS", "OTROS"]
+REGIONES_CON_CA = ["COLON/RECTO", "PULMON", "CERVIX/UTERO", "CYC"]
+RUTA_REGLAS = "reglas_qa.csv"
+SIN_PAQUETE = "Indefinido"
+
+
+@dataclass(frozen=True)
+class Umbrales:
+    """Umbrales de complejidad, en el mismo orden en que se guardan en umbrales.txt"""
+    mcs: float = 0.5
+    sas: float = 0.5
+    fractions: int = 3
+    mcs_min: float = 0.5
+    sas_max: float = 0.5
+    pmu: int = 1000
+
+
+def cargar_umbrales(ruta="umbrales.txt"):
+    """Lee umbrales.txt línea por línea; lo que falte o no se pueda leer queda por defecto"""
+    valores = {}
+    if os.path.exists(ruta):
+        try:
+            with open(ruta, "r") as f:
+                lineas = f.readlines()
+            for campo, linea in zip(fields(Umbrales), lineas):
+                valores[campo.name] = campo.type(linea.strip())
+        except:
+            pass  # Si falla, se conservan los valores leídos hasta ese punto
+    return replace(Umbrales(), **valores)
+
+
+def inferir_tecnica_region(plan_name):
+    """Técnica y región por defecto a partir del nombre del plan"""
+    plan_name = plan_name.upper()
+    palabras = plan_name.split()
+    tecnica = next((t for t in TECNICAS if t in plan_name), "3D")
+    region = palabras[2] if len(palabras) >= 3 and palabras[2] in REGIONES else "OTROS"
+    return tecnica, region
+
+
+def limpiar_valor(valor, default):
+    """Limpia strings con comas y los convierte a float de forma segura"""
+    if valor is None or str(valor).strip() in ["-", ""]:
+        return default
+    try:
+        return float(str(valor).replace(',', '.'))
+    except:
+        return default
+
+
+def condiciones_complejidad(datos_paciente, umbrales):
+    """Evalúa cada criterio de complejidad por separado (sin mirar la técnica)"""
+    mcs_min_paciente = limpiar_valor(datos_paciente.get("MCSmin"), 1.0)
+    sas_max_paciente = limpiar_valor(datos_paciente.get("SASmax"), 0.0)
+    frac_paciente = int(limpiar_valor(datos_paciente.get("Fractions"), 1))
+    mcs_prom_paciente = limpiar_valor(datos_paciente.get("MCS"), 1.0)
+    sas_prom_paciente = limpiar_valor(datos_paciente.get("SAS"), 0.0)
+    pmu_paciente = limpiar_valor(datos_paciente.get("PMU"), 0.0)
+
+    return {
+        "MCSmin": mcs_min_paciente < umbrales.mcs_min,
+        "SASmax": sas_max_paciente > umbrales.sas_max,
+        "Frac": frac_paciente > umbrales.fractions,
+        "MCSprom": mcs_prom_paciente < umbrales.mcs,
+        "SASprom": sas_prom_paciente > umbrales.sas,
+        "PMU": pmu_paciente > umbrales.pmu,
+    }
+
+
+def es_plan_complejo(datos_paciente, tecnica, umbrales):
+    """Sólo IMRT y VMAT pueden ser complejos; basta con que se cumpla un criterio"""
+    if tecnica not in ["IMRT", "VMAT"]:
+        return False
+    return any(condiciones_complejidad(datos_paciente, umbrales).values())
+
+
+def limpiar_columna(serie, default):
+    """Versión por columnas de limpiar_valor"""
+    import numpy as np
+    import pandas as pd
+
+    valores = pd.to_numeric(serie, errors="coerce")
+    # Sólo los textos que no se pudieron convertir (coma decimal, espacios) pasan por la limpieza
+    revisar = valores.isna() & serie.notna()
+    if revisar.any():
+        texto = serie[revisar].astype(str).str.strip().str.replace(',', '.', regex=False)
+        valores[revisar] = pd.to_numeric(texto, errors="coerce")
+    return valores.fillna(default).to_numpy(dtype=np.float64)
+
+
+def condiciones_complejidad_df(df, umbrales):
+    """condiciones_complejidad para todas las filas de un DataFrame con las claves de datos_paciente"""
+    import numpy as np
+    import pandas as pd
+
+    def columna(clave, default):
+        if clave not in df:
+            return np.full(len(df), default, dtype=np.float64)
+        return limpiar_columna(df[clave], default)
+
+    return pd.DataFrame({
+        "MCSmin": columna("MCSmin", 1.0) < umbrales.mcs_min,
+        "SASmax": columna("SASmax", 0.0) > umbrales.sas_max,
+        "Frac": np.trunc(columna("Fractions", 1)) > umbrales.fractions,
+        "MCSprom": columna("MCS", 1.0) < umbrales.mcs,
+        "SASprom": columna("SAS", 0.0) > umbrales.sas,
+        "PMU": columna("PMU", 0.0) > umbrales.pmu,
+    }, index=df.index)
+
+
+class ReglasQA:
+    """Tabla de decisión del paquete de QA, compilada a un diccionario.
+
+    Cada regla indica técnica, complejo, ca_ped (cambios anatómicos o paciente
+    pediátrico), intento y paquete; "*" vale para cualquier valor. Si varias
+    reglas coinciden gana la primera. Que no haya regla para el intento
+    siguiente significa que, si el control falla, se debe rehacer el plan.
+    """
+    COLUMNAS = ["tecnica", "complejo", "ca_ped", "intento"]
+
+    def __init__(self, reglas):
+        intentos = sorted({int(r["intento"]) for r in reglas if r["intento"] != "*"}) or [1]
+        dominios = {"tecnica": TECNICAS, "complejo": [False, True], "ca_ped": [False, True], "intento": intentos}
+
+        self.tabla = {}
+        for regla in reglas:
+            opciones = [dominios[c] if regla[c] == "*" else [self._valor(c, regla[c])] for c in self.COLUMNAS]
+            for clave in product(*opciones):
+                self.tabla.setdefault(clave, regla["paquete"].strip())
+
+    @staticmethod
+    def _valor(columna, texto):
+        texto = texto.strip()
+        if columna in ("complejo", "ca_ped"):
+            if texto.lower() not in ("si", "no"):
+                raise ValueError(f"Valor inválido en la columna {columna} de las reglas de QA: {texto!r}")
+            return texto.lower() == "si"
+        if columna == "intento":
+            return int(texto)
+        if texto not in TECNICAS:
+            raise ValueError(f"Técnica desconocida en las reglas de QA: {texto!r}")
+        return texto
+
+    @classmethod
+    def desde_csv(cls, ruta=RUTA_REGLAS):
+        with open(ruta, newline="", encoding="utf-8") as f:
+            return cls(list(csv.DictReader(f)))
+
+    def paquete(self, tecnica, complejo, ca_ped, intento):
+        return self.tabla.get((tecnica, bool(complejo), bool(ca_ped), intento), SIN_PAQUETE)
+
+    def hay_otro_intento(self, tecnica, complejo, ca_ped, intento):
+        """True si tras fallar `intento` corresponde pasar al siguiente escalón de QA"""
+        return (tecnica, bool(complejo), bool(ca_ped), intento + 1) in self.tabla
+
+    def paquetes(self):
+        return sorted(set(self.tabla.values()))
+
+    def evaluar(self, df, umbrales):
+        """Clasifica muchos planes a la vez.
+
+        df usa las claves de datos_paciente ("MCSmin", "SASmax", "Fractions"...)
+        más "Tecnica", y opcionalmente "CA", "PPed" e "Intento" (1 por defecto).
+        Devuelve las condiciones de complejidad, "Complejo" y "Paquete QA".
+        """
+        import pandas as pd
+
+        condiciones = condiciones_complejidad_df(df, umbrales)
+        tecnica = df["Tecnica"].astype(str)
+        ca_ped = pd.Series(False, index=df.index)
+        for col in ("CA", "PPed"):
+            if col in df:
+                ca_ped |= df[col].fillna(False).astype(bool)
+
+        claves = pd.DataFrame({
+            "tecnica": tecnica,
+            "complejo": tecnica.isin(["IMRT", "VMAT"]) & condiciones.any(axis=1),
+            "ca_ped": ca_ped,
+            "intento": df["Intento"].astype(int) if "Intento" in df else 1,
+        }, index=df.index)
+        resultado = condiciones.assign(Complejo=claves["complejo"])
+        resultado["Paquete QA"] = self.buscar(claves)
+        return resultado
+
+    def buscar(self, claves):
+        """paquete() para un DataFrame con las columnas de COLUMNAS, con un único join"""
+        import pandas as pd
+
+        tabla = pd.DataFrame([(*k, p) for k, p in self.tabla.items()], columns=self.COLUMNAS + ["paquete"])
+        claves = claves[self.COLUMNAS].reset_index(drop=True)
+        return claves.merge(tabla, how="left", on=self.COLUMNAS)["paquete"].fillna(SIN_PAQUETE).to_numpy()
+
+
+# ruta absoluta -> ((mtime, tamaño), ReglasQA)
+_reglas_cache = {}
+
+
+def cargar_reglas(ruta=RUTA_REGLAS):
+    """Reglas compiladas; el archivo sólo se vuelve a leer si cambió"""
+    estado = os.stat(ruta)
+    firma = (estado.st_mtime_ns, estado.st_size)
+    clave = os.path.abspath(ruta)
+    en_cache = _reglas_cache.get(clave)
+    if en_cache is None or en_cache[0] != firma:
+        en_cache = _reglas_cache[clave] = (firma, ReglasQA.desde_csv(ruta))
+    return en_cache[1]
+
+
+def obtener_paquete_qa(tecnica, complejo, ca_ped, intento):
+    return cargar_reglas().paquete(tecnica, complejo, ca_ped, intento)
+
+
+def paquetes_posibles():
+    """Todos los paquetes distintos que pueden recomendar las reglas"""
+    return cargar_reglas().paquetes()
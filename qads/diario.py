@@ -0,0 +1,115 @@
+"""Diario local de exportaciones: cada fila se escribe (con fsync) antes de tocar el registro compartido.
+
+Si la estación se cuelga o la carpeta compartida se desconecta a mitad de
+una exportación, la fila sigue en el diario y se vuelve a aplicar al
+iniciar o en la próxima exportación. Cada fila lleva un uid, así aplicarla
+dos veces no la duplica en la base.
+
+Todo acceso al archivo se hace con un bloqueo de qads.bloqueo
+(`diario_registro.jsonl.lock`), que también excluye a otras instancias de
+la aplicación que usen el mismo diario.
+"""
+import json
+import os
+import tempfile
+import uuid
+from datetime import datetime
+
+from qads import bloqueo
+
+RUTA_DIARIO = "diario_registro.jsonl"
+# Cada operación sobre el diario dura milisegundos: un bloqueo de más de esto quedó abandonado
+VENCIMIENTO_BLOQUEO = 30.0
+
+
+class Diario:
+    def __init__(self, ruta=RUTA_DIARIO):
+        self.ruta = ruta
+
+    def _bloqueo(self):
+        # El diario es local: la fecha del .lock la pone el reloj de esta máquina
+        return bloqueo.Bloqueo(bloqueo.ruta_bloqueo(self.ruta), vencimiento=VENCIMIENTO_BLOQUEO, margen_reloj=0)
+
+    def _escribir(self, entrada, sincronizar):
+        linea = json.dumps(entrada, ensure_ascii=False, default=str) + "\n"
+        with self._bloqueo(), open(self.ruta, "a", encoding="utf-8") as f:
+            f.write(linea)
+            f.flush()
+            if sincronizar:
+                os.fsync(f.fileno())
+
+    def anotar(self, ruta_informe, fila):
+        """Guarda la fila en disco antes de exportarla; devuelve su uid"""
+        uid = uuid.uuid4().hex
+        self._escribir({"uid": uid, "ruta": os.path.abspath(ruta_informe), "fila": fila,
+                        "anotado": datetime.now().isoformat(timespec="seconds")}, sincronizar=True)
+        return uid
+
+    def confirmar(self, uid):
+        """La fila ya está en la base; si esta marca se pierde, reaplicarla no la duplica"""
+        self._escribir({"uid": uid, "aplicado": True}, sincronizar=False)
+
+    def pendientes(self):
+        """Entradas anotadas que todavía no se confirmaron, en orden"""
+        with self._bloqueo():
+            return self._leer_pendientes()
+
+    def _leer_pendientes(self):
+        if not os.path.exists(self.ruta):
+            return []
+        entradas, aplicados = {}, set()
+        with open(self.ruta, encoding="utf-8") as f:
+            for linea in f:
+                try:
+                    entrada = json.loads(linea)
+                except ValueError:
+                    continue  # Última línea cortada por un corte de energía: nunca se llegó a exportar
+                if entrada.get("aplicado"):
+                    aplicados.add(entrada["uid"])
+                else:
+                    entradas[entrada["uid"]] = entrada
+        return [e for uid, e in entradas.items() if uid not in aplicados]
+
+    def compactar(self):
+        """Deja en el diario sólo las entradas pendientes (archivo nuevo + reemplazo atómico).
+
+        La lectura y el reemplazo ocurren con el mismo bloqueo tomado: una
+        fila anotada mientras tanto no puede quedar afuera del archivo nuevo.
+        """
+        with self._bloqueo():
+            pendientes = self._leer_pendientes()
+            if not os.path.exists(self.ruta):
+                return
+            if not pendientes:
+                os.remove(self.ruta)
+                return
+            carpeta = os.path.dirname(os.path.abspath(self.ruta))
+            fd, tmp = tempfile.mkstemp(dir=carpeta, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                for entrada in pendientes:
+                    f.write(json.dumps(entrada, ensure_ascii=False, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.ruta)
+
+    def reproducir(self, abrir_almacen):
+        """Aplica a la base las entradas pendientes.
+
+        Devuelve ({ruta del registro: filas aplicadas}, [errores]); las que
+        fallan siguen pendientes para el próximo intento.
+        """
+        aplicadas, errores, almacenes = {}, [], {}
+        for entrada in self.pendientes():
+            ruta = entrada["ruta"]
+            try:
+                if ruta not in almacenes:
+                    almacenes[ruta] = abrir_almacen(ruta)
+                almacenes[ruta].agregar([entrada["fila"]], uids=[entrada["uid"]])
+            except Exception as e:
+                errores.append(f"{os.path.basename(ruta)}: {e}")
+                continue
+            self.confirmar(entrada["uid"])
+            aplicadas[ruta] = aplicadas.get(ruta, 0) + 1
+        if aplicadas:
+            self.compactar()
+        return aplicadas, errores
@@ -0,0 +1,205 @@
+"""Evaluación de un plan de punta a punta (reporte, árbol de decisión, intentos, exportación) sin interfaz.
+
+Las interfaces de Tk, la evaluación por lotes y los benchmarks usan este
+módulo; no importa tkinter y recibe sólo datos planos.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from qads import decision, trazas
+from qads.diario import Diario
+
+EXITOSO, NO_EXITOSO = "Exitoso", "No Exitoso"
+RESULTADOS = [EXITOSO, NO_EXITOSO]
+MAX_INTENTOS = 2  # Intentos que tienen columna en el registro
+
+# Qué sigue después de registrar un resultado
+VALIDADO = "validado"
+SIGUIENTE_INTENTO = "siguiente"
+REHACER_PLAN = "rehacer"
+
+
+class Cancelado(Exception):
+    """La tarea se detuvo porque el usuario pidió cancelarla"""
+
+
+@dataclass
+class CasoQA:
+    """Un plan en evaluación: datos del reporte, lo que indicó el usuario y los intentos de QA.
+
+    `historial` guarda {intento: {"paquete": ..., "resultado": ...}} de los
+    intentos ya registrados; `intento` es el que está en curso.
+    """
+    datos: dict
+    tecnica: str = "3D"
+    region: str = "OTROS"
+    sexo: str = "-"
+    cambios_anatomicos: bool = False
+    pediatrico: bool = False
+    intento: int = 1
+    historial: dict = field(default_factory=dict)
+
+    @classmethod
+    def desde_reporte(cls, datos):
+        """Caso nuevo con la técnica, región y cambios anatómicos deducidos del nombre del plan"""
+        tecnica, region = decision.inferir_tecnica_region(datos.get("Plan", ""))
+        return cls(datos, tecnica, region, datos.get("Sexo", "-"), region in decision.REGIONES_CON_CA)
+
+    @property
+    def ca_ped(self):
+        return bool(self.cambios_anatomicos or self.pediatrico)
+
+    def condiciones(self, umbrales):
+        return decision.condiciones_complejidad(self.datos, umbrales)
+
+    def es_complejo(self, umbrales):
+        return decision.es_plan_complejo(self.datos, self.tecnica, umbrales)
+
+    def paquete(self, umbrales, reglas=None):
+        """Paquete de QA que corresponde al intento en curso"""
+        reglas = reglas or decision.cargar_reglas()
+        return reglas.paquete(self.tecnica, self.es_complejo(umbrales), self.ca_ped, self.intento)
+
+    def registrar(self, paquete, resultado, umbrales, reglas=None):
+        """Guarda el resultado del intento en curso y devuelve qué sigue.
+
+        VALIDADO si fue exitoso, SIGUIENTE_INTENTO si las reglas prevén otro
+        escalón (y se avanza a él) o REHACER_PLAN si no queda ninguno.
+        """
+        self.historial[self.intento] = {"paquete": paquete, "resultado": resultado}
+        if resultado == EXITOSO:
+            return VALIDADO
+        reglas = reglas or decision.cargar_reglas()
+        if not reglas.hay_otro_intento(self.tecnica, self.es_complejo(umbrales), self.ca_ped, self.intento):
+            return REHACER_PLAN
+        self.intento += 1
+        return SIGUIENTE_INTENTO
+
+    def costo(self, tabla_costos=None):
+        """Costo de los paquetes usados en todos los intentos registrados"""
+        from qads import costos
+
+        return (tabla_costos or costos.cargar_tabla()).costo_acumulado(self.historial)
+
+    def fila_registro(self, fecha=None, costo=None):
+        """Fila del Registro Histórico, con las columnas de qads.almacen.COLUMNAS"""
+        fila = {
+            "Fecha": (fecha or datetime.now()).strftime("%d/%m/%Y"),
+            "ID": self.datos.get("ID", "-"),
+            "Paciente": self.datos.get("Nombre", "-"),
+            "Plan": self.datos.get("Plan", "-"),
+            "Técnica RT": self.tecnica,
+            "MCS Min": self.datos.get("MCSmin"),
+            "SAS Max": self.datos.get("SASmax"),
+        }
+        for i in range(1, MAX_INTENTOS + 1):
+            info = self.historial.get(i, {"paquete": "-", "resultado": "-"})
+            fila[f"QA Intento {i}"] = info["paquete"]
+            fila[f"Resultado {i}"] = info["resultado"]
+        fila["Costo asociado"] = costo
+        # Datos de entrada del árbol, para poder simular otros umbrales sobre el historial
+        fila.update({
+            "MCS Prom": self.datos.get("MCS"),
+            "SAS Prom": self.datos.get("SAS"),
+            "PMU": self.datos.get("PMU"),
+            "Fracciones": self.datos.get("Fractions"),
+            "CA/Pediátrico": self.ca_ped,
+        })
+        return fila
+
+
+def cargar_reporte(path, usar_cache=True):
+    """Datos del reporte de planificación (de la caché en disco si ya se leyó)"""
+    if usar_cache:
+        from qads import cache_reportes
+        return cache_reportes.extraer_datos(path)
+    from qads import reporte
+    return reporte.extraer_datos(path)
+
+
+def exportar(caso, ruta_informe, cancelado=None, fecha=None, diario=None, sincronizar=True, avisos=None):
+    """Guarda el caso en el registro: diario local, base SQLite y Excel, en ese orden.
+
+    `cancelado` es un threading.Event opcional. Antes de guardar, cancelar
+    lanza Cancelado; después, sólo evita esperar la escritura del Excel.
+    Con `sincronizar=False` el Excel no se escribe: la fila queda pendiente
+    en la base (ver qads.sincronizador).
+    Si falta algún precio la fila se guarda igual, con el costo vacío, y el
+    motivo se agrega a la lista `avisos`.
+    Devuelve None si el Excel quedó actualizado o el motivo por el que no.
+    """
+    from qads import costos, registro
+    from qads.almacen import abrir_almacen
+
+    diario = diario or Diario()
+    with trazas.tramo("exportar_informe"):
+        try:
+            costo = caso.costo()
+        except costos.PrecioFaltante as e:
+            # El control se registra igual; un costo vacío no se confunde con un costo de 0
+            costo = None
+            if avisos is not None:
+                avisos.append(f"El costo quedó vacío: {e}")
+        fila = caso.fila_registro(fecha, costo)
+        if cancelado is not None and cancelado.is_set():
+            raise Cancelado()
+        # Desde acá la fila no se pierde: si la base no responde, queda en el diario de esta estación
+        uid = diario.anotar(ruta_informe, fila)
+        # Se aplica junto con las que hayan quedado pendientes de exportaciones anteriores
+        _, errores = diario.reproducir(abrir_almacen)
+        if uid in {e["uid"] for e in diario.pendientes()}:
+            return (f"no se pudo guardar en la base ({'; '.join(errores)}). "
+                    f"La fila quedó en el diario local de esta estación")
+
+        if not sincronizar:
+            return None
+        if cancelado is not None and cancelado.is_set():
+            return "se canceló la escritura"
+        try:
+            registro.sincronizar_excel(abrir_almacen(ruta_informe), ruta_informe)
+        except Exception as e:
+            return str(e)
+        return None
+
+
+def controles_previos(ruta_informe, id_paciente, plan=None):
+    """Controles del paciente (y del plan, si se indica) que ya están en el registro, del más viejo al más nuevo.
+
+    Es una consulta por índice a la base activa; no incluye el archivo histórico.
+    Un reporte sin PATIENT ID ("-") no tiene controles previos: buscar "-"
+    traería los de todos los demás pacientes sin ID.
+    """
+    from qads.almacen import abrir_almacen
+
+    if id_paciente is None or str(id_paciente).strip() in ("", "-"):
+        return []
+    return abrir_almacen(ruta_informe).buscar_paciente(id_paciente, plan)
+
+
+def reproducir_diario(diario=None):
+    """Aplica las exportaciones que quedaron en el diario local y actualiza sus Excel.
+
+    Se llama al iniciar la interfaz; devuelve la lista de errores (vacía si
+    no quedó nada pendiente).
+    """
+    from qads import registro
+    from qads.almacen import abrir_almacen
+
+    aplicadas, errores = (diario or Diario()).reproducir(abrir_almacen)
+    for ruta in aplicadas:
+        try:
+            registro.sincronizar_excel(abrir_almacen(ruta), ruta)
+        except Exception as e:
+            errores.append(f"{ruta}: {e}")
+    return errores
+
+
+def generar_excel(ruta_informe, cancelado=None):
+    """Regenera el Excel completo del registro desde la base; devuelve la cantidad de filas"""
+    from qads import registro
+    from qads.almacen import abrir_almacen
+
+    almacen = abrir_almacen(ruta_informe)
+    if cancelado is not None and cancelado.is_set():
+        raise Cancelado()
+    return registro.generar_excel(almacen, ruta_informe)
@@ -0,0 +1,93 @@
+"""Evaluación por lotes de reportes de planificación, sin interfaz gráfica.
+
+Uso:
+    python -m qads.lote CARPETA_O_PATRON [...] [-o resultados.xlsx] [-j PROCESOS]
+"""
+import argparse
+import glob
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import pandas as pd
+
+from qads import decision, evaluacion
+
+EXTENSIONES = (".xlsx", ".xls")
+
+
+def buscar_reportes(rutas):
+    """Expande carpetas y patrones glob en la lista ordenada de reportes Excel"""
+    encontrados = set()
+    for ruta in rutas:
+        if os.path.isdir(ruta):
+            candidatos = [os.path.join(ruta, n) for n in os.listdir(ruta)]
+        else:
+            candidatos = glob.glob(ruta)
+        for c in candidatos:
+            # Se ignoran los temporales "~$..." que deja Excel con el archivo abierto
+            if c.lower().endswith(EXTENSIONES) and not os.path.basename(c).startswith("~$"):
+                encontrados.add(os.path.abspath(c))
+    return sorted(encontrados)
+
+
+def evaluar_reporte(path, umbrales, usar_cache=True):
+    """Extrae el reporte y aplica el árbol de decisión del primer intento"""
+    fila = {"Archivo": os.path.basename(path)}
+    try:
+        datos = evaluacion.cargar_reporte(path, usar_cache)
+        # Sin interfaz no se puede marcar "Paciente Pediátrico": sólo cuenta la región
+        caso = evaluacion.CasoQA.desde_reporte(datos)
+
+        fila.update({k: v for k, v in datos.items() if k != "Haces"})
+        fila.update({"Técnica RT": caso.tecnica, "Región": caso.region, "Cambios Anatómicos": caso.ca_ped,
+                     "Complejo": caso.es_complejo(umbrales)})
+        if caso.tecnica in ["IMRT", "VMAT"]:
+            fila["Criterios"] = ", ".join(k for k, v in caso.condiciones(umbrales).items() if v)
+        fila["QA Intento 1"] = caso.paquete(umbrales)
+    except Exception as e:
+        fila["Error"] = str(e)
+    return fila
+
+
+def evaluar_lote(paths, umbrales, procesos=None, usar_cache=True):
+    """Evalúa todos los reportes en un pool de procesos y devuelve la tabla de resultados"""
+    if not paths:
+        return pd.DataFrame()
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        filas = list(pool.map(partial(evaluar_reporte, umbrales=umbrales, usar_cache=usar_cache),
+                              paths, chunksize=4))
+    return pd.DataFrame(filas)
+
+
+def guardar_resultados(df, salida):
+    if salida.lower().endswith(".csv"):
+        df.to_csv(salida, index=False)
+    else:
+        df.to_excel(salida, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evalúa una carpeta de reportes y recomienda el paquete de QA.")
+    parser.add_argument("rutas", nargs="+", help="Carpetas o patrones glob con reportes .xlsx/.xls")
+    parser.add_argument("-o", "--salida", default="resultados_lote.xlsx", help="Tabla de resultados (.xlsx o .csv)")
+    parser.add_argument("-j", "--procesos", type=int, default=None, help="Procesos en paralelo (por defecto, uno por CPU)")
+    parser.add_argument("--umbrales", default="umbrales.txt", help="Archivo de umbrales a usar")
+    parser.add_argument("--sin-cache", action="store_true", help="Volver a leer todos los reportes aunque estén en caché")
+    args = parser.parse_args(argv)
+
+    paths = buscar_reportes(args.rutas)
+    if not paths:
+        print("No se encontraron reportes.", file=sys.stderr)
+        return 1
+
+    df = evaluar_lote(paths, decision.cargar_umbrales(args.umbrales), args.procesos, not args.sin_cache)
+    guardar_resultados(df, args.salida)
+    errores = int(df["Error"].notna().sum()) if "Error" in df else 0
+    print(f"{len(df)} reportes evaluados ({errores} con error) -> {args.salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
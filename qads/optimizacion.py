@@ -0,0 +1,163 @@
+"""Búsqueda de umbrales de complejidad: frente de Pareto costo esperado vs. fallos no detectados.
+
+Un fallo no detectado es un plan IMRT/VMAT cuyo primer control falló
+("Resultado 1" = "No Exitoso") y que con los umbrales evaluados se habría
+clasificado como simple.
+
+Uso:
+    python -m qads.optimizacion [--registro RUTA] [--niveles 12] [--rango mcs=0.3:0.7:0.02 ...] [-o frente.csv]
+"""
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from qads import decision
+from qads.simulacion import CRITERIOS, Historial, _rango, leer_ruta_registro
+
+# Tope de celdas del histograma de niveles (producto de niveles por criterio)
+MAX_CELDAS = 20_000_000
+
+
+def niveles_por_cuantiles(valores, niveles):
+    """Umbrales candidatos en los cuantiles de los valores observados, sin repetidos"""
+    if not valores.size:
+        return np.zeros(1)
+    return np.unique(np.quantile(valores, np.linspace(0, 1, niveles)))
+
+
+def _rango_simple(grilla, valores, menor):
+    """Para cada plan, cuántos umbrales de la grilla lo dejan como simple en este criterio.
+
+    La grilla de los criterios "mayor que" se recorre al revés para que en todos
+    los casos el plan sea simple exactamente en los índices k < rango.
+    """
+    if menor:  # complejo si valor < umbral: simple mientras umbral <= valor
+        return np.searchsorted(grilla, valores, side="right")
+    # complejo si valor > umbral: simple desde el primer umbral >= valor
+    return len(grilla) - np.searchsorted(grilla, valores, side="left")
+
+
+def _sumas_sufijas(hist):
+    """Suma acumulada desde el final en cada eje: S[k] = suma de hist[r] con r >= k"""
+    for eje in range(hist.ndim):
+        hist = np.flip(np.cumsum(np.flip(hist, eje), axis=eje), eje)
+    return hist
+
+
+def frente_pareto(costo, no_detectados):
+    """Índices de los puntos no dominados (menor costo y menos fallos no detectados)"""
+    orden = np.lexsort((no_detectados, costo))
+    minimo_previo = np.minimum.accumulate(np.concatenate([[np.inf], no_detectados[orden][:-1]]))
+    return orden[no_detectados[orden] < minimo_previo]
+
+
+def optimizar(historial, grillas):
+    """Evalúa todas las combinaciones de las grillas y devuelve el frente de Pareto.
+
+    En lugar de comparar cada plan con cada combinación, cada plan se ubica en
+    un histograma de niveles: con sumas acumuladas por eje se obtiene, para
+    todas las combinaciones a la vez, el costo ahorrado por los planes que
+    quedan como simples y cuántos fallos quedan sin detectar. El costo es
+    O(planes + combinaciones), sin importar cuántos planes tenga el historial.
+    Los umbrales de una grilla que no separan ningún plan son equivalentes y se
+    descartan antes de armar el histograma.
+    """
+    candidatos = historial.puede_ser_complejo
+    campos = list(CRITERIOS)
+
+    grillas_podadas, rangos = [], []
+    for campo in campos:
+        _, _, menor = CRITERIOS[campo]
+        grilla = np.unique(np.asarray(grillas[campo], dtype=np.float64))
+        valores = historial.valores[campo][candidatos]
+        # Orden de recorrido: ascendente para "menor que", descendente para "mayor que"
+        orientada = grilla if menor else grilla[::-1]
+        # Poda: el índice k sólo cambia la clasificación si algún plan pasa a complejo justo ahí
+        indices = np.arange(len(orientada))
+        orientada = orientada[(indices == 0) | np.isin(indices, _rango_simple(grilla, valores, menor))]
+        grillas_podadas.append(orientada)
+        rangos.append(_rango_simple(np.sort(orientada), valores, menor))
+
+    forma = tuple(len(g) + 1 for g in grillas_podadas)
+    if np.prod(forma, dtype=np.float64) > MAX_CELDAS:
+        raise ValueError(f"La grilla es demasiado grande ({int(np.prod(forma, dtype=np.float64))} celdas); "
+                         "use menos niveles o fije algunos umbrales.")
+
+    delta = (historial.costo[True] - historial.costo[False])[candidatos]
+    fallos = historial.fallo_1[candidatos].astype(np.float64)
+    celdas = np.ravel_multi_index(rangos, forma)
+    simples_delta = _sumas_sufijas(np.bincount(celdas, weights=delta, minlength=int(np.prod(forma))).reshape(forma))
+    simples_fallos = _sumas_sufijas(np.bincount(celdas, weights=fallos, minlength=int(np.prod(forma))).reshape(forma))
+    simples = _sumas_sufijas(np.bincount(celdas, minlength=int(np.prod(forma))).reshape(forma))
+
+    # Un plan es simple en la combinación k si k_c < rango_c en todos los criterios -> sufijo desde k + 1
+    recorte = tuple(slice(1, None) for _ in forma)
+    costo_total = historial.costo[False].sum() + delta.sum() - simples_delta[recorte].ravel()
+    no_detectados = simples_fallos[recorte].ravel()
+    complejos = candidatos.sum() - simples[recorte].ravel()
+
+    total_fallos = fallos.sum()
+    tasa = no_detectados / total_fallos if total_fallos else np.zeros_like(no_detectados)
+    frente = frente_pareto(costo_total, tasa)
+
+    indices = np.unravel_index(frente, tuple(len(g) for g in grillas_podadas))
+    resultado = pd.DataFrame({campo: grilla[idx] for campo, grilla, idx in zip(campos, grillas_podadas, indices)})
+    resultado["complejos"] = complejos[frente].astype(int)
+    resultado["costo_por_plan"] = costo_total[frente] / max(historial.n, 1)
+    resultado["costo_total"] = costo_total[frente]
+    resultado["fallos_no_detectados"] = tasa[frente]
+    resultado.attrs["combinaciones"] = int(np.prod([len(g) for g in grillas_podadas]))
+    return resultado.reset_index(drop=True)
+
+
+def grillas_por_defecto(historial, niveles, rangos=None):
+    """Cuantiles observados para cada criterio, salvo los rangos indicados a mano"""
+    grillas = {}
+    for campo in CRITERIOS:
+        if rangos and campo in rangos:
+            grillas[campo] = rangos[campo]
+        else:
+            grillas[campo] = niveles_por_cuantiles(historial.valores[campo][historial.puede_ser_complejo], niveles)
+    return grillas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Busca umbrales de complejidad que equilibren costo y fallos.")
+    parser.add_argument("--registro", default=None, help="Excel del registro (por defecto, el de config_ruta.txt)")
+    parser.add_argument("--niveles", type=int, default=12, help="Umbrales candidatos por criterio (cuantiles)")
+    parser.add_argument("--rango", action="append", type=_rango, default=[],
+                        help="Grilla manual campo=inicio:fin:paso para un criterio (se puede repetir)")
+    parser.add_argument("--fijar", action="append", default=[],
+                        help="Deja un criterio en su umbral actual (por ejemplo --fijar pmu)")
+    parser.add_argument("--umbrales", default="umbrales.txt", help="Umbrales actuales")
+    parser.add_argument("--desde", default=None, help="Sólo planes exportados desde esta fecha (AAAA-MM-DD)")
+    parser.add_argument("--antes", default=None, help="Sólo planes exportados antes de esta fecha (AAAA-MM-DD)")
+    parser.add_argument("-o", "--salida", default=None, help="CSV con el frente de Pareto")
+    args = parser.parse_args(argv)
+
+    ruta = args.registro or leer_ruta_registro()
+    if not ruta:
+        print("No hay un registro configurado.", file=sys.stderr)
+        return 1
+
+    actuales = decision.cargar_umbrales(args.umbrales)
+    rangos = dict(args.rango)
+    rangos.update({campo: [getattr(actuales, campo)] for campo in args.fijar})
+    historial = Historial.desde_registro(ruta, args.desde, args.antes)
+    frente = optimizar(historial, grillas_por_defecto(historial, args.niveles, rangos))
+
+    actual = historial.complejos(actuales)
+    fallos = historial.fallo_1 & historial.puede_ser_complejo
+    print(f"Combinaciones evaluadas: {frente.attrs['combinaciones']}")
+    print(f"Umbrales actuales: costo por plan ${historial.costo_total(actual) / max(historial.n, 1):.2f}, "
+          f"fallos no detectados {(fallos & ~actual).sum() / max(fallos.sum(), 1):.1%}\n")
+    if args.salida:
+        frente.to_csv(args.salida, index=False)
+    print(frente.to_string(index=False, float_format=lambda v: f"{v:.4g}"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
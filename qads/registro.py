@@ -0,0 +1,170 @@
+"""Escritura del Registro Histórico de controles de QA en Excel"""
+import os
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.styles import PatternFill, Font, Alignment, Border, Side, NamedStyle
+
+from qads import bloqueo, trazas
+from qads.almacen import COLUMNAS
+
+ESTILO_ENCABEZADO = "QADS Encabezado"
+ESTILO_CELDA = "QADS Celda"
+ESTILO_COSTO = "QADS Costo"
+
+
+def agregar_filas(ruta, filas):
+    """Agrega filas al final del registro, abriendo y guardando el libro una sola vez.
+
+    No es un agregado en el lugar: openpyxl lee y vuelve a escribir el libro
+    completo, así que el tiempo crece con el tamaño del registro (ver
+    exportacion.registro_* en benchmarks/baseline.json). Lo que no depende
+    del tamaño es guardar la fila en la base (qads.almacen); por eso las
+    exportaciones escriben la base enseguida y este Excel después, varias
+    filas a la vez (qads.sincronizador).
+    """
+    with trazas.tramo("registro.agregar_filas", filas=len(filas)) as t:
+        _agregar_filas(ruta, filas)
+        if t:
+            t.anotar(bytes=os.path.getsize(ruta))
+
+
+def _agregar_filas(ruta, filas):
+    if os.path.exists(ruta):
+        with trazas.tramo("registro.abrir_libro"):
+            wb = load_workbook(ruta)
+        ws = wb.active
+        encabezados = [cell.value for cell in ws[1] if cell.value is not None]
+        # Columnas que el registro todavía no tenía se suman al final del encabezado
+        for columna in dict.fromkeys(c for fila in filas for c in fila):
+            if columna not in encabezados:
+                encabezados.append(columna)
+                ws.cell(row=1, column=len(encabezados), value=columna)
+    else:
+        wb = Workbook()
+        ws = wb.active
+        encabezados = list(dict.fromkeys(c for fila in filas for c in fila))
+        ws.append(encabezados)
+
+    desde_fila = ws.max_row + 1
+    for fila in filas:
+        ws.append([fila.get(columna) for columna in encabezados])
+
+    # Sólo se da formato a las filas nuevas (y al encabezado), no a todo el historial
+    aplicar_formato_excel(wb, ws, desde_fila=desde_fila)
+    with trazas.tramo("registro.guardar_libro"):
+        guardar_libro(wb, ruta)
+
+
+def guardar_libro(wb, ruta):
+    """Guarda en un temporal de la misma carpeta y lo renombra sobre el registro.
+
+    Si el proceso o la red se cortan a mitad de la escritura, el registro
+    anterior queda intacto: el reemplazo es atómico.
+    """
+    tmp = f"{ruta}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            wb.save(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, ruta)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def sincronizar_excel(almacen, ruta, espera=bloqueo.ESPERA):
+    """Vuelca al Excel las filas de la base que todavía no están en él; devuelve cuántas.
+
+    Sólo una estación escribe el Excel a la vez. Quien tiene el bloqueo vuelve
+    a mirar las pendientes antes de soltarlo, así las filas que otras
+    estaciones guardaron mientras tanto salen en la misma escritura. Si el
+    bloqueo no se libera a tiempo se lanza bloqueo.BloqueoOcupado y las filas
+    quedan pendientes en la base.
+    """
+    total = 0
+    with bloqueo.Bloqueo(bloqueo.ruta_bloqueo(ruta), espera) as b:
+        while True:
+            pendientes = almacen.pendientes_excel()
+            if not pendientes:
+                return total
+            agregar_filas(ruta, [fila for _, fila in pendientes])
+            almacen.marcar_en_excel([rowid for rowid, _ in pendientes])
+            total += len(pendientes)
+            b.renovar()
+
+
+def generar_excel(almacen, ruta):
+    """Genera el Excel completo desde la base (por ejemplo, si se borró o se dañó)"""
+    with bloqueo.Bloqueo(bloqueo.ruta_bloqueo(ruta)), trazas.tramo("registro.generar_excel") as t:
+        registros = almacen.registros()
+        escribir_registro(ruta, registros)
+        t.anotar(filas=len(registros))
+        almacen.marcar_en_excel([rowid for rowid, _ in registros])
+    return len(registros)
+
+
+def escribir_registro(ruta, registros):
+    """Reemplaza el Excel por uno nuevo con `registros` [(rowid, fila)]; quien llama tiene el bloqueo"""
+    wb = Workbook()
+    ws = wb.active
+    encabezados = list(COLUMNAS)
+    ws.append(encabezados)
+    for _, fila in registros:
+        ws.append([fila.get(columna) for columna in encabezados])
+    aplicar_formato_excel(wb, ws)
+    guardar_libro(wb, ruta)
+
+
+def _registrar_estilos(wb):
+    """Registra una única vez en el libro los estilos con nombre que usan las celdas"""
+    if ESTILO_ENCABEZADO in wb.named_styles:
+        return
+    borde = Border(left=Side(style='thin'), right=Side(style='thin'),
+                   top=Side(style='thin'), bottom=Side(style='thin'))
+    wb.add_named_style(NamedStyle(
+        name=ESTILO_ENCABEZADO, border=borde, font=Font(bold=True), alignment=Alignment(horizontal="center"),
+        fill=PatternFill(start_color="ADD8E6", end_color="ADD8E6", fill_type="solid")))
+    wb.add_named_style(NamedStyle(name=ESTILO_CELDA, border=borde, alignment=Alignment(horizontal="left")))
+    # El formato '"$"#,##0.00' mostrará el punto o coma según la región de tu Windows/Excel
+    wb.add_named_style(NamedStyle(name=ESTILO_COSTO, border=borde, number_format='"$"#,##0.00',
+                                  alignment=Alignment(horizontal="right")))
+
+
+def aplicar_formato_excel(wb, ws, desde_fila=2):
+    """Da formato al encabezado y a las filas desde `desde_fila` en adelante.
+
+    El ancho de cada columna funciona como el máximo acumulado de sus textos:
+    sólo crece con los valores nuevos, sin recorrer las filas anteriores.
+    """
+    with trazas.tramo("registro.aplicar_formato", filas=max(ws.max_row - max(desde_fila, 2) + 1, 0)):
+        _aplicar_formato(wb, ws, desde_fila)
+
+
+def _aplicar_formato(wb, ws, desde_fila):
+    _registrar_estilos(wb)
+
+    # 1. Estilo de cabeceras y ubicación de la columna de costo
+    col_costo_idx = None
+    for cell in ws[1]:
+        cell.style = ESTILO_ENCABEZADO
+        if cell.value == "Costo asociado":
+            col_costo_idx = cell.column
+
+    # 2. Estilo de las filas nuevas
+    filas = list(ws.iter_rows(min_row=max(desde_fila, 2)))
+    for row in filas:
+        for cell in row:
+            cell.style = ESTILO_COSTO if cell.column == col_costo_idx else ESTILO_CELDA
+
+    # 3. Ancho de columnas: crece si algún valor nuevo (o un encabezado nuevo) es más largo
+    for row in [ws[1], *filas]:
+        for cell in row:
+            if not cell.value:
+                continue
+            letra = cell.column_letter
+            actual = ws.column_dimensions[letra].width if letra in ws.column_dimensions else 0
+            ws.column_dimensions[letra].width = max(actual or 0, len(str(cell.value)) + 4)
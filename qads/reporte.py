@@ -0,0 +1,193 @@
+"""Extracción de datos de los reportes exportados por el sistema de planificación"""
+import numbers
+import os
+from contextlib import closing
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from qads import trazas
+
+# Clave en datos_paciente -> etiqueta tal como aparece en el reporte
+ETIQUETAS = {
+    "Plan": "PLAN NAME",
+    "Nombre": "PATIENT NAME",
+    "ID": "PATIENT ID",
+    "Sexo": "PATIENT SEX",
+    "Fractions": "FRACTIONS",
+    "MCS": "MCS",
+    "SAS": "SAS",
+    "PMU": "PMU",
+}
+SECCION_BEAM_METRICS = "BEAM METRICS"
+# Títulos de las secciones que siguen a BEAM METRICS en los reportes conocidos
+SECCIONES_POSTERIORES = ("DVH STATISTICS",)
+# Subir cuando cambie lo que devuelve extraer_datos: invalida la caché de reportes
+VERSION_PARSER = 3
+# Columnas (0-based) de la sección BEAM METRICS: nombre de la métrica y su valor
+COL_METRICA, COL_VALOR = 2, 3
+
+
+@dataclass
+class MetricasHaz:
+    """Valores por haz de la sección BEAM METRICS, agrupados por métrica ("MCS", "SAS", "MU"...)"""
+    valores: dict = field(default_factory=dict)
+
+    @property
+    def mcs(self):
+        return self.valores.get("MCS", np.empty(0))
+
+    @property
+    def sas(self):
+        return self.valores.get("SAS", np.empty(0))
+
+    def resumen(self, metrica):
+        """Estadísticos de una métrica: mínimo, máximo, media, media ponderada por MU y p10/p90"""
+        arr = self.valores.get(metrica)
+        if arr is None or not arr.size:
+            return {}
+        # Sólo se pondera cuando hay un MU por cada haz; si no, se usa la media simple
+        pesos = self.valores.get("MU")
+        if pesos is None or pesos.size != arr.size or not pesos.sum() > 0:
+            pesos = None
+        p10, p90 = np.percentile(arr, [10, 90])
+        return {
+            "min": float(arr.min()),
+            "max": float(arr.max()),
+            "media": float(arr.mean()),
+            "media_ponderada": float(np.average(arr, weights=pesos)),
+            "p10": float(p10),
+            "p90": float(p90),
+        }
+
+
+def _como_texto(valor):
+    """Convierte una celda al texto que se muestra en pantalla ("-" si está vacía)"""
+    if valor is None or (isinstance(valor, float) and pd.isna(valor)):
+        return "-"
+    return str(valor).strip()
+
+
+def _fila_vacia(fila):
+    return all(_como_texto(celda) in ("-", "") for celda in fila)
+
+
+def _es_titulo_seccion(fila):
+    """Fila con un título en mayúsculas en la primera columna y nada más ("DVH STATISTICS", "ARC 1")"""
+    if not len(fila) or not isinstance(fila[0], str):
+        return False
+    titulo = fila[0].strip()
+    return titulo.isupper() and _fila_vacia(fila[1:])
+
+
+def _es_fila_metrica(fila):
+    """Fila con el nombre de una métrica y un valor numérico en las columnas de BEAM METRICS"""
+    if len(fila) <= COL_VALOR or not isinstance(fila[COL_METRICA], str) or not fila[COL_METRICA].strip():
+        return False
+    valor = fila[COL_VALOR]
+    if isinstance(valor, str):
+        try:
+            float(valor.strip().replace(",", "."))
+        except ValueError:
+            return False
+        return True
+    return isinstance(valor, numbers.Real) and not isinstance(valor, bool) and not pd.isna(valor)
+
+
+def leer_filas(path):
+    """Itera las filas de la primera hoja del reporte sin cargarla completa en memoria"""
+    if str(path).lower().endswith(".xls"):
+        # openpyxl no lee el formato binario antiguo: se carga con pandas como antes
+        yield from pd.read_excel(path, header=None).itertuples(index=False, name=None)
+        return
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from wb.worksheets[0].iter_rows(values_only=True)
+    finally:
+        # En modo read_only el archivo queda abierto hasta cerrar el libro
+        wb.close()
+
+
+def indexar_reporte(filas, etiquetas=()):
+    """Recorre el reporte una única vez.
+
+    Devuelve un índice {etiqueta: celda de la derecha} con la primera aparición
+    de cada texto y la lista de filas de la sección BEAM METRICS, que termina en
+    el título de una sección conocida (SECCIONES_POSTERIORES) o al final de la
+    hoja. Otro título sólo la termina si no lo siguen filas de métricas: si
+    las siguen, es el encabezado de un haz ("ARC 1"). Las filas vacías dentro
+    de la sección, por ejemplo entre haces, se saltean. Si se indican las
+    etiquetas requeridas, la lectura se corta apenas están todas y la sección
+    terminó.
+    """
+    indice = {}
+    filas_beam = []
+    pendientes = set(etiquetas)
+    en_beam_metrics = beam_completo = False
+    titulo_previo = False  # La última fila no vacía de la sección fue un título desconocido
+    for fila in filas:
+        if en_beam_metrics and not beam_completo:
+            if _fila_vacia(fila):
+                pass
+            elif _es_titulo_seccion(fila):
+                if titulo_previo or fila[0].strip() in SECCIONES_POSTERIORES:
+                    beam_completo = True
+                titulo_previo = True
+            elif titulo_previo and not _es_fila_metrica(fila):
+                beam_completo = True
+            else:
+                titulo_previo = False
+                filas_beam.append(fila)
+        elif len(fila) and str(fila[0]).strip() == SECCION_BEAM_METRICS:
+            en_beam_metrics = True
+
+        # Sólo los textos pueden ser etiquetas; los números se saltan sin convertirlos
+        for j, celda in enumerate(fila):
+            if isinstance(celda, str):
+                etiqueta = celda.strip()
+                if etiqueta not in indice:
+                    indice[etiqueta] = fila[j + 1] if j + 1 < len(fila) else None
+                    pendientes.discard(etiqueta)
+
+        if beam_completo and not pendientes:
+            break
+    return indice, filas_beam
+
+
+def parsear_beam_metrics(filas_beam):
+    """Convierte las filas de BEAM METRICS en arrays por métrica con operaciones por columna"""
+    if not filas_beam:
+        return MetricasHaz()
+    tabla = pd.DataFrame.from_records(filas_beam)
+    if tabla.shape[1] <= COL_VALOR:
+        return MetricasHaz()
+
+    metricas = tabla[COL_METRICA].astype(str).str.strip()
+    valores = pd.to_numeric(tabla[COL_VALOR].astype(str).str.strip().str.replace(',', '.', regex=False),
+                            errors="coerce")
+    validas = valores.notna() & tabla[COL_METRICA].notna()
+    metricas, valores = metricas[validas], valores[validas].to_numpy(dtype=np.float64)
+    return MetricasHaz({m: valores[idx] for m, idx in metricas.groupby(metricas, sort=False).indices.items()})
+
+
+def extraer_datos(path):
+    """Lee el reporte y devuelve el diccionario datos_paciente.
+
+    Además de los textos que se muestran en pantalla, la clave "Haces" guarda
+    las MetricasHaz para poder usar la distribución completa por haz.
+    """
+    with trazas.tramo("reporte.extraer_datos") as t:
+        with closing(leer_filas(path)) as filas:
+            indice, filas_beam = indexar_reporte(filas, ETIQUETAS.values())
+        haces = parsear_beam_metrics(filas_beam)
+        if t:
+            t.anotar(bytes=os.path.getsize(path), filas=len(filas_beam))
+
+    datos = {clave: _como_texto(indice.get(etiqueta)) for clave, etiqueta in ETIQUETAS.items()}
+    datos["MCSmin"] = str(float(haces.mcs.min())) if haces.mcs.size else "-"
+    datos["SASmax"] = str(float(haces.sas.max())) if haces.sas.size else "-"
+    datos["Haces"] = haces
+    return datos
@@ -0,0 +1,297 @@
+"""Servicio HTTP/JSON local que evalúa reportes con las cachés siempre cargadas.
+
+Uso:
+    python -m qads.servicio [--host 127.0.0.1] [--puerto 8765] [-j PROCESOS] [--raiz CARPETA]
+
+Rutas:
+    GET  /salud                       estado, umbrales vigentes y procesos
+    POST /evaluar   (JSON)            {"ruta": "...xlsx", "pediatrico": false, "tecnica": "VMAT", ...}
+    POST /evaluar?nombre=plan.xlsx    el reporte como cuerpo de la petición (subida)
+
+Una ruta sólo se acepta de clientes de la misma máquina o, con --raiz,
+dentro de esa carpeta (relativa a ella); a las otras estaciones no se les
+dice si un archivo fuera de la raíz existe.
+
+La lectura de los reportes se reparte en un pool de procesos acotado; la
+tabla de costos, las reglas y los umbrales quedan en memoria y sólo se
+vuelven a leer si su archivo cambia.
+"""
+import argparse
+import importlib
+import ipaddress
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from qads import decision, evaluacion
+
+PUERTO = 8765
+TAMANO_MAXIMO = 20 * 1024 * 1024  # bytes por reporte subido
+PENDIENTES_POR_PROCESO = 4  # peticiones en espera por proceso antes de responder 503
+EXTENSIONES = (".xlsx", ".xls")
+# Campos del caso que el cliente puede indicar en lugar de los deducidos del reporte
+CAMPOS_CASO = {"tecnica": str, "region": str, "cambios_anatomicos": bool, "pediatrico": bool}
+
+
+class ErrorPeticion(Exception):
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+def _leer_opciones(crudas):
+    """Campos del caso de la petición; los booleanos pueden venir como texto ("si", "false", "1")"""
+    opciones = {}
+    for campo, tipo in CAMPOS_CASO.items():
+        valor = crudas.get(campo)
+        if valor is None:
+            continue
+        if tipo is bool and isinstance(valor, str):
+            valor = valor.strip().lower() in ("1", "si", "true")
+        opciones[campo] = tipo(valor)
+    return opciones
+
+
+def _es_local(direccion):
+    try:
+        ip = ipaddress.ip_address(direccion)
+    except ValueError:
+        return False
+    return ip.is_loopback or bool(getattr(ip, "ipv4_mapped", None) and ip.ipv4_mapped.is_loopback)
+
+
+def _resolver_ruta(ruta, cliente, raiz=None):
+    """Ruta del reporte a leer para `cliente`, o None si ese cliente no puede leerla"""
+    if raiz:
+        raiz = os.path.realpath(raiz)
+        completa = os.path.realpath(os.path.join(raiz, ruta))
+        if os.path.normcase(os.path.commonpath([raiz, completa])) == os.path.normcase(raiz):
+            return completa
+    if _es_local(cliente):
+        return ruta
+    return None
+
+
+def _precalentar(_):
+    # Cada proceso importa el lector (pandas, openpyxl) antes de la primera petición
+    importlib.import_module("qads.cache_reportes")
+    return os.getpid()
+
+
+def _extraer(path, usar_cache):
+    datos = evaluacion.cargar_reporte(path, usar_cache)
+    datos.pop("Haces", None)  # Las métricas por haz no se devuelven: no hace falta copiarlas entre procesos
+    return datos
+
+
+class Evaluador:
+    """Pool de lectura y cachés compartidas por todas las peticiones"""
+
+    def __init__(self, procesos=None, ruta_umbrales="umbrales.txt", usar_cache=True):
+        self.procesos = procesos or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(max_workers=self.procesos)
+        self.cupos = threading.BoundedSemaphore(self.procesos * PENDIENTES_POR_PROCESO)
+        self.ruta_umbrales = ruta_umbrales
+        self.usar_cache = usar_cache
+        self._umbrales = (None, decision.Umbrales())
+        self._candado = threading.Lock()
+
+    def precalentar(self):
+        """Levanta los procesos del pool y carga reglas, costos y umbrales"""
+        from qads import costos
+
+        list(self.pool.map(_precalentar, range(self.procesos)))
+        decision.cargar_reglas()
+        costos.cargar_tabla()
+        self.umbrales()
+
+    def umbrales(self):
+        """Umbrales vigentes; umbrales.txt se relee sólo si cambió su fecha o tamaño"""
+        try:
+            estado = os.stat(self.ruta_umbrales)
+            firma = (estado.st_mtime_ns, estado.st_size)
+        except OSError:
+            firma = None
+        with self._candado:
+            if firma != self._umbrales[0]:
+                self._umbrales = (firma, decision.cargar_umbrales(self.ruta_umbrales))
+            return self._umbrales[1]
+
+    def evaluar(self, path, opciones):
+        """Extrae el reporte en el pool y aplica árbol de decisión y costos con las cachés en memoria"""
+        from qads import costos
+
+        if not self.cupos.acquire(blocking=False):
+            raise ErrorPeticion(HTTPStatus.SERVICE_UNAVAILABLE, "El servicio está ocupado, reintente en unos segundos")
+        try:
+            datos = self.pool.submit(_extraer, path, self.usar_cache).result()
+        finally:
+            self.cupos.release()
+
+        caso = evaluacion.CasoQA.desde_reporte(datos)
+        for campo, valor in _leer_opciones(opciones).items():
+            setattr(caso, campo, valor)
+        if caso.tecnica not in decision.TECNICAS:
+            raise ErrorPeticion(HTTPStatus.BAD_REQUEST, f"Técnica desconocida: {caso.tecnica!r}")
+
+        umbrales = self.umbrales()
+        reglas = decision.cargar_reglas()
+        tabla = costos.cargar_tabla()
+        complejo = caso.es_complejo(umbrales)
+        paquete = caso.paquete(umbrales, reglas)
+        avisos = []
+        respuesta = {
+            "datos": datos,
+            "tecnica": caso.tecnica,
+            "region": caso.region,
+            "ca_ped": caso.ca_ped,
+            "complejo": complejo,
+            "criterios": caso.condiciones(umbrales) if caso.tecnica in ["IMRT", "VMAT"] else {},
+            "paquete_qa": paquete,
+            "costo": self._costo(tabla, paquete, avisos),
+            "segundo_intento": None,
+        }
+        # Qué correspondería si el primer control falla
+        paquete_2 = reglas.paquete(caso.tecnica, complejo, caso.ca_ped, caso.intento + 1)
+        if paquete_2 != decision.SIN_PAQUETE:
+            respuesta["segundo_intento"] = {"paquete_qa": paquete_2,
+                                            "costo": self._costo(tabla, paquete_2, avisos)}
+        if avisos:
+            respuesta["avisos"] = list(dict.fromkeys(avisos))
+        return respuesta
+
+    @staticmethod
+    def _costo(tabla, paquete, avisos):
+        """Costo del paquete, o None (con el motivo en `avisos`) si falta algún precio"""
+        from qads import costos
+
+        try:
+            return tabla.costo_paquete(paquete)
+        except costos.PrecioFaltante as e:
+            avisos.append(str(e))
+            return None
+
+    def cerrar(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+class Manejador(BaseHTTPRequestHandler):
+    server_version = "QADS/1.0"
+
+    @property
+    def evaluador(self):
+        return self.server.evaluador
+
+    def do_GET(self):
+        if urlparse(self.path).path != "/salud":
+            return self._responder(HTTPStatus.NOT_FOUND, {"error": "Ruta desconocida"})
+        self._responder(HTTPStatus.OK, {"estado": "ok", "procesos": self.evaluador.procesos,
+                                        "umbrales": vars(self.evaluador.umbrales())})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/evaluar":
+            return self._responder(HTTPStatus.NOT_FOUND, {"error": "Ruta desconocida"})
+        inicio = time.perf_counter()
+        try:
+            respuesta = self._evaluar(url)
+        except ErrorPeticion as e:
+            return self._responder(e.estado, {"error": str(e)})
+        except Exception as e:
+            return self._responder(HTTPStatus.UNPROCESSABLE_ENTITY, {"error": f"No se pudo evaluar el reporte: {e}"})
+        respuesta["ms"] = round((time.perf_counter() - inicio) * 1000, 1)
+        self._responder(HTTPStatus.OK, respuesta)
+
+    def _evaluar(self, url):
+        largo = int(self.headers.get("Content-Length") or 0)
+        if largo > TAMANO_MAXIMO:
+            raise ErrorPeticion(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "El reporte supera el tamaño máximo")
+        cuerpo = self.rfile.read(largo)
+        consulta = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        if self.headers.get_content_type() == "application/json":
+            try:
+                opciones = json.loads(cuerpo or b"{}")
+            except ValueError:
+                raise ErrorPeticion(HTTPStatus.BAD_REQUEST, "El cuerpo no es JSON válido")
+            if not isinstance(opciones, dict):
+                raise ErrorPeticion(HTTPStatus.BAD_REQUEST, "El cuerpo JSON tiene que ser un objeto")
+            ruta = opciones.get("ruta")
+            if not isinstance(ruta, str) or not ruta.lower().endswith(EXTENSIONES):
+                raise ErrorPeticion(HTTPStatus.BAD_REQUEST, "Indique la ruta de un reporte .xlsx/.xls")
+            # Fuera de lo permitido se rechaza antes de mirar el disco: no se revela qué archivos existen
+            ruta = _resolver_ruta(ruta, self.client_address[0], self.server.raiz)
+            if ruta is None:
+                raise ErrorPeticion(HTTPStatus.FORBIDDEN, "Desde otra estación sólo se pueden leer reportes "
+                                                          "dentro de la carpeta raíz del servicio; suba el archivo")
+            if not os.path.isfile(ruta):
+                raise ErrorPeticion(HTTPStatus.NOT_FOUND, f"No existe el reporte: {ruta}")
+            return self.evaluador.evaluar(ruta, opciones)
+
+        # Subida: el cuerpo es el archivo; las opciones van en la URL (?pediatrico=1&tecnica=VMAT)
+        if not cuerpo:
+            raise ErrorPeticion(HTTPStatus.BAD_REQUEST, "La petición no trae ningún reporte")
+        opciones = _leer_opciones(consulta)
+        sufijo = ".xls" if consulta.get("nombre", "").lower().endswith(".xls") else ".xlsx"
+        fd, tmp = tempfile.mkstemp(suffix=sufijo, prefix="qads_")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(cuerpo)
+            respuesta = self.evaluador.evaluar(tmp, opciones)
+        finally:
+            os.remove(tmp)
+        respuesta["archivo"] = consulta.get("nombre")
+        return respuesta
+
+    def _responder(self, estado, cuerpo):
+        datos = json.dumps(cuerpo, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(estado)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+
+def crear_servidor(host="127.0.0.1", puerto=PUERTO, evaluador=None, raiz=None):
+    servidor = ThreadingHTTPServer((host, puerto), Manejador)
+    servidor.daemon_threads = True
+    servidor.evaluador = evaluador or Evaluador()
+    servidor.raiz = raiz
+    return servidor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servicio HTTP local de evaluación de reportes.")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="Interfaz donde escuchar (0.0.0.0 para aceptar otras estaciones de la red)")
+    parser.add_argument("--puerto", type=int, default=PUERTO)
+    parser.add_argument("-j", "--procesos", type=int, default=None, help="Procesos de lectura (por defecto, uno por CPU)")
+    parser.add_argument("--umbrales", default="umbrales.txt", help="Archivo de umbrales a usar")
+    parser.add_argument("--sin-cache", action="store_true", help="No usar la caché de reportes en disco")
+    parser.add_argument("--raiz", default=None,
+                        help="Carpeta de reportes que también pueden pedir por ruta las otras estaciones")
+    args = parser.parse_args(argv)
+
+    evaluador = Evaluador(args.procesos, args.umbrales, not args.sin_cache)
+    evaluador.precalentar()
+    servidor = crear_servidor(args.host, args.puerto, evaluador, args.raiz)
+    print(f"QADS escuchando en http://{args.host}:{args.puerto} con {evaluador.procesos} procesos")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        evaluador.cerrar()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
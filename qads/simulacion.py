@@ -0,0 +1,228 @@
+"""Simulación "qué pasaría si" de otros umbrales de complejidad sobre el Registro Histórico.
+
+Uso:
+    python -m qads.simulacion [--registro RUTA] [--mcs 0.6 --sas 0.4 ...]
+    python -m qads.simulacion --barrer mcs=0.3:0.7:0.05 --barrer fractions=1:10:1 -o barrido.csv
+"""
+import argparse
+import os
+import sys
+from dataclasses import asdict, fields, replace
+
+import numpy as np
+import pandas as pd
+
+from qads import archivo, costos, decision
+
+# Campo de Umbrales -> (columna del historial, valor si falta, True si el plan es complejo por debajo del umbral)
+CRITERIOS = {
+    "mcs_min": ("MCSmin", 1.0, True),
+    "sas_max": ("SASmax", 0.0, False),
+    "fractions": ("Fractions", 1, False),
+    "mcs": ("MCS", 1.0, True),
+    "sas": ("SAS", 0.0, False),
+    "pmu": ("PMU", 0.0, False),
+}
+# Columna SQL del registro -> clave de datos_paciente
+COLUMNAS_HISTORIAL = {
+    "id_paciente": "ID", "fecha": "Fecha", "tecnica": "Tecnica", "ca_ped": "CA",
+    "mcs_min": "MCSmin", "sas_max": "SASmax", "fracciones": "Fractions",
+    "mcs_prom": "MCS", "sas_prom": "SAS", "pmu": "PMU",
+    "resultado_1": "Resultado 1", "resultado_2": "Resultado 2",
+}
+# Límite de celdas (combinaciones x planes) por bloque al barrer una grilla
+CELDAS_POR_BLOQUE = 4_000_000
+MAX_LISTADO = 50
+
+
+def leer_ruta_registro(archivo_config="config_ruta.txt"):
+    if os.path.exists(archivo_config):
+        with open(archivo_config, "r") as f:
+            return f.read().strip() or None
+    return None
+
+
+def cargar_historial(ruta_informe, desde=None, antes=None):
+    """Registro Histórico (incluido el archivo) con las columnas nombradas como en datos_paciente"""
+    df = archivo.leer(ruta_informe, list(COLUMNAS_HISTORIAL), desde, antes)
+    return df.rename(columns=COLUMNAS_HISTORIAL)
+
+
+def _precios(paquetes, tabla_costos):
+    """Costo de cada paquete, consultando la tabla una vez por paquete distinto.
+
+    Los planes sin paquete (SIN_PAQUETE: técnica desconocida o sin segundo
+    intento) cuestan 0; la tabla de costos no tiene precio para ellos.
+    """
+    paquetes = np.asarray(paquetes, dtype=object)
+    resultado = np.zeros(len(paquetes), dtype=np.float64)
+    con_paquete = paquetes != decision.SIN_PAQUETE
+    if con_paquete.any():
+        unicos, inversa = np.unique(paquetes[con_paquete].astype(str), return_inverse=True)
+        precios = np.array([tabla_costos.costo_paquete(p) for p in unicos], dtype=np.float64)
+        resultado[con_paquete] = precios[inversa]
+    return resultado
+
+
+class Historial:
+    """Historial preparado una sola vez para evaluar muchos juegos de umbrales.
+
+    Los criterios quedan como arrays float y, para cada plan, se calcula de
+    antemano el paquete y el costo que tendría clasificado como simple y como
+    complejo. Evaluar umbrales se reduce a comparar arrays y elegir costos.
+    El costo incluye el segundo intento cuando el primero falló y las reglas
+    lo prevén. Los planes exportados antes de guardar MCS/SAS promedio, PMU y
+    fracciones usan los mismos valores por defecto que es_plan_complejo.
+    """
+
+    def __init__(self, df, reglas=None, tabla_costos=None):
+        reglas = reglas or decision.cargar_reglas()
+        tabla_costos = tabla_costos or costos.cargar_tabla()
+        self.df = df.reset_index(drop=True)
+        self.n = len(self.df)
+
+        self.valores = {}
+        for campo, (columna, default, _) in CRITERIOS.items():
+            if columna in self.df:
+                valores = decision.limpiar_columna(self.df[columna], default)
+            else:
+                valores = np.full(self.n, default, dtype=np.float64)
+            self.valores[campo] = np.trunc(valores) if campo == "fractions" else valores
+
+        tecnica = self.df["Tecnica"].astype(str)
+        self.puede_ser_complejo = tecnica.isin(["IMRT", "VMAT"]).to_numpy()
+        ca_ped = self.df["CA"].fillna(False).astype(bool) if "CA" in self.df else False
+        resultado_1 = self.df["Resultado 1"] if "Resultado 1" in self.df else pd.Series("", index=self.df.index)
+        self.fallo_1 = (resultado_1 == "No Exitoso").to_numpy()
+
+        self.paquete, self.costo = {}, {}
+        for complejo in (False, True):
+            claves = pd.DataFrame({"tecnica": tecnica, "complejo": complejo, "ca_ped": ca_ped, "intento": 1})
+            paquete_1 = reglas.buscar(claves)
+            paquete_2 = np.where(self.fallo_1, reglas.buscar(claves.assign(intento=2)), decision.SIN_PAQUETE)
+            self.paquete[complejo] = paquete_1
+            self.costo[complejo] = _precios(paquete_1, tabla_costos) + _precios(paquete_2, tabla_costos)
+
+    @classmethod
+    def desde_registro(cls, ruta_informe, desde=None, antes=None, **kwargs):
+        return cls(cargar_historial(ruta_informe, desde, antes), **kwargs)
+
+    def complejos(self, umbrales):
+        """es_plan_complejo para todos los planes del historial"""
+        mascara = np.zeros(self.n, dtype=bool)
+        for campo, (_, _, menor) in CRITERIOS.items():
+            umbral = getattr(umbrales, campo)
+            mascara |= self.valores[campo] < umbral if menor else self.valores[campo] > umbral
+        return mascara & self.puede_ser_complejo
+
+    def complejos_grilla(self, grilla):
+        """Matriz (combinaciones x planes) de complejidad; grilla es un DataFrame con los campos de Umbrales"""
+        mascara = np.zeros((len(grilla), self.n), dtype=bool)
+        for campo, (_, _, menor) in CRITERIOS.items():
+            umbrales = grilla[campo].to_numpy(dtype=np.float64)[:, None]
+            valores = self.valores[campo][None, :]
+            mascara |= valores < umbrales if menor else valores > umbrales
+        return mascara & self.puede_ser_complejo
+
+    def costo_total(self, complejos):
+        return float(np.where(complejos, self.costo[True], self.costo[False]).sum())
+
+    def simular(self, candidatos, actuales):
+        """Compara la clasificación con los umbrales candidatos frente a los actuales"""
+        antes, despues = self.complejos(actuales), self.complejos(candidatos)
+        paquetes = np.where(despues, self.paquete[True], self.paquete[False])
+        cambios = antes != despues
+        reclasificados = self.df.loc[cambios, [c for c in ("Fecha", "ID", "Tecnica") if c in self.df]].copy()
+        reclasificados["Ahora"] = np.where(despues[cambios], "Complejo", "Simple")
+        return {
+            "planes": self.n,
+            "complejos_antes": int(antes.sum()),
+            "complejos_despues": int(despues.sum()),
+            "a_complejo": int((despues & ~antes).sum()),
+            "a_simple": int((antes & ~despues).sum()),
+            "costo_antes": round(self.costo_total(antes), 2),
+            "costo_despues": round(self.costo_total(despues), 2),
+            "paquetes": pd.Series(paquetes).value_counts(),
+            "reclasificados": reclasificados,
+        }
+
+    def barrer(self, grilla, actuales):
+        """Evalúa todas las combinaciones de la grilla, por bloques para acotar la memoria"""
+        antes = self.complejos(actuales)
+        delta = self.costo[True] - self.costo[False]
+        base = self.costo[False].sum()
+        bloque = max(1, CELDAS_POR_BLOQUE // max(self.n, 1))
+        partes = []
+        for inicio in range(0, len(grilla), bloque):
+            sub = grilla.iloc[inicio:inicio + bloque]
+            complejos = self.complejos_grilla(sub)
+            partes.append(pd.DataFrame({
+                "complejos": complejos.sum(axis=1),
+                "reclasificados": (complejos != antes).sum(axis=1),
+                "costo_total": base + complejos.astype(np.float64) @ delta,
+            }, index=sub.index))
+        return pd.concat([grilla, pd.concat(partes)], axis=1) if partes else grilla.assign(
+            complejos=0, reclasificados=0, costo_total=base)
+
+
+def grilla_desde_rangos(rangos, base):
+    """Producto cartesiano de rangos {campo: valores}; los demás campos quedan como en `base`"""
+    ejes = {campo: [valor] for campo, valor in asdict(base).items()}
+    ejes.update({campo: list(valores) for campo, valores in rangos.items()})
+    indice = pd.MultiIndex.from_product(list(ejes.values()), names=list(ejes))
+    return indice.to_frame(index=False)
+
+
+def _rango(texto):
+    """"mcs=0.3:0.7:0.05" -> ("mcs", array([0.3, 0.35, ... 0.7]))"""
+    campo, _, valores = texto.partition("=")
+    inicio, fin, paso = (float(v) for v in valores.split(":"))
+    return campo.strip(), np.round(np.arange(inicio, fin + paso / 2, paso), 10)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simula otros umbrales de complejidad sobre el Registro Histórico.")
+    parser.add_argument("--registro", default=None, help="Excel del registro (por defecto, el de config_ruta.txt)")
+    parser.add_argument("--umbrales", default="umbrales.txt", help="Umbrales actuales")
+    parser.add_argument("--desde", default=None, help="Sólo planes exportados desde esta fecha (AAAA-MM-DD)")
+    parser.add_argument("--antes", default=None, help="Sólo planes exportados antes de esta fecha (AAAA-MM-DD)")
+    for campo in fields(decision.Umbrales):
+        parser.add_argument(f"--{campo.name.replace('_', '-')}", dest=campo.name, type=float, default=None,
+                            help=f"Umbral candidato para {campo.name}")
+    parser.add_argument("--barrer", action="append", type=_rango, default=[],
+                        help="Rango campo=inicio:fin:paso a barrer (se puede repetir)")
+    parser.add_argument("-o", "--salida", default=None, help="CSV con el resultado del barrido")
+    args = parser.parse_args(argv)
+
+    ruta = args.registro or leer_ruta_registro()
+    if not ruta:
+        print("No hay un registro configurado.", file=sys.stderr)
+        return 1
+
+    actuales = decision.cargar_umbrales(args.umbrales)
+    candidatos = replace(actuales, **{c.name: getattr(args, c.name) for c in fields(decision.Umbrales)
+                                      if getattr(args, c.name) is not None})
+    historial = Historial.desde_registro(ruta, args.desde, args.antes)
+
+    if args.barrer:
+        resultado = historial.barrer(grilla_desde_rangos(dict(args.barrer), candidatos), actuales)
+        if args.salida:
+            resultado.to_csv(args.salida, index=False)
+        print(resultado.sort_values("costo_total").head(20).to_string(index=False))
+        return 0
+
+    r = historial.simular(candidatos, actuales)
+    print(f"Planes en el historial: {r['planes']}")
+    print(f"Complejos: {r['complejos_antes']} -> {r['complejos_despues']} "
+          f"(+{r['a_complejo']} pasan a complejo, -{r['a_simple']} pasan a simple)")
+    print(f"Costo total: ${r['costo_antes']:.2f} -> ${r['costo_despues']:.2f}")
+    print("\nPaquetes del primer intento:")
+    print(r["paquetes"].to_string())
+    if len(r["reclasificados"]):
+        print(f"\nPlanes reclasificados (primeros {MAX_LISTADO}):")
+        print(r["reclasificados"].head(MAX_LISTADO).to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
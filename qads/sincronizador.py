@@ -0,0 +1,82 @@
+"""Escritura diferida del Excel del registro: varias exportaciones, una sola escritura del libro.
+
+Cada exportación queda enseguida en el diario y en la base (ver
+evaluacion.exportar). El Excel, que es lo caro de escribir, se actualiza
+cuando se juntan CANTIDAD filas, cuando pasan INACTIVIDAD segundos sin
+exportar, cuando la fila más vieja lleva DEMORA segundos esperando o al
+cerrar la aplicación. Mientras tanto las filas figuran como pendientes en
+la base, y cualquier escritura del Excel (de esta u otra estación) también
+las incluye.
+"""
+import threading
+import time
+
+CANTIDAD = 10  # filas que disparan la escritura
+INACTIVIDAD = 30.0  # segundos sin exportar tras los que se escribe lo que haya
+DEMORA = 300.0  # segundos como máximo que una fila espera para llegar al Excel
+# Después de una escritura fallida se espera REINTENTO segundos, el doble tras cada nueva falla
+REINTENTO = 30.0
+REINTENTO_MAXIMO = 600.0
+
+
+class Sincronizador:
+    def __init__(self, cantidad=CANTIDAD, inactividad=INACTIVIDAD, demora=DEMORA):
+        self.cantidad = cantidad
+        self.inactividad = inactividad
+        self.demora = demora
+        # ruta del registro -> [filas, cuándo llegó la primera, cuándo llegó la última]
+        self._pendientes = {}
+        # ruta del registro -> (fallas seguidas, no reintentar antes de)
+        self._fallas = {}
+        self._candado = threading.Lock()
+
+    def anotar(self, ruta, filas=1, ahora=None):
+        """Registra que `ruta` tiene filas nuevas en la base que todavía no están en el Excel"""
+        ahora = time.monotonic() if ahora is None else ahora
+        with self._candado:
+            pendiente = self._pendientes.setdefault(ruta, [0, ahora, ahora])
+            pendiente[0] += filas
+            pendiente[2] = ahora
+
+    def hay_pendientes(self):
+        with self._candado:
+            return bool(self._pendientes)
+
+    def listas(self, ahora=None):
+        """Registros cuyo Excel ya corresponde escribir (sin contar los que esperan para reintentar)"""
+        ahora = time.monotonic() if ahora is None else ahora
+        with self._candado:
+            return [ruta for ruta, (filas, primera, ultima) in self._pendientes.items()
+                    if ahora >= self._fallas.get(ruta, (0, 0))[1]
+                    and (filas >= self.cantidad or ahora - ultima >= self.inactividad or ahora - primera >= self.demora)]
+
+    def volcar(self, rutas=None):
+        """Escribe el Excel de `rutas` (todas las pendientes si es None); devuelve {ruta: error}.
+
+        Si la escritura falla (el Excel abierto en otra estación, la red caída)
+        la ruta vuelve a quedar pendiente y `listas` no la devuelve hasta que
+        pase el tiempo de espera, que se duplica con cada falla seguida.
+        """
+        from qads import registro
+        from qads.almacen import abrir_almacen
+
+        with self._candado:
+            rutas = list(self._pendientes if rutas is None else rutas)
+            tomadas = {ruta: self._pendientes.pop(ruta) for ruta in rutas if ruta in self._pendientes}
+        errores = {}
+        for ruta, (filas, primera, _) in tomadas.items():
+            try:
+                registro.sincronizar_excel(abrir_almacen(ruta), ruta)
+            except Exception as e:
+                errores[ruta] = str(e)
+                ahora = time.monotonic()
+                with self._candado:
+                    pendiente = self._pendientes.setdefault(ruta, [0, primera, ahora])
+                    pendiente[0] += filas
+                    pendiente[1] = min(pendiente[1], primera)
+                    fallas = self._fallas.get(ruta, (0, 0))[0] + 1
+                    self._fallas[ruta] = (fallas, ahora + min(REINTENTO * 2 ** (fallas - 1), REINTENTO_MAXIMO))
+            else:
+                with self._candado:
+                    self._fallas.pop(ruta, None)
+        return errores
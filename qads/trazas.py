@@ -0,0 +1,206 @@
+"""Medición de tiempos por etapa (lectura del reporte, registro, formato, costos) en un JSONL.
+
+Está apagada por defecto. Se enciende con la variable de entorno QADS_TRAZAS,
+que indica el archivo de trazas ("1" usa trazas_qads.jsonl). Apagada, cada
+tramo cuesta una llamada a función y nada más.
+
+Resumen de un archivo de trazas:
+    python -m qads.trazas [trazas_qads.jsonl ...]
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+VARIABLE_ENTORNO = "QADS_TRAZAS"
+RUTA_TRAZAS = "trazas_qads.jsonl"
+TAMANO_MAXIMO = 5 * 1024 * 1024  # bytes por archivo antes de rotar
+COPIAS = 3  # trazas_qads.jsonl.1 ... .3
+REINTENTOS = 5  # para renombrar un archivo que otro proceso tiene abierto (Windows)
+VENCIMIENTO_BLOQUEO = 30.0  # rotar tarda milisegundos: un bloqueo más viejo quedó abandonado
+
+_ruta = None
+_candado = threading.Lock()
+
+
+class _TramoInactivo:
+    """Tramo que no mide nada; es falso en un if para saltear datos caros de calcular"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __bool__(self):
+        return False
+
+    def anotar(self, **datos):
+        pass
+
+
+_INACTIVO = _TramoInactivo()
+
+
+class _Tramo:
+    def __init__(self, etapa, datos):
+        self.etapa = etapa
+        self.datos = datos
+
+    def __enter__(self):
+        self.fecha = datetime.now()
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, valor, tb):
+        duracion = time.perf_counter() - self.inicio
+        registro = {"etapa": self.etapa, "ms": round(duracion * 1000, 3),
+                    "inicio": self.fecha.isoformat(timespec="milliseconds"), "pid": os.getpid(),
+                    **self.datos}
+        if tipo is not None:
+            registro["error"] = tipo.__name__
+        _escribir(registro)
+        return False
+
+    def anotar(self, **datos):
+        """Agrega datos al tramo (filas, bytes...) que se guardan junto con su duración"""
+        self.datos.update(datos)
+
+
+def activar(ruta=RUTA_TRAZAS):
+    """Enciende las trazas hacia `ruta`; con None las apaga"""
+    global _ruta
+    _ruta = os.path.abspath(ruta) if ruta else None
+
+
+def activo():
+    return _ruta is not None
+
+
+def tramo(etapa, **datos):
+    """Context manager que mide la etapa:
+
+        with trazas.tramo("registro.agregar_filas", filas=len(filas)) as t:
+            ...
+            if t: t.anotar(bytes=os.path.getsize(ruta))
+    """
+    if _ruta is None:
+        return _INACTIVO
+    return _Tramo(etapa, datos)
+
+
+def _reemplazar(origen, destino):
+    """os.replace que reintenta si otro proceso tiene el archivo abierto; False si `origen` no existe"""
+    for intento in range(REINTENTOS):
+        try:
+            os.replace(origen, destino)
+            return True
+        except FileNotFoundError:
+            return False
+        except PermissionError:
+            if intento == REINTENTOS - 1:
+                raise
+            time.sleep(0.01 * (intento + 1))
+
+
+def _rotar(ruta):
+    """Pasa el archivo a .1 y corre las copias anteriores.
+
+    Varios procesos pueden ver el archivo lleno a la vez: rota sólo el que
+    toma el bloqueo, y vuelve a mirar el tamaño por si otro acaba de rotarlo.
+    Los demás siguen de largo y escriben en el archivo que haya.
+    """
+    from qads import bloqueo
+
+    try:
+        with bloqueo.Bloqueo(bloqueo.ruta_bloqueo(ruta), espera=0, vencimiento=VENCIMIENTO_BLOQUEO, margen_reloj=0):
+            if not os.path.exists(ruta) or os.path.getsize(ruta) < TAMANO_MAXIMO:
+                return
+            for i in range(COPIAS - 1, 0, -1):
+                _reemplazar(f"{ruta}.{i}", f"{ruta}.{i + 1}")
+            _reemplazar(ruta, f"{ruta}.1")
+    except bloqueo.BloqueoOcupado:
+        pass
+
+
+def _escribir(registro):
+    linea = json.dumps(registro, ensure_ascii=False, default=str) + "\n"
+    with _candado:
+        try:
+            if os.path.exists(_ruta) and os.path.getsize(_ruta) >= TAMANO_MAXIMO:
+                _rotar(_ruta)
+        except OSError:
+            pass  # Se reintenta con la próxima línea; ésta se escribe igual
+        try:
+            # Una sola escritura en modo append: las líneas de varios procesos no se mezclan
+            with open(_ruta, "a", encoding="utf-8") as f:
+                f.write(linea)
+        except OSError:
+            pass  # Medir nunca debe interrumpir el trabajo
+
+
+def leer(rutas):
+    """Registros de uno o más archivos de trazas, salteando líneas dañadas"""
+    registros = []
+    for ruta in rutas:
+        with open(ruta, encoding="utf-8") as f:
+            for linea in f:
+                try:
+                    registros.append(json.loads(linea))
+                except ValueError:
+                    continue
+    return registros
+
+
+def resumir(registros):
+    """Tabla por etapa con cantidad, p50, p95, máximo y total en milisegundos"""
+    import pandas as pd
+
+    df = pd.DataFrame(registros)
+    if df.empty:
+        return df
+    tiempos = df.groupby("etapa")["ms"]
+    tabla = pd.DataFrame({
+        "n": tiempos.size(),
+        "p50_ms": tiempos.quantile(0.5),
+        "p95_ms": tiempos.quantile(0.95),
+        "max_ms": tiempos.max(),
+        "total_ms": tiempos.sum(),
+    })
+    # Promedios de los datos numéricos anotados (filas, bytes...) para dar contexto
+    for columna in ("filas", "bytes"):
+        if columna in df:
+            tabla[f"{columna}_prom"] = pd.to_numeric(df[columna], errors="coerce").groupby(df["etapa"]).mean()
+    if "error" in df:
+        tabla["errores"] = df["error"].notna().groupby(df["etapa"]).sum()
+    return tabla.sort_values("total_ms", ascending=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resume los tiempos por etapa de un archivo de trazas.")
+    parser.add_argument("rutas", nargs="*", help=f"Archivos de trazas (por defecto {RUTA_TRAZAS} y sus copias rotadas)")
+    args = parser.parse_args(argv)
+
+    rutas = args.rutas or sorted(r for r in glob.glob(RUTA_TRAZAS + "*") if not r.endswith(".lock"))
+    rutas = [r for r in rutas if os.path.exists(r)]
+    if not rutas:
+        print("No hay archivos de trazas.", file=sys.stderr)
+        return 1
+    tabla = resumir(leer(rutas))
+    if tabla.empty:
+        print("Los archivos de trazas están vacíos.", file=sys.stderr)
+        return 1
+    print(tabla.to_string(float_format=lambda v: f"{v:.1f}"))
+    return 0
+
+
+_valor = os.environ.get(VARIABLE_ENTORNO, "").strip()
+if _valor and _valor != "0":
+    activar(RUTA_TRAZAS if _valor == "1" else _valor)
+
+if __name__ == "__main__":
+    sys.exit(main())
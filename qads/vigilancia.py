@@ -0,0 +1,133 @@
+"""Vigila la carpeta donde el sistema de planificación deja los reportes y los evalúa apenas llegan.
+
+Uso:
+    python -m qads.vigilancia CARPETA [--espera 2] [--intervalo 1] [-j PROCESOS]
+
+Cada reporte nuevo o modificado se lee cuando deja de cambiar durante
+`espera` segundos (el sistema de planificación puede estar escribiéndolo
+todavía). La lectura deja el resultado en la caché de reportes, así al
+abrir el paciente en la interfaz no hay que volver a leerlo. La interfaz
+calcula el paquete recomendado a partir de esos datos con los umbrales
+vigentes al abrirlo; acá la evaluación sólo se muestra en la consola.
+Debe ejecutarse desde la carpeta de la aplicación para compartir con la
+interfaz la caché de reportes y los umbrales.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from qads import decision, lote
+
+ESPERA = 2.0  # segundos sin cambios antes de leer un reporte
+INTERVALO = 1.0  # segundos entre revisiones de la carpeta
+
+
+class Vigilante:
+    """Revisa la carpeta por encuestas (os.scandir) y evalúa los reportes que quedaron estables"""
+
+    def __init__(self, carpeta, al_estabilizarse, espera=ESPERA):
+        self.carpeta = carpeta
+        self.al_estabilizarse = al_estabilizarse
+        self.espera = espera
+        # ruta -> [firma, desde cuándo no cambia, firma ya evaluada]
+        self.estado = {}
+
+    def _firmas(self):
+        firmas = {}
+        for e in os.scandir(self.carpeta):
+            # Se ignoran los temporales "~$..." que deja Excel con el archivo abierto
+            if not e.is_file() or not e.name.lower().endswith(lote.EXTENSIONES) or e.name.startswith("~$"):
+                continue
+            try:
+                estado = e.stat()
+            except OSError:
+                continue  # Se borró mientras se recorría la carpeta
+            firmas[os.path.abspath(e.path)] = (estado.st_mtime_ns, estado.st_size)
+        return firmas
+
+    def revisar(self, ahora=None):
+        """Una pasada: devuelve los reportes nuevos o cambiados que ya no se están escribiendo.
+
+        Un reporte que falla no se vuelve a intentar hasta que cambie, y no
+        impide procesar los demás.
+        """
+        ahora = time.monotonic() if ahora is None else ahora
+        firmas = self._firmas()
+        for ruta in set(self.estado) - set(firmas):
+            del self.estado[ruta]
+
+        listos = []
+        for ruta, firma in firmas.items():
+            actual = self.estado.get(ruta)
+            if actual is None or actual[0] != firma:
+                evaluada = actual[2] if actual else None
+                self.estado[ruta] = [firma, ahora, evaluada]
+            elif firma != actual[2] and ahora - actual[1] >= self.espera and firma[1] > 0:
+                actual[2] = firma
+                listos.append(ruta)
+        listos.sort()
+        for ruta in listos:
+            try:
+                self.al_estabilizarse(ruta)
+            except Exception as e:
+                print(f"No se pudo evaluar {ruta}: {e}", file=sys.stderr)
+        return listos
+
+    def correr(self, detener, intervalo=INTERVALO):
+        while not detener.is_set():
+            try:
+                self.revisar()
+            except OSError as e:
+                # La carpeta compartida puede desconectarse un momento; se reintenta en la próxima pasada
+                print(f"No se pudo revisar {self.carpeta}: {e}", file=sys.stderr)
+            detener.wait(intervalo)
+
+
+def mostrar(futuro):
+    try:
+        fila = futuro.result()
+    except Exception as e:
+        # Por ejemplo, un proceso del pool que terminó de forma abrupta
+        print(f"Falló la lectura: {e}", file=sys.stderr)
+        return
+    estado = f"error: {fila['Error']}" if "Error" in fila else fila.get("QA Intento 1", "-")
+    print(f"{fila['Archivo']}: {estado}")
+
+
+def vigilar(carpeta, procesos=None, espera=ESPERA, intervalo=INTERVALO, ruta_umbrales="umbrales.txt", detener=None):
+    """Vigila `carpeta` hasta que se active `detener`, leyendo los reportes en un pool de procesos"""
+    detener = detener or threading.Event()
+
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        def evaluar(ruta):
+            # Los umbrales se releen en cada reporte: si se cambian desde la interfaz, rigen enseguida
+            pool.submit(lote.evaluar_reporte, ruta, decision.cargar_umbrales(ruta_umbrales)).add_done_callback(mostrar)
+
+        Vigilante(carpeta, evaluar, espera).correr(detener, intervalo)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evalúa los reportes a medida que aparecen en una carpeta.")
+    parser.add_argument("carpeta", help="Carpeta donde el sistema de planificación exporta los reportes")
+    parser.add_argument("--espera", type=float, default=ESPERA, help="Segundos sin cambios antes de leer un reporte")
+    parser.add_argument("--intervalo", type=float, default=INTERVALO, help="Segundos entre revisiones de la carpeta")
+    parser.add_argument("-j", "--procesos", type=int, default=None, help="Procesos de lectura (por defecto, uno por CPU)")
+    parser.add_argument("--umbrales", default="umbrales.txt", help="Archivo de umbrales a usar")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.carpeta):
+        print(f"No existe la carpeta {args.carpeta}", file=sys.stderr)
+        return 1
+    print(f"Vigilando {args.carpeta} (Ctrl+C para terminar)")
+    try:
+        vigilar(args.carpeta, args.procesos, args.espera, args.intervalo, args.umbrales)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,13 @@
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+
+@pytest.fixture(autouse=True)
+def en_raiz(monkeypatch):
+    """qads busca reglas_qa.csv y costos.xlsx en la carpeta de trabajo"""
+    monkeypatch.chdir(RAIZ)
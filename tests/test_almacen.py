@@ -0,0 +1,78 @@
+import multiprocessing
+import os
+import threading
+import time
+
+import pandas as pd
+
+from qads import bloqueo, evaluacion
+from qads.almacen import AlmacenRegistro, abrir_almacen, ruta_base_para
+
+FILA = {"Fecha": "18/10/2026", "ID": "123", "Paciente": "X", "Plan": "P1", "Técnica RT": "VMAT"}
+
+
+def agregar_filas(ruta_db, estacion, cantidad):
+    almacen = AlmacenRegistro(ruta_db)
+    for i in range(cantidad):
+        almacen.agregar([dict(FILA, ID=f"{estacion}-{i}")], uids=[f"{estacion}-{i}"])
+
+
+def test_la_escritura_espera_el_bloqueo_de_la_base(tmp_path):
+    ruta_db = str(tmp_path / "registro.sqlite")
+    almacen = AlmacenRegistro(ruta_db)
+    with bloqueo.Bloqueo(bloqueo.ruta_bloqueo(ruta_db)):
+        hilo = threading.Thread(target=almacen.agregar, args=([FILA],))
+        hilo.start()
+        time.sleep(0.5)
+        assert hilo.is_alive()
+        # Leer no necesita el bloqueo
+        assert almacen.cantidad() == 0
+    hilo.join(5)
+    assert almacen.cantidad() == 1
+    assert not os.path.exists(bloqueo.ruta_bloqueo(ruta_db))
+
+
+def test_abrir_una_base_al_dia_no_toma_el_bloqueo(tmp_path):
+    ruta_db = str(tmp_path / "registro.sqlite")
+    AlmacenRegistro(ruta_db)
+    with bloqueo.Bloqueo(bloqueo.ruta_bloqueo(ruta_db), espera=0):
+        AlmacenRegistro(ruta_db).cantidad()
+
+
+def test_varias_estaciones_agregan_sin_perder_filas(tmp_path):
+    ruta_db = str(tmp_path / "registro.sqlite")
+    AlmacenRegistro(ruta_db)
+    estaciones = [multiprocessing.Process(target=agregar_filas, args=(ruta_db, e, 20)) for e in range(4)]
+    for p in estaciones:
+        p.start()
+    for p in estaciones:
+        p.join(60)
+        assert p.exitcode == 0
+    assert AlmacenRegistro(ruta_db).cantidad() == 80
+
+
+def test_buscar_paciente(tmp_path):
+    almacen = AlmacenRegistro(str(tmp_path / "registro.sqlite"))
+    almacen.agregar([FILA, dict(FILA, Plan="P2"), dict(FILA, ID="999"), dict(FILA, ID="-")])
+    assert [f["Plan"] for f in almacen.buscar_paciente("123")] == ["P1", "P2"]
+    assert [f["Plan"] for f in almacen.buscar_paciente(123, "P2")] == ["P2"]
+    assert almacen.buscar_paciente("456") == []
+
+
+def test_controles_previos_sin_id(tmp_path):
+    ruta = str(tmp_path / "registro.xlsx")
+    abrir_almacen(ruta).agregar([dict(FILA, ID="-"), dict(FILA, ID="-", Plan="P9")])
+    assert evaluacion.controles_previos(ruta, "-") == []
+    assert evaluacion.controles_previos(ruta, "-", "P1") == []
+    assert evaluacion.controles_previos(ruta, None) == []
+
+
+def test_controles_previos_de_un_registro_que_solo_tiene_el_excel(tmp_path):
+    # Registro de una versión anterior: sólo el Excel, todavía sin base
+    ruta = str(tmp_path / "registro.xlsx")
+    pd.DataFrame([FILA, dict(FILA, Plan="P2"), dict(FILA, ID="999")]).to_excel(ruta, index=False)
+    assert not os.path.exists(ruta_base_para(ruta))
+    previos = evaluacion.controles_previos(ruta, "123")
+    assert [f["Plan"] for f in previos] == ["P1", "P2"]
+    assert previos[0]["Fecha"] == "18/10/2026"
+    assert os.path.exists(ruta_base_para(ruta))
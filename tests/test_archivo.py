@@ -0,0 +1,61 @@
+import datetime
+import os
+
+import pandas as pd
+import pytest
+
+from benchmarks import generador
+from qads import archivo, registro
+from qads.almacen import AlmacenRegistro, abrir_almacen, ruta_base_para
+
+pytest.importorskip("pyarrow")
+
+HOY = datetime.date(2026, 10, 18)
+
+
+@pytest.fixture
+def ruta_registro(tmp_path):
+    return generador.generar_registro(str(tmp_path / "registro.xlsx"), 50, sqlite=True)
+
+
+def test_archivar_todo_no_vuelve_a_importar_el_excel(ruta_registro):
+    assert archivo.archivar(ruta_registro, meses=0, hoy=HOY) == 50
+    assert abrir_almacen(ruta_registro).cantidad() == 0
+    assert len(pd.read_excel(ruta_registro)) == 0
+    assert len(archivo.leer(ruta_registro)) == 50
+    assert archivo.archivar(ruta_registro, meses=0, hoy=HOY) == 0
+
+
+def test_si_falla_el_excel_la_base_queda_como_estaba(ruta_registro, monkeypatch):
+    def falla(*_):
+        raise PermissionError("el registro está abierto en Excel")
+
+    monkeypatch.setattr(registro, "escribir_registro", falla)
+    with pytest.raises(PermissionError):
+        archivo.archivar(ruta_registro, meses=0, hoy=HOY)
+
+    assert abrir_almacen(ruta_registro).cantidad() == 50
+    assert len(pd.read_excel(ruta_registro)) == 50
+    assert len(archivo.leer(ruta_registro)) == 50
+    carpeta = archivo.carpeta_archivo(ruta_registro)
+    assert not [f for _, _, archivos in os.walk(carpeta) for f in archivos]
+
+
+def test_parquet_huerfano_no_duplica_filas(ruta_registro, monkeypatch):
+    # Corte entre el reemplazo del Excel y el borrado de la base
+    monkeypatch.setattr(AlmacenRegistro, "borrar", lambda self, rowids: None)
+    archivo.archivar(ruta_registro, meses=0, hoy=HOY)
+    assert len(archivo.leer(ruta_registro)) == 50
+
+
+def test_base_vieja_sin_marca(tmp_path, ruta_registro):
+    # Una base con filas de una versión anterior no vuelve a importar el Excel
+    with AlmacenRegistro(ruta_base_para(ruta_registro))._conectar() as con:
+        con.execute("PRAGMA user_version = 0")
+    assert abrir_almacen(ruta_registro).cantidad() == 50
+
+    # Un registro sin base se importa una sola vez
+    otro = str(tmp_path / "otro.xlsx")
+    os.replace(ruta_registro, otro)
+    assert abrir_almacen(otro).cantidad() == 50
+    assert abrir_almacen(otro).cantidad() == 50
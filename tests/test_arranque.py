@@ -0,0 +1,36 @@
+import ast
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PESADOS = ["numpy", "openpyxl", "pandas"]
+
+
+def modulos_pesados(codigo):
+    """Módulos pesados que quedan en sys.modules después de correr `codigo` en un intérprete nuevo"""
+    codigo = f"import json, sys\n{codigo}\nprint(json.dumps([m for m in {PESADOS!r} if m in sys.modules]))"
+    salida = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, check=True, capture_output=True, text=True)
+    return json.loads(salida.stdout.splitlines()[-1])
+
+
+def test_el_nucleo_de_las_interfaces_no_carga_modulos_pesados():
+    assert modulos_pesados("import qads.decision, qads.evaluacion, qads.sincronizador") == []
+
+
+@pytest.mark.skipif(importlib.util.find_spec("tkinter") is None, reason="sin tkinter")
+@pytest.mark.parametrize("interfaz", ["main", "inicio"])
+def test_las_interfaces_arrancan_sin_modulos_pesados(interfaz):
+    assert modulos_pesados(f"import {interfaz}") == []
+
+
+def test_la_precarga_trae_los_modulos_diferidos():
+    # main.py necesita tkinter: la lista se lee del código sin importarlo
+    with open(os.path.join(RAIZ, "main.py"), encoding="utf-8") as f:
+        linea = next(l for l in f if l.startswith("MODULOS_DIFERIDOS ="))
+    diferidos = ast.literal_eval(linea.split("=", 1)[1].strip())
+    assert modulos_pesados("\n".join(f"import {m}" for m in diferidos)) == PESADOS
@@ -0,0 +1,54 @@
+import os
+import time
+
+import pytest
+
+from qads import bloqueo
+from qads.bloqueo import Bloqueo, BloqueoOcupado
+
+
+def envejecer(ruta, segundos):
+    antes = time.time() - segundos
+    os.utime(ruta, (antes, antes))
+
+
+def test_excluye_y_libera(tmp_path):
+    ruta = str(tmp_path / "r.xlsx.lock")
+    with Bloqueo(ruta):
+        with pytest.raises(BloqueoOcupado):
+            Bloqueo(ruta, espera=0.2).adquirir()
+    with Bloqueo(ruta, espera=0.2):
+        pass
+    assert not os.path.exists(ruta)
+
+
+def test_rompe_un_bloqueo_abandonado(tmp_path):
+    ruta = str(tmp_path / "r.xlsx.lock")
+    Bloqueo(ruta).adquirir()  # La estación se colgó sin liberarlo
+    envejecer(ruta, bloqueo.VENCIMIENTO + bloqueo.MARGEN_RELOJ + 10)
+    with Bloqueo(ruta, espera=0.5) as b:
+        assert b.tomado
+
+
+def test_no_rompe_un_bloqueo_vigente_por_diferencia_de_reloj(tmp_path):
+    ruta = str(tmp_path / "r.xlsx.lock")
+    Bloqueo(ruta).adquirir()
+    envejecer(ruta, bloqueo.VENCIMIENTO + 10)  # Reloj del servidor atrasado
+    with pytest.raises(BloqueoOcupado):
+        Bloqueo(ruta, espera=0.3).adquirir()
+
+
+def test_dos_estaciones_rompen_el_mismo_bloqueo(tmp_path):
+    ruta = str(tmp_path / "r.xlsx.lock")
+    Bloqueo(ruta).adquirir()
+    envejecer(ruta, bloqueo.VENCIMIENTO + bloqueo.MARGEN_RELOJ + 10)
+    a, b = Bloqueo(ruta, espera=0.3), Bloqueo(ruta, espera=0.3)
+    # Las dos ven el bloqueo abandonado; A lo rompe y toma uno nuevo antes de que B actúe
+    abandonado_a, abandonado_b = a._vencido(), b._vencido()
+    a._romper(abandonado_a)
+    a.adquirir()
+    b._romper(abandonado_b)
+    assert os.path.exists(ruta)
+    with pytest.raises(BloqueoOcupado):
+        b.adquirir()
+    a.liberar()
@@ -0,0 +1,73 @@
+import math
+
+import pytest
+from openpyxl import Workbook, load_workbook
+
+from qads import costos
+
+
+def guardar_sin_recalcular(tmp_path, cambios):
+    """Copia de costos.xlsx editada y guardada con openpyxl: los valores en caché de las fórmulas quedan viejos"""
+    wb = load_workbook(costos.RUTA_COSTOS)
+    for celda, valor in cambios.items():
+        wb.active[celda] = valor
+    ruta = tmp_path / "costos.xlsx"
+    wb.save(ruta)
+    return ruta
+
+
+def test_precios_coinciden_con_columna_k():
+    precios = costos.calcular_precios(costos.leer_parametros(costos.RUTA_COSTOS))
+    assert precios["Plancheck"] == pytest.approx(3.6786206896551725)
+    assert precios["ArcCheck"] == pytest.approx(2.71846670273484)
+    assert precios["Linac"] == pytest.approx(64.63490229885058)
+
+
+def test_formulas_dependientes_se_calculan_sin_excel(tmp_path):
+    # El mantenimiento (=0.1*B2) y los usos anuales (=H13) dependen de otras celdas
+    ruta = guardar_sin_recalcular(tmp_path, {"B2": 90000})
+    precios = costos.calcular_precios(costos.leer_parametros(ruta))
+    assert precios["Plancheck"] == pytest.approx((90000 / 5 + 9000 + 30 * 0.1) / 6525)
+
+    # ArcCheck y 3DVH toman el costo inicial de O2
+    ruta = guardar_sin_recalcular(tmp_path, {"O2": 200000})
+    precios = costos.calcular_precios(costos.leer_parametros(ruta))
+    assert precios["ArcCheck"] == pytest.approx(
+        (200000 / 15 + 20000 + 0.15 * precios["Linac"] + 30 * (0.4 + 0.1)) / 6525)
+
+
+def test_precio_faltante_no_se_registra_como_cero():
+    tabla = costos.TablaCostos({"Plancheck": 1.0})
+    assert tabla.costo_paquete("Plancheck") == 1.0
+    with pytest.raises(costos.PrecioFaltante, match="LogFile"):
+        tabla.costo_paquete("Plancheck + LogFile")
+
+
+def test_formula_no_soportada_usa_el_valor_guardado():
+    formulas, guardados = Workbook().active, Workbook().active
+    formulas["A1"], formulas["A2"], formulas["A3"] = "=ROUND(B1, 0)", "=A1*2", "=SUM(B1:B2)"
+    guardados["A1"] = 7
+    hoja = costos._Hoja(formulas, lambda: guardados)
+    assert hoja.valor("A2") == 14
+    assert math.isnan(hoja.valor("A3"))  # Sin valor guardado: NaN, no un 0 que parezca válido
+
+
+def test_valores_guardados_solo_si_hacen_falta():
+    formulas = Workbook().active
+    formulas["A1"], formulas["A2"] = 5, "=A1*2"
+    hoja = costos._Hoja(formulas, lambda: pytest.fail("no debería abrir los valores guardados"))
+    assert hoja.filas(1) == [[5], [10]]
+
+
+def test_formula_no_soportada_sin_valor_guardado(tmp_path):
+    # Sólo queda sin precio el método de esa fila; el resto de la tabla se sigue leyendo
+    ruta = guardar_sin_recalcular(tmp_path, {"B2": "=SUM(O2:O3)"})
+    precios = costos.calcular_precios(costos.leer_parametros(ruta))
+    assert "Plancheck" not in precios
+    assert precios["ArcCheck"] == pytest.approx(2.71846670273484)
+
+
+def test_sin_costos_xlsx(tmp_path):
+    tabla = costos.cargar_tabla(str(tmp_path / "costos.xlsx"))
+    with pytest.raises(costos.PrecioFaltante, match="No se encontró"):
+        tabla.costo_paquete("Plancheck")
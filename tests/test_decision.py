@@ -0,0 +1,64 @@
+from itertools import product
+
+import pytest
+
+from qads.decision import SIN_PAQUETE, TECNICAS, ReglasQA
+
+
+def paquete_original(tecnica, complejo, ca_ped, intento):
+    """obtener_paquete_qa de la primera versión de main.py, tal cual"""
+    if tecnica in ["3D", "FIF"]:
+        if intento == 1:
+            res = "Plancheck + Calculo independiente + LogFile"
+            return res + " + Transit-EPID" if ca_ped else res
+        return "Portal Dosimetry"
+
+    elif tecnica in ["SRS", "SBRT"]:
+        if intento == 1:
+            res = "Plancheck + Portal Dosimetry"
+            return res + " + Transit-EPID" if ca_ped else res
+        return "Stereophan + Gafchromic/CI"
+
+    elif tecnica in ["IMRT", "VMAT"]:
+        if not complejo:
+            res = "Plancheck + Calculo independiente + LogFile"
+            return res + " + Transit-EPID" if ca_ped else res
+        else:
+            if intento == 1:
+                res = "Plancheck + Calculo independiente + LogFile + Portal Dosimetry"
+                return res + " + Transit-EPID" if ca_ped else res
+            return "ArcCheck + 3DVH"
+    return "Indefinido"
+
+
+def rehacer_original(tecnica, complejo, intento):
+    """validar_intento de la primera versión: si falla, ¿se rehace el plan?"""
+    return (tecnica in ["IMRT", "VMAT"] and not complejo) or intento >= 2
+
+
+@pytest.fixture(scope="module")
+def reglas():
+    return ReglasQA.desde_csv()
+
+
+@pytest.mark.parametrize("tecnica, complejo, ca_ped", list(product(TECNICAS, [False, True], [False, True])))
+def test_reglas_iguales_al_arbol_original(reglas, tecnica, complejo, ca_ped):
+    # Se recorren los intentos como lo hacía la aplicación: mientras el control falle y no haya que rehacer
+    intento = 1
+    while True:
+        assert reglas.paquete(tecnica, complejo, ca_ped, intento) == paquete_original(tecnica, complejo, ca_ped,
+                                                                                      intento)
+        otro = not rehacer_original(tecnica, complejo, intento)
+        assert reglas.hay_otro_intento(tecnica, complejo, ca_ped, intento) == otro
+        if not otro:
+            break
+        intento += 1
+    # Los intentos a los que el árbol original nunca llegaba no tienen paquete
+    for siguiente in range(intento + 1, 4):
+        assert reglas.paquete(tecnica, complejo, ca_ped, siguiente) == SIN_PAQUETE
+        assert not reglas.hay_otro_intento(tecnica, complejo, ca_ped, siguiente)
+
+
+def test_tecnica_desconocida(reglas):
+    assert reglas.paquete("Electrones", False, False, 1) == paquete_original("Electrones", False, False, 1)
+    assert not reglas.hay_otro_intento("Electrones", False, False, 1)
@@ -0,0 +1,102 @@
+import multiprocessing
+import os
+import threading
+
+from qads import bloqueo
+from qads.almacen import abrir_almacen
+from qads.diario import Diario
+
+FILA = {"Fecha": "18/10/2026", "ID": "123", "Paciente": "X", "Plan": "P1", "Técnica RT": "VMAT"}
+
+
+def anotar_varias(ruta_diario, cantidad):
+    diario = Diario(ruta_diario)
+    for _ in range(cantidad):
+        diario.anotar("registro.xlsx", FILA)
+
+
+def test_anotar_y_confirmar(tmp_path):
+    diario = Diario(str(tmp_path / "diario.jsonl"))
+    primero = diario.anotar("registro.xlsx", FILA)
+    segundo = diario.anotar("registro.xlsx", FILA)
+    diario.confirmar(primero)
+    assert [e["uid"] for e in diario.pendientes()] == [segundo]
+    assert diario.pendientes()[0]["fila"] == FILA
+    assert not os.path.exists(bloqueo.ruta_bloqueo(diario.ruta))
+
+
+def test_linea_cortada_se_ignora(tmp_path):
+    diario = Diario(str(tmp_path / "diario.jsonl"))
+    uid = diario.anotar("registro.xlsx", FILA)
+    with open(diario.ruta, "a", encoding="utf-8") as f:
+        f.write('{"uid": "cortada", "fi')
+    assert [e["uid"] for e in diario.pendientes()] == [uid]
+
+
+def test_reproducir_aplica_confirma_y_compacta(tmp_path):
+    diario = Diario(str(tmp_path / "diario.jsonl"))
+    ruta = str(tmp_path / "registro.xlsx")
+    caida = str(tmp_path / "caida.xlsx")
+    diario.anotar(ruta, FILA)
+    diario.anotar(ruta, FILA)
+    pendiente = diario.anotar(caida, FILA)
+
+    def abrir(r):
+        if r == caida:
+            raise OSError("la carpeta compartida no responde")
+        return abrir_almacen(r)
+
+    aplicadas, errores = diario.reproducir(abrir)
+    assert aplicadas == {ruta: 2}
+    assert len(errores) == 1 and "caida.xlsx" in errores[0]
+    assert [e["uid"] for e in diario.pendientes()] == [pendiente]
+    with open(diario.ruta, encoding="utf-8") as f:
+        assert len(f.readlines()) == 1  # Compactado: sólo queda la pendiente
+
+    # Volver a aplicar algo ya aplicado no lo duplica en la base
+    assert diario.reproducir(abrir)[0] == {}
+    assert abrir_almacen(ruta).cantidad() == 2
+
+
+def test_compactar_sin_pendientes_borra_el_diario(tmp_path):
+    diario = Diario(str(tmp_path / "diario.jsonl"))
+    diario.confirmar(diario.anotar("registro.xlsx", FILA))
+    diario.compactar()
+    assert not os.path.exists(diario.ruta)
+    assert diario.pendientes() == []
+
+
+def test_anotar_durante_compactar_no_se_pierde(tmp_path):
+    diario = Diario(str(tmp_path / "diario.jsonl"))
+    diario.confirmar(diario.anotar("registro.xlsx", FILA))
+    anotados, hilos = [], []
+    leer = diario._leer_pendientes
+
+    def leer_y_anotar():
+        pendientes = leer()
+        # Otra exportación llega entre la lectura y el reemplazo del archivo
+        hilo = threading.Thread(target=lambda: anotados.append(diario.anotar("registro.xlsx", FILA)))
+        hilo.start()
+        hilo.join(0.5)
+        hilos.append(hilo)
+        return pendientes
+
+    diario._leer_pendientes = leer_y_anotar
+    diario.compactar()
+    del diario._leer_pendientes
+    hilos[0].join(5)
+    assert anotados and [e["uid"] for e in diario.pendientes()] == anotados
+
+
+def test_varias_instancias_comparten_el_diario(tmp_path):
+    ruta = str(tmp_path / "diario.jsonl")
+    procesos = [multiprocessing.Process(target=anotar_varias, args=(ruta, 25)) for _ in range(3)]
+    for p in procesos:
+        p.start()
+    diario = Diario(ruta)
+    while any(p.is_alive() for p in procesos):
+        diario.compactar()
+    for p in procesos:
+        p.join(30)
+        assert p.exitcode == 0
+    assert len(diario.pendientes()) == 75
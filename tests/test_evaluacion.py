@@ -0,0 +1,82 @@
+import shutil
+from datetime import datetime
+
+import pytest
+
+from qads import almacen, decision, evaluacion
+from qads.almacen import abrir_almacen
+from qads.costos import TablaCostos
+from qads.diario import Diario
+
+DATOS = {"Plan": "C1 VMAT PROSTATA D", "Nombre": "PACIENTE 1", "ID": "123456", "Sexo": "M", "Fractions": "28",
+         "MCS": "0.4", "SAS": "0.3", "PMU": "500", "MCSmin": "0.2", "SASmax": "0.6"}
+FECHA = datetime(2026, 10, 18)
+# Columnas del registro antes de separar la evaluación de la interfaz
+COLUMNAS_ORIGINALES = ["Fecha", "ID", "Paciente", "Técnica RT", "MCS Min", "SAS Max",
+                       "QA Intento 1", "Resultado 1", "QA Intento 2", "Resultado 2", "Costo asociado"]
+PRECIOS = {"Plancheck": 10.0, "Calculo independiente": 20.0, "LogFile": 5.0, "Portal Dosimetry": 40.0,
+           "ArcCheck": 100.0, "3DVH": 50.0, "Transit-EPID": 30.0}
+SIMPLE = decision.Umbrales(mcs=0.0, sas=1.0, fractions=100, mcs_min=0.0, sas_max=1.0, pmu=10000)
+
+
+def caso_validado():
+    caso = evaluacion.CasoQA.desde_reporte(DATOS)
+    umbrales = decision.Umbrales()
+    assert caso.registrar(caso.paquete(umbrales), evaluacion.EXITOSO, umbrales) == evaluacion.VALIDADO
+    return caso
+
+
+def test_dos_intentos_con_costo_y_fila():
+    caso, umbrales = evaluacion.CasoQA.desde_reporte(DATOS), decision.Umbrales()
+    assert (caso.tecnica, caso.region, caso.es_complejo(umbrales)) == ("VMAT", "PROSTATA", True)
+    primero = caso.paquete(umbrales)
+    assert primero == "Plancheck + Calculo independiente + LogFile + Portal Dosimetry"
+    assert caso.registrar(primero, evaluacion.NO_EXITOSO, umbrales) == evaluacion.SIGUIENTE_INTENTO
+    assert caso.intento == 2
+    segundo = caso.paquete(umbrales)
+    assert segundo == "ArcCheck + 3DVH"
+    assert caso.registrar(segundo, evaluacion.EXITOSO, umbrales) == evaluacion.VALIDADO
+
+    costo = caso.costo(TablaCostos(PRECIOS))
+    assert costo == pytest.approx(10 + 20 + 5 + 40 + 100 + 50)
+    fila = caso.fila_registro(FECHA, costo)
+    assert fila["Fecha"] == "18/10/2026"
+    assert (fila["QA Intento 1"], fila["Resultado 1"]) == (primero, evaluacion.NO_EXITOSO)
+    assert (fila["QA Intento 2"], fila["Resultado 2"]) == (segundo, evaluacion.EXITOSO)
+    assert fila["Costo asociado"] == costo
+    assert (fila["MCS Prom"], fila["Fracciones"], fila["CA/Pediátrico"]) == ("0.4", "28", False)
+
+
+def test_sin_segundo_intento_hay_que_rehacer_el_plan():
+    # Un VMAT simple no tiene un segundo escalón de QA
+    caso = evaluacion.CasoQA.desde_reporte(DATOS)
+    assert not caso.es_complejo(SIMPLE)
+    assert caso.registrar(caso.paquete(SIMPLE), evaluacion.NO_EXITOSO, SIMPLE) == evaluacion.REHACER_PLAN
+    assert caso.intento == 1
+    fila = caso.fila_registro(FECHA, caso.costo(TablaCostos(PRECIOS)))
+    assert (fila["QA Intento 2"], fila["Resultado 2"]) == ("-", "-")
+    assert fila["Costo asociado"] == 35.0
+
+
+def test_fila_con_las_columnas_del_registro():
+    fila = caso_validado().fila_registro(FECHA, 0.0)
+    assert list(fila) == list(almacen.COLUMNAS)
+    # Las columnas originales conservan su orden; las nuevas no se intercalan entre los intentos
+    assert [c for c in fila if c in COLUMNAS_ORIGINALES] == COLUMNAS_ORIGINALES
+    assert list(fila)[:list(fila).index("Costo asociado") + 1] == [
+        *COLUMNAS_ORIGINALES[:3], "Plan", *COLUMNAS_ORIGINALES[3:]]
+
+
+def test_sin_costos_la_fila_se_guarda_con_costo_vacio(tmp_path, monkeypatch):
+    caso = caso_validado()
+    shutil.copy(decision.RUTA_REGLAS, tmp_path)
+    monkeypatch.chdir(tmp_path)  # Sin costos.xlsx en la carpeta de trabajo
+    ruta = str(tmp_path / "registro.xlsx")
+    avisos = []
+    error = evaluacion.exportar(caso, ruta, fecha=FECHA, diario=Diario(str(tmp_path / "diario.jsonl")),
+                                sincronizar=False, avisos=avisos)
+    assert error is None
+    assert len(avisos) == 1 and "No se encontró costos.xlsx" in avisos[0]
+    [fila] = abrir_almacen(ruta).filas()
+    assert fila["ID"] == "123456"
+    assert fila["Costo asociado"] is None
@@ -0,0 +1,34 @@
+import pandas as pd
+
+from benchmarks import generador
+from qads import decision, lote, reporte
+
+
+def test_tabla_de_resultados(tmp_path):
+    carpeta = tmp_path / "reportes"
+    rutas = generador.generar_reportes(str(carpeta), cantidad=6, haces=(2, 8))
+    (carpeta / "roto.xlsx").write_bytes(b"no es un excel")
+    (carpeta / "~$reporte_0000.xlsx").write_bytes(b"PK")  # Temporal de Excel
+    (carpeta / "notas.txt").write_text("x")
+    salida = tmp_path / "resultados.csv"
+
+    assert lote.main([str(carpeta), "-o", str(salida), "-j", "2", "--sin-cache"]) == 0
+    df = pd.read_csv(salida, dtype=str, keep_default_na=False)
+    assert list(df["Archivo"]) == [*sorted(f"reporte_{i:04d}.xlsx" for i in range(6)), "roto.xlsx"]
+    assert df.set_index("Archivo").loc["roto.xlsx", "Error"]
+
+    # Cada fila es lo que da el árbol de decisión sobre el reporte leído por separado
+    umbrales, reglas = decision.cargar_umbrales("umbrales.txt"), decision.cargar_reglas()
+    for ruta, fila in zip(rutas, df.to_dict("records")):
+        datos = reporte.extraer_datos(ruta)
+        tecnica, region = decision.inferir_tecnica_region(datos["Plan"])
+        complejo = decision.es_plan_complejo(datos, tecnica, umbrales)
+        assert fila["Error"] == ""
+        assert (fila["Plan"], fila["ID"], fila["MCSmin"]) == (datos["Plan"], datos["ID"], datos["MCSmin"])
+        assert (fila["Técnica RT"], fila["Región"], fila["Complejo"]) == (tecnica, region, str(complejo))
+        assert fila["QA Intento 1"] == reglas.paquete(tecnica, complejo, region in decision.REGIONES_CON_CA, 1)
+
+
+def test_sin_reportes(tmp_path):
+    assert lote.main([str(tmp_path), "-o", str(tmp_path / "resultados.csv")]) == 1
+    assert lote.evaluar_lote([], decision.Umbrales()).empty
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks import generador
+from qads import decision
+from qads.almacen import AlmacenRegistro
+from qads.optimizacion import grillas_por_defecto, optimizar
+from qads.simulacion import COLUMNAS_HISTORIAL, CRITERIOS, Historial
+
+
+class PreciosFijos:
+    def costo_paquete(self, paquete):
+        return 10.0 * len(paquete.split("+")) + len(paquete) / 100
+
+
+@pytest.fixture(scope="module")
+def historial():
+    df = pd.DataFrame([AlmacenRegistro._a_sql(f) for f in generador.filas_registro(400)])
+    return Historial(df[list(COLUMNAS_HISTORIAL)].rename(columns=COLUMNAS_HISTORIAL), tabla_costos=PreciosFijos())
+
+
+def frente_exhaustivo(historial, grillas):
+    """Evalúa cada combinación de la grilla plan por plan y se queda con los puntos no dominados"""
+    indice = pd.MultiIndex.from_product([grillas[c] for c in CRITERIOS], names=list(CRITERIOS))
+    grilla = indice.to_frame(index=False)
+    complejos = historial.complejos_grilla(grilla)
+    costo = np.where(complejos, historial.costo[True], historial.costo[False]).sum(axis=1)
+    fallos = historial.fallo_1 & historial.puede_ser_complejo
+    tasa = (fallos & ~complejos).sum(axis=1) / fallos.sum()
+    puntos = sorted(set(zip(np.round(costo, 6), np.round(tasa, 9))))
+    frente, mejor_tasa = [], np.inf
+    for c, t in puntos:
+        if t < mejor_tasa:
+            frente.append((c, t))
+            mejor_tasa = t
+    return frente
+
+
+def test_optimizar_igual_a_busqueda_exhaustiva(historial):
+    grillas = grillas_por_defecto(historial, 3)
+    grillas["pmu"] = np.append(grillas["pmu"], 5000.0)  # Un umbral que no separa ningún plan
+    frente = optimizar(historial, grillas)
+
+    obtenido = list(zip(np.round(frente["costo_total"], 6), np.round(frente["fallos_no_detectados"], 9)))
+    assert obtenido == frente_exhaustivo(historial, grillas)
+
+    # Cada punto del frente se reproduce con sus umbrales
+    fallos = historial.fallo_1 & historial.puede_ser_complejo
+    for fila in frente.to_dict("records"):
+        complejos = historial.complejos(decision.Umbrales(**{c: fila[c] for c in CRITERIOS}))
+        assert historial.costo_total(complejos) == pytest.approx(fila["costo_total"])
+        assert complejos.sum() == fila["complejos"]
+        assert (fallos & ~complejos).sum() / fallos.sum() == pytest.approx(fila["fallos_no_detectados"])
@@ -0,0 +1,113 @@
+import os
+
+from openpyxl import Workbook
+
+from qads import reporte
+
+ENCABEZADO = [
+    ["PLAN NAME", "C1 VMAT PROSTATA D"],
+    ["PATIENT ID", "123456"],
+    ["FRACTIONS", 28],
+    ["MCS", "0,400"],
+    ["SAS", 0.3],
+    ["PMU", 500],
+    [],
+    ["BEAM METRICS"],
+]
+
+
+def guardar(tmp_path, filas):
+    wb = Workbook()
+    for fila in filas:
+        wb.active.append(fila)
+    ruta = tmp_path / "reporte.xlsx"
+    wb.save(ruta)
+    return ruta
+
+
+def test_fila_vacia_entre_haces(tmp_path):
+    ruta = guardar(tmp_path, ENCABEZADO + [
+        ["Arc1", None, "MCS", "0,450"],
+        ["Arc1", None, "SAS", 0.2],
+        [],
+        ["Arc2", None, "MCS", "0,120"],
+        ["Arc2", None, "SAS", 0.8],
+        [],
+        ["DVH STATISTICS"],
+        ["PTV", 70.0, "MCS", 0.01],
+    ])
+    datos = reporte.extraer_datos(ruta)
+    assert (datos["MCSmin"], datos["SASmax"]) == ("0.12", "0.8")
+    assert datos["Haces"].mcs.tolist() == [0.45, 0.12]
+
+
+def test_beam_metrics_hasta_el_final_de_la_hoja(tmp_path):
+    ruta = guardar(tmp_path, ENCABEZADO + [
+        ["Arc1", None, "MCS", "0,450"],
+        [],
+        [],
+        ["Arc2", None, "MCS", "0,300"],
+    ])
+    datos = reporte.extraer_datos(ruta)
+    assert datos["MCSmin"] == "0.3"
+    assert datos["Plan"] == "C1 VMAT PROSTATA D"
+
+
+
+def test_encabezado_por_haz(tmp_path):
+    ruta = guardar(tmp_path, ENCABEZADO + [
+        ["ARC 1"],
+        [None, None, "MCS", "0,450"],
+        [None, None, "SAS", 0.2],
+        ["ARC 2"],
+        [None, None, "MCS", "0,120"],
+        [None, None, "SAS", 0.8],
+        [],
+        ["DVH STATISTICS"],
+        ["PTV", 70.0, "MCS", 0.01],
+    ])
+    datos = reporte.extraer_datos(ruta)
+    assert (datos["MCSmin"], datos["SASmax"]) == ("0.12", "0.8")
+    assert datos["Haces"].mcs.tolist() == [0.45, 0.12]
+
+
+def test_titulo_desconocido_sin_metricas_cierra_la_seccion(tmp_path):
+    ruta = guardar(tmp_path, ENCABEZADO + [
+        ["Arc1", None, "MCS", "0,450"],
+        ["CONTROL POINTS"],
+        ["Arc1", 1, "Gantry", "CW"],
+        ["Arc1", 2, "MCS", 0.01],
+    ])
+    datos = reporte.extraer_datos(ruta)
+    assert datos["Haces"].mcs.tolist() == [0.45]
+
+def test_cache_json_ida_y_vuelta(tmp_path):
+    from qads import cache_reportes
+
+    ruta = guardar(tmp_path, ENCABEZADO + [
+        ["Arc1", None, "MCS", "0,450"],
+        ["Arc1", None, "MU", 120.5],
+        ["Arc2", None, "MCS", "0,120"],
+    ])
+    directorio = str(tmp_path / "cache")
+    os.makedirs(directorio)
+    with open(os.path.join(directorio, "viejo.pkl"), "wb") as f:
+        f.write(b"\x80\x04.")
+    leido = cache_reportes.extraer_datos(ruta, directorio)
+    assert sorted(os.listdir(directorio)) == [cache_reportes.huella(ruta) + ".json"]
+
+    guardado = cache_reportes.extraer_datos(ruta, directorio)
+    assert {k: v for k, v in guardado.items() if k != "Haces"} == {k: v for k, v in leido.items() if k != "Haces"}
+    assert guardado["Haces"].mcs.tolist() == [0.45, 0.12]
+    assert guardado["Haces"].resumen("MCS") == leido["Haces"].resumen("MCS")
+
+
+def test_cache_descarta_entradas_invalidas(tmp_path):
+    from qads import cache_reportes
+
+    ruta = guardar(tmp_path, ENCABEZADO + [["Arc1", None, "MCS", "0,450"]])
+    directorio = tmp_path / "cache"
+    directorio.mkdir()
+    entrada = directorio / (cache_reportes.huella(ruta) + ".json")
+    entrada.write_text('{"version": %d, "datos": {"MCSmin": 1}, "haces": {}}' % reporte.VERSION_PARSER)
+    assert cache_reportes.extraer_datos(ruta, str(directorio))["MCSmin"] == "0.45"
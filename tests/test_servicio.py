@@ -0,0 +1,76 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from qads import servicio
+
+
+class EvaluadorFijo:
+    """Responde sin leer el reporte: sólo anota con qué se lo llamó"""
+    procesos = 1
+
+    def __init__(self):
+        self.llamadas = []
+
+    def evaluar(self, path, opciones):
+        self.llamadas.append((path, servicio._leer_opciones(opciones)))
+        return {}
+
+
+@pytest.fixture
+def servidor():
+    srv = servicio.crear_servidor("127.0.0.1", 0, EvaluadorFijo())
+    hilo = threading.Thread(target=srv.serve_forever, daemon=True)
+    hilo.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def post_json(srv, cuerpo):
+    peticion = urllib.request.Request(f"http://127.0.0.1:{srv.server_address[1]}/evaluar",
+                                      data=json.dumps(cuerpo).encode(),
+                                      headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(peticion) as r:
+            return r.status, json.load(r)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+@pytest.mark.parametrize("cuerpo", [[], "reporte.xlsx", 3, None])
+def test_cuerpo_json_que_no_es_objeto(servidor, cuerpo):
+    estado, respuesta = post_json(servidor, cuerpo)
+    assert estado == 400
+    assert "objeto" in respuesta["error"]
+
+
+def test_booleanos_como_texto(servidor, tmp_path):
+    reporte = tmp_path / "plan.xlsx"
+    reporte.write_bytes(b"")
+    estado, _ = post_json(servidor, {"ruta": str(reporte), "pediatrico": "false", "cambios_anatomicos": "si"})
+    assert estado == 200
+    assert servidor.evaluador.llamadas == [(str(reporte), {"pediatrico": False, "cambios_anatomicos": True})]
+
+
+def test_leer_opciones():
+    assert servicio._leer_opciones({"pediatrico": "False", "cambios_anatomicos": 1, "tecnica": "VMAT", "x": 1}) == \
+        {"pediatrico": False, "cambios_anatomicos": True, "tecnica": "VMAT"}
+    assert servicio._leer_opciones({"pediatrico": False}) == {"pediatrico": False}
+
+
+def test_ruta_desde_otra_estacion(tmp_path):
+    raiz = tmp_path / "reportes"
+    raiz.mkdir()
+    fuera = str(tmp_path / "otro.xlsx")
+    assert servicio._resolver_ruta(fuera, "10.0.0.7") is None
+    assert servicio._resolver_ruta(fuera, "10.0.0.7", str(raiz)) is None
+    assert servicio._resolver_ruta("../otro.xlsx", "10.0.0.7", str(raiz)) is None
+    assert servicio._resolver_ruta("a/plan.xlsx", "10.0.0.7", str(raiz)) == str(raiz.resolve() / "a" / "plan.xlsx")
+    # En la misma máquina se puede leer cualquier ruta
+    assert servicio._resolver_ruta(fuera, "127.0.0.1", str(raiz)) == fuera
+    assert servicio._resolver_ruta(fuera, "::1") == fuera
+    assert servicio._resolver_ruta(fuera, "::ffff:127.0.0.1") == fuera
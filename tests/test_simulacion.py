@@ -0,0 +1,83 @@
+import pandas as pd
+import pytest
+
+from benchmarks import generador
+from qads import decision
+from qads.almacen import AlmacenRegistro
+from qads.costos import PrecioFaltante
+from qads.simulacion import COLUMNAS_HISTORIAL, Historial, grilla_desde_rangos
+
+
+class PreciosFijos:
+    """Como TablaCostos: un precio por paquete y error para los que no tienen precio"""
+
+    def costo_paquete(self, paquete):
+        if paquete == decision.SIN_PAQUETE:
+            raise PrecioFaltante(f"No hay precio para: {paquete}")
+        return 10.0 * len(paquete.split("+")) + len(paquete) / 100
+
+
+def historial_generado(cantidad=300):
+    filas = generador.filas_registro(cantidad)
+    filas.append(dict(filas[0], **{"Técnica RT": "Electrones", "Resultado 1": "No Exitoso"}))
+    df = pd.DataFrame([AlmacenRegistro._a_sql(f) for f in filas])
+    return df[list(COLUMNAS_HISTORIAL)].rename(columns=COLUMNAS_HISTORIAL)
+
+
+def evaluar_uno_por_uno(df, umbrales):
+    """Clasificación y costo plan por plan, como en la aplicación"""
+    reglas, precios = decision.cargar_reglas(), PreciosFijos()
+
+    def precio(paquete):
+        return 0.0 if paquete == decision.SIN_PAQUETE else precios.costo_paquete(paquete)
+
+    complejos, costo = [], 0.0
+    for fila in df.to_dict("records"):
+        complejo = decision.es_plan_complejo(fila, fila["Tecnica"], umbrales)
+        ca_ped = bool(fila["CA"]) if pd.notna(fila["CA"]) else False
+        costo += precio(reglas.paquete(fila["Tecnica"], complejo, ca_ped, 1))
+        if fila["Resultado 1"] == "No Exitoso":
+            costo += precio(reglas.paquete(fila["Tecnica"], complejo, ca_ped, 2))
+        complejos.append(complejo)
+    return complejos, costo
+
+
+@pytest.fixture(scope="module")
+def df():
+    return historial_generado()
+
+
+@pytest.fixture(scope="module")
+def historial(df):
+    return Historial(df, tabla_costos=PreciosFijos())
+
+
+def test_sin_paquete_no_se_cotiza(historial):
+    # Planes IMRT/VMAT simples que fallaron (sin segundo intento) y la técnica desconocida
+    assert historial.costo[False][-1] == 0.0
+    assert historial.paquete[False][-1] == decision.SIN_PAQUETE
+
+
+def test_simular_igual_a_plan_por_plan(df, historial):
+    actuales = decision.Umbrales()
+    candidatos = decision.Umbrales(mcs=0.35, sas=0.6, fractions=20, mcs_min=0.2, sas_max=0.8, pmu=2000)
+    r = historial.simular(candidatos, actuales)
+    complejos_antes, costo_antes = evaluar_uno_por_uno(df, actuales)
+    complejos_despues, costo_despues = evaluar_uno_por_uno(df, candidatos)
+    assert r["complejos_antes"] == sum(complejos_antes)
+    assert r["complejos_despues"] == sum(complejos_despues)
+    assert r["costo_antes"] == pytest.approx(costo_antes, abs=0.01)
+    assert r["costo_despues"] == pytest.approx(costo_despues, abs=0.01)
+    assert r["a_complejo"] - r["a_simple"] == sum(complejos_despues) - sum(complejos_antes)
+    assert len(r["reclasificados"]) == sum(a != d for a, d in zip(complejos_antes, complejos_despues))
+
+
+def test_barrer_igual_a_plan_por_plan(df, historial):
+    base = decision.Umbrales(mcs_min=0.0, sas_max=1.0)
+    grilla = grilla_desde_rangos({"mcs": [0.2, 0.4, 0.6], "pmu": [500, 1500, 3000], "fractions": [3, 25]}, base)
+    resultado = historial.barrer(grilla, decision.Umbrales())
+    for fila in resultado.to_dict("records"):
+        umbrales = decision.Umbrales(**{c: fila[c] for c in ("mcs", "sas", "fractions", "mcs_min", "sas_max", "pmu")})
+        complejos, costo = evaluar_uno_por_uno(df, umbrales)
+        assert fila["complejos"] == sum(complejos)
+        assert fila["costo_total"] == pytest.approx(costo)
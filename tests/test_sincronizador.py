@@ -0,0 +1,28 @@
+from qads import sincronizador
+from qads.sincronizador import Sincronizador
+
+
+def test_umbrales_de_escritura():
+    s = Sincronizador(cantidad=3, inactividad=30, demora=300)
+    s.anotar("r.xlsx", ahora=0)
+    s.anotar("r.xlsx", ahora=10)
+    assert s.listas(ahora=20) == []
+    assert s.listas(ahora=40) == ["r.xlsx"]
+    s.anotar("r.xlsx", ahora=20)
+    assert s.listas(ahora=21) == ["r.xlsx"]
+
+
+def test_falla_espera_antes_de_reintentar(tmp_path):
+    s = Sincronizador(cantidad=1)
+    ruta = str(tmp_path / "no_existe" / "r.xlsx")
+    s.anotar(ruta, ahora=0)
+    assert ruta in s.volcar([ruta])
+    assert s.hay_pendientes()
+    # La fila es vieja (supera DEMORA), pero tiene que respetar la espera tras la falla
+    assert s.listas() == []
+    desde = s._fallas[ruta][1]
+    assert s.listas(ahora=desde) == [ruta]
+
+    s.volcar([ruta])
+    fallas, hasta = s._fallas[ruta]
+    assert fallas == 2 and hasta - desde >= sincronizador.REINTENTO
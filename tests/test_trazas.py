@@ -0,0 +1,74 @@
+import glob
+import multiprocessing
+
+import pytest
+
+from qads import trazas
+
+
+@pytest.fixture
+def ruta(tmp_path):
+    ruta = str(tmp_path / "trazas.jsonl")
+    trazas.activar(ruta)
+    yield ruta
+    trazas.activar(None)
+
+
+def escribir_varias(ruta, cantidad, tamano_maximo, copias):
+    trazas.TAMANO_MAXIMO, trazas.COPIAS = tamano_maximo, copias
+    trazas.activar(ruta)
+    for i in range(cantidad):
+        with trazas.tramo("etapa", i=i):
+            pass
+
+
+def test_apagadas_no_escriben(tmp_path):
+    with trazas.tramo("etapa") as t:
+        t.anotar(filas=1)
+    assert not t and not trazas.activo()
+    assert glob.glob(str(tmp_path / "*")) == []
+
+
+def test_resumir(ruta):
+    for ms, filas in [(10, 100), (20, 300), (30, None)]:
+        trazas._escribir({"etapa": "registro", "ms": ms, "filas": filas})
+    trazas._escribir({"etapa": "costos", "ms": 5, "error": "PrecioFaltante"})
+    with pytest.raises(ValueError), trazas.tramo("reporte", bytes=2048):
+        raise ValueError()
+    with open(ruta, "a", encoding="utf-8") as f:
+        f.write('{"etapa": "cort')  # Línea cortada
+
+    tabla = trazas.resumir(trazas.leer([ruta]))
+    assert list(tabla.index[:2]) == ["registro", "costos"]  # Por tiempo total
+    registro = tabla.loc["registro"]
+    assert (registro["n"], registro["p50_ms"], registro["max_ms"], registro["total_ms"]) == (3, 20, 30, 60)
+    assert registro["p95_ms"] == pytest.approx(29)
+    assert registro["filas_prom"] == 200
+    assert tabla.loc["costos", "errores"] == 1 and tabla.loc["registro", "errores"] == 0
+    assert tabla.loc["reporte", "bytes_prom"] == 2048 and tabla.loc["reporte", "errores"] == 1
+
+
+def test_rotar(ruta, monkeypatch):
+    monkeypatch.setattr(trazas, "TAMANO_MAXIMO", 1000)
+    for i in range(200):
+        trazas._escribir({"etapa": "etapa", "ms": 1, "i": i})
+    copias = sorted(glob.glob(ruta + "*"))
+    assert copias == [ruta, *(f"{ruta}.{i}" for i in range(1, trazas.COPIAS + 1))]
+    # Se conservan las líneas más nuevas, sin huecos, y las más viejas se descartan
+    numeros = sorted(r["i"] for r in trazas.leer(copias))
+    assert numeros[-1] == 199 and numeros == list(range(numeros[0], 200)) and numeros[0] > 0
+
+
+def test_varios_procesos_rotan_a_la_vez(tmp_path):
+    ruta = str(tmp_path / "trazas.jsonl")
+    procesos = [multiprocessing.Process(target=escribir_varias, args=(ruta, 200, 2000, 1000)) for _ in range(4)]
+    for p in procesos:
+        p.start()
+    for p in procesos:
+        p.join(60)
+        assert p.exitcode == 0
+    # Con copias de sobra no se pierde ninguna línea aunque dos procesos quieran rotar juntos
+    assert not glob.glob(ruta + ".lock")
+    copias = glob.glob(ruta + "*")
+    assert len(copias) > 2  # Rotó varias veces (cuántas depende de quién tomó el bloqueo)
+    assert len(trazas.leer(copias)) == 800
@@ -0,0 +1,69 @@
+import numpy as np
+
+from benchmarks import generador
+from qads import decision, lote
+from qads.vigilancia import Vigilante
+
+
+def vigilante(carpeta, al_estabilizarse=None):
+    listos = []
+    return Vigilante(str(carpeta), al_estabilizarse or listos.append, espera=2.0), listos
+
+
+def test_espera_a_que_el_reporte_deje_de_crecer(tmp_path):
+    ruta = tmp_path / "reporte.xlsx"
+    ruta.write_bytes(b"PK" * 10)
+    v, listos = vigilante(tmp_path)
+    assert v.revisar(ahora=0.0) == []
+
+    # Sigue creciendo: la espera vuelve a empezar desde el último cambio
+    with open(ruta, "ab") as f:
+        f.write(b"PK" * 10)
+    assert v.revisar(ahora=2.5) == []
+    assert v.revisar(ahora=4.0) == []
+    assert v.revisar(ahora=4.5) == [str(ruta)]
+    assert listos == [str(ruta)]
+
+
+def test_no_reprocesa_un_reporte_sin_cambios(tmp_path):
+    ruta = tmp_path / "reporte.xlsx"
+    ruta.write_bytes(b"PK" * 10)
+    (tmp_path / "~$reporte.xlsx").write_bytes(b"PK")  # Temporal de Excel
+    (tmp_path / "notas.txt").write_text("x")
+    v, listos = vigilante(tmp_path)
+    v.revisar(ahora=0.0)
+    assert v.revisar(ahora=3.0) == [str(ruta)]
+    assert v.revisar(ahora=10.0) == []
+    assert v.revisar(ahora=100.0) == []
+
+    # Reexportado con otro contenido: se vuelve a procesar
+    ruta.write_bytes(b"PK" * 20)
+    v.revisar(ahora=101.0)
+    assert v.revisar(ahora=104.0) == [str(ruta)]
+    assert listos == [str(ruta), str(ruta)]
+
+
+def test_se_recupera_de_un_reporte_roto(tmp_path):
+    roto, sano = tmp_path / "a.xlsx", tmp_path / "b.xlsx"
+    roto.write_bytes(b"no es un excel")
+    generador.generar_reporte(str(sano), np.random.default_rng(1), tecnica="VMAT")
+    resultados = {}
+
+    def evaluar(ruta):
+        if ruta == str(sano) and ruta not in resultados:
+            resultados[ruta] = None
+            raise RuntimeError("el pool no responde")
+        resultados[ruta] = lote.evaluar_reporte(ruta, decision.Umbrales(), usar_cache=False)
+
+    v, _ = vigilante(tmp_path, evaluar)
+    v.revisar(ahora=0.0)
+    # Un reporte ilegible y una falla al evaluar otro no detienen la pasada
+    assert v.revisar(ahora=3.0) == [str(roto), str(sano)]
+    assert "Error" in resultados[str(roto)] and resultados[str(sano)] is None
+
+    # Cuando el sistema de planificación lo vuelve a exportar, se evalúa bien
+    generador.generar_reporte(str(roto), np.random.default_rng(2), tecnica="IMRT")
+    v.revisar(ahora=4.0)
+    assert v.revisar(ahora=7.0) == [str(roto)]
+    assert "Error" not in resultados[str(roto)]
+    assert resultados[str(roto)]["Técnica RT"] == "IMRT"